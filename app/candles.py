@@ -0,0 +1,179 @@
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+INTERVALS = {"1s": 1, "1m": 60, "5m": 300, "1h": 3600}
+
+
+class Candle() :
+
+    __slots__ = ("interval", "start", "open", "high", "low", "close", "volume", "notional", "trades")
+
+    def __init__(self, interval: str, start: int, price: Decimal):
+        self.interval = interval
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = Decimal(0)
+        self.notional = Decimal(0)
+        self.trades = 0
+
+    def add(self, price: Decimal, quantity: Decimal):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += quantity
+        self.notional += price * quantity
+        self.trades += 1
+
+    def toDict(self) -> dict:
+        return {
+            "interval": self.interval,
+            "start": datetime.fromtimestamp(self.start, timezone.utc).isoformat(),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "vwap": self.notional / self.volume if self.volume else self.close,
+            "trades": self.trades
+        }
+
+
+def candleFromLog(record: dict) -> Candle:
+    candle = Candle(record["interval"], int(datetime.fromisoformat(record["start"]).timestamp()), Decimal(record["open"]))
+    candle.high = Decimal(record["high"])
+    candle.low = Decimal(record["low"])
+    candle.close = Decimal(record["close"])
+    candle.volume = Decimal(record["volume"])
+    candle.notional = Decimal(record["vwap"]) * candle.volume
+    candle.trades = record["trades"]
+    return candle
+
+
+class CandleAggregator() :
+    """Incremental OHLCV + VWAP bars for several intervals.
+
+    Trades are folded into the open bar of every interval as they happen.
+    When a trade lands in a later bucket the open bar is completed, appended
+    to ``<directory>/<interval>.jsonl`` and kept in a bounded in-memory
+    history that the API serves from.
+    """
+
+    def __init__(self, directory: Optional[Path], intervals: Dict[str, int] = INTERVALS, history: int = 1000,
+                 publish: bool = False):
+        self.directory = Path(directory) if directory is not None else None
+        self.intervals = dict(intervals)
+        self.history = history
+        self.publish = publish
+        self.current: Dict[str, Candle] = {}
+        self.completed: Dict[str, deque] = {name: deque(maxlen=history) for name in self.intervals}
+        self.updated: Dict[str, None] = {}
+        self.closed: List[Candle] = []
+        self.files = {}
+
+    def add(self, timestamp: float, price: Decimal, quantity: Decimal, resumeFrom: Optional[Dict[str, int]] = None):
+        second = int(timestamp)
+        for name, seconds in self.intervals.items():
+            if resumeFrom is not None and second < resumeFrom.get(name, 0):
+                continue
+            start = second - second % seconds
+            candle = self.current.get(name)
+            if candle is None or start > candle.start:
+                if candle is not None:
+                    self.complete(candle)
+                candle = self.current[name] = Candle(name, start, price)
+            elif start < candle.start:
+                # late trade for a bar that is already closed
+                continue
+            candle.add(price, quantity)
+            if self.publish:
+                self.updated[name] = None
+
+    def addTrade(self, trade: dict, resumeFrom: Optional[Dict[str, int]] = None):
+        timestamp = datetime.fromisoformat(trade["timestamp"]).timestamp()
+        self.add(timestamp, Decimal(trade["price"]), Decimal(trade["quantity"]), resumeFrom)
+
+    def complete(self, candle: Candle):
+        self.completed[candle.interval].append(candle)
+        if self.publish:
+            self.closed.append(candle)
+        if self.directory is not None:
+            self.file(candle.interval).write(json.dumps(candle.toDict(), default=str) + "\n")
+
+    def file(self, interval: str):
+        if interval not in self.files:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.files[interval] = open(self.directory / f"{interval}.jsonl", "a")
+        return self.files[interval]
+
+    def drainUpdates(self) -> List[dict]:
+        updates = [candle.toDict() for candle in self.closed]
+        updates.extend(self.current[name].toDict() for name in self.updated)
+        self.closed = []
+        self.updated = {}
+        return updates
+
+    def candles(self, interval: str, limit: int = 100, includeOpen: bool = True) -> List[dict]:
+        if interval not in self.intervals:
+            raise ValueError(f"Unknown interval: {interval}. Use one of {', '.join(self.intervals)}.")
+        bars = list(self.completed[interval])
+        if includeOpen and interval in self.current:
+            bars.append(self.current[interval])
+        return [candle.toDict() for candle in bars[-limit:]]
+
+    def restore(self, trades: Callable[[Optional[str]], Iterator[dict]]):
+        """Reload persisted bars, then rebuild everything after them from the trade log in one pass.
+
+        ``trades`` is called with the earliest timestamp still needed (or None
+        for everything) and must yield trades in time order from there.
+        """
+        resumeFrom = {}
+        for name, seconds in self.intervals.items():
+            for record in self.readTail(name):
+                self.completed[name].append(candleFromLog(record))
+            if self.completed[name]:
+                resumeFrom[name] = self.completed[name][-1].start + seconds
+
+        since = None
+        if len(resumeFrom) == len(self.intervals):
+            since = datetime.fromtimestamp(min(resumeFrom.values()), timezone.utc).isoformat(timespec="microseconds")
+        publish, self.publish = self.publish, False
+        for trade in trades(since):
+            self.addTrade(trade, resumeFrom)
+        self.publish = publish
+        self.flush()
+
+    def readTail(self, interval: str) -> List[dict]:
+        if self.directory is None:
+            return []
+        path = self.directory / f"{interval}.jsonl"
+        if not path.exists():
+            return []
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - self.history * 400))
+            lines = f.read().splitlines()
+        if size > self.history * 400:
+            lines = lines[1:]
+        records = []
+        for line in lines[-self.history:]:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
+
+    def flush(self):
+        for f in self.files.values():
+            f.flush()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
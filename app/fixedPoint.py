@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+
+class DecimalScale() :
+    """Reference mode: the matching core works on Decimal prices and quantities."""
+
+    zero = Decimal(0)
+
+    def toPrice(self, value) -> Decimal:
+        return Decimal(value)
+
+    def toQuantity(self, value) -> Decimal:
+        return Decimal(value)
+
+    def fromPrice(self, value) -> Decimal:
+        return value
+
+    def fromQuantity(self, value) -> Decimal:
+        return value
+
+    def importOrder(self, order):
+        return order
+
+    def exportOrder(self, order) -> dict:
+        return order.toDict()
+
+
+class FixedPointScale(DecimalScale) :
+    """Scaled-integer mode: prices are stored as ticks and quantities as lots.
+
+    Conversion happens only when an order enters the engine and when prices
+    or quantities leave it (API responses, trades, journal, snapshots).
+    """
+
+    zero = 0
+
+    def __init__(self, tickSize: Decimal, lotSize: Decimal):
+        self.tickSize = Decimal(tickSize)
+        self.lotSize = Decimal(lotSize)
+        if self.tickSize <= 0 or self.lotSize <= 0:
+            raise ValueError("Tick size and lot size must be greater than 0.")
+
+    def toPrice(self, value) -> int:
+        ticks, remainder = divmod(Decimal(value), self.tickSize)
+        if remainder:
+            raise ValueError(f"Price {value} is not a multiple of the tick size {self.tickSize}.")
+        return int(ticks)
+
+    def toQuantity(self, value) -> int:
+        lots, remainder = divmod(Decimal(value), self.lotSize)
+        if remainder:
+            raise ValueError(f"Quantity {value} is not a multiple of the lot size {self.lotSize}.")
+        return int(lots)
+
+    def fromPrice(self, value: int) -> Decimal:
+        return value * self.tickSize
+
+    def fromQuantity(self, value: int) -> Decimal:
+        return value * self.lotSize
+
+    def importOrder(self, order):
+        order.price = self.toPrice(order.price)
+        order.quantity = self.toQuantity(order.quantity)
+        order.remainingQuantity = self.toQuantity(order.remainingQuantity)
+        if order.stopPrice is not None:
+            order.stopPrice = self.toPrice(order.stopPrice)
+        return order
+
+    def exportOrder(self, order) -> dict:
+        record = order.toDict()
+        record["price"] = self.fromPrice(order.price)
+        record["quantity"] = self.fromQuantity(order.quantity)
+        record["remainingQuantity"] = self.fromQuantity(order.remainingQuantity)
+        if order.stopPrice is not None:
+            record["stopPrice"] = self.fromPrice(order.stopPrice)
+        return record
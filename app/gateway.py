@@ -0,0 +1,345 @@
+import asyncio
+import socket
+import struct
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from uuid import uuid4
+from app.orderBook import Order, OrderType, OrderSide
+from app.registry import SymbolRegistry, UnknownSymbolError
+from app.snapshot import EPOCH, NO_TIME, toMicros
+
+# Wire format: every message is one type byte followed by a fixed-size,
+# little-endian body. Prices and quantities are int64 with DECIMALS implied
+# decimal places; symbols and accounts are NUL-padded ASCII; times are
+# microseconds since the epoch (NO_TIME when absent). Enums are indexes into
+# ORDER_TYPES / SIDES / TIFS.
+DECIMALS = 8
+ORDER_TYPES = [orderType.value for orderType in OrderType]
+SIDES = [OrderSide.BUY.value, OrderSide.SELL.value]
+TIFS = ["GTC", "DAY", "GTD"]
+
+# client -> gateway
+NEW = struct.Struct("<cQ16sBBBqqqq16s")    # N, clOrdId, symbol, orderType, side, tif, price, quantity, stopPrice, expiry, account
+CANCEL = struct.Struct("<cQ16sQ")          # C, clOrdId, symbol, origClOrdId
+REPLACE = struct.Struct("<cQ16sQqq")       # R, clOrdId, symbol, origClOrdId, price, quantity
+# gateway -> client
+ACK = struct.Struct("<cQBqq")              # A, clOrdId, status, cumQuantity, leavesQuantity
+EXECUTION = struct.Struct("<cQBqqqq")      # E, clOrdId, status, lastPrice, lastQuantity, cumQuantity, leavesQuantity
+REJECT = struct.Struct("<cQ64s")           # J, clOrdId, reason
+
+INBOUND = {b"N": NEW, b"C": CANCEL, b"R": REPLACE}
+OUTBOUND = {b"A": ACK, b"E": EXECUTION, b"J": REJECT}
+
+ACCEPTED, FILLED, PARTIAL, CANCELLED, REPLACED, EXPIRED, REJECTED = range(7)
+
+
+def toWire(value) -> int:
+    return int(Decimal(value).scaleb(DECIMALS))
+
+
+def fromWire(value: int) -> Decimal:
+    value = Decimal(value).scaleb(-DECIMALS)
+    return value.quantize(Decimal(1)) if value == value.to_integral_value() else value.normalize()
+
+
+def packText(value: Optional[str], size: int = 16) -> bytes:
+    return (value or "").encode()[:size]
+
+
+def unpackText(value: bytes) -> str:
+    return value.rstrip(b"\0").decode()
+
+
+class Owned() :
+    """Gateway-side state of one live order entered over a session."""
+
+    __slots__ = ("session", "clOrdId", "order", "quantity", "cumQuantity")
+
+    def __init__(self, session, clOrdId: int, order: Order):
+        self.session = session
+        self.clOrdId = clOrdId
+        self.order = order
+        self.quantity = order.quantity
+        self.cumQuantity = Decimal(0)
+
+
+class Session() :
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.orders: Dict[int, str] = {}
+
+    def send(self, payload: bytes):
+        if not self.writer.is_closing():
+            self.writer.write(payload)
+
+
+class OrderGateway() :
+    """Persistent-connection binary order entry next to the JSON API.
+
+    Each TCP session sends NEW / CANCEL / REPLACE messages and gets one ACK
+    (or REJECT) per request, plus an EXECUTION report for every fill or
+    expiry of its orders, taker and maker side alike. Requests are run
+    through ``submit`` (the API's sequencer) and the optional risk ``check``,
+    so the gateway feeds exactly the same books as ``/submitOrder``.
+    Fills are picked up from the market-data updates of each sequencer batch
+    via ``observe``.
+    """
+
+    def __init__(self, registry: SymbolRegistry, submit: Callable[..., Awaitable],
+                 check: Optional[Callable[[List[Order]], Awaitable]] = None):
+        self.registry = registry
+        self.submit = submit
+        self.check = check
+        self.owners: Dict[str, Owned] = {}
+        self.sessions: Dict[Session, asyncio.Task] = {}
+        self.loop = None
+        self.server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 9001):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        for session in self.sessions:
+            session.writer.close()
+        await asyncio.gather(*self.sessions.values(), return_exceptions=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = Session(writer)
+        self.sessions[session] = asyncio.current_task()
+        try:
+            while True:
+                kind = await reader.readexactly(1)
+                layout = INBOUND.get(kind)
+                if layout is None:
+                    print(f"⚠️ Unknown gateway message type {kind!r}, closing session")
+                    break
+                message = layout.unpack(kind + await reader.readexactly(layout.size - 1))
+                try:
+                    await self.dispatch(session, message)
+                except (ValueError, UnknownSymbolError) as e:
+                    session.send(REJECT.pack(b"J", message[1], packText(str(e), 64)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # orders stay on the book; their reports just have nowhere to go
+            for orderId in session.orders.values():
+                self.owners.pop(orderId, None)
+            self.sessions.pop(session, None)
+            writer.close()
+
+    async def dispatch(self, session: Session, message: tuple):
+        kind, clOrdId, symbol = message[0], message[1], unpackText(message[2])
+        if kind == b"N":
+            orderType, side, tif, price, quantity, stopPrice, expiry, account = message[3:]
+            if orderType >= len(ORDER_TYPES) or side >= len(SIDES) or tif >= len(TIFS):
+                raise ValueError("Unknown order type, side or time-in-force.")
+            order = Order(
+                orderId=str(uuid4()),
+                symbol=symbol,
+                orderType=ORDER_TYPES[orderType],
+                side=SIDES[side],
+                quantity=fromWire(quantity),
+                remainingQuantity=fromWire(quantity),
+                price=fromWire(price),
+                stopPrice=fromWire(stopPrice) if stopPrice else None,
+                timeStamp=datetime.now(timezone.utc),
+                tif=TIFS[tif],
+                expiry=None if expiry == NO_TIME else EPOCH + timedelta(0, 0, expiry),
+                account=unpackText(account) or None
+            )
+            await self.enter(session, clOrdId, order)
+            return
+
+        owned = self.owners.get(session.orders.get(message[3]))
+        if owned is None:
+            raise ValueError(f"Unknown order: {message[3]}")
+        original = owned.order
+
+        if kind == b"C":
+            if not await self.submit(self.registry.cancelOrder, symbol, original.orderId):
+                raise ValueError(f"Order not found: {message[3]}")
+            self.release(original.orderId)
+            session.send(ACK.pack(b"A", clOrdId, CANCELLED, toWire(owned.cumQuantity), 0))
+            return
+
+        # REPLACE: amend in place (size-down keeps priority); the order is addressed by the new clOrdId from now on
+        price, quantity = fromWire(message[4]), fromWire(message[5])
+        if self.check is not None:
+            await self.check([Order(
+                orderId=original.orderId, symbol=symbol, orderType=original.orderType, side=original.side,
+                quantity=quantity, remainingQuantity=quantity, price=price, tif=original.tif, account=original.account
+            )])
+        # re-keyed before matching so fills of a crossing amend are reported under the new clOrdId
+        previous = owned.clOrdId, owned.quantity
+        owned.clOrdId, owned.quantity = clOrdId, quantity
+        session.orders[clOrdId] = original.orderId
+        result = None
+        try:
+            result = await self.submit(self.registry.amendOrder, symbol, original.orderId, quantity, price)
+        finally:
+            if result is None:
+                # not amended: the order keeps its previous clOrdId and quantity
+                session.orders.pop(clOrdId, None)
+                owned.clOrdId, owned.quantity = previous
+        if result is None:
+            raise ValueError(f"Order not found: {message[3]}")
+
+        session.orders.pop(previous[0], None)
+        if not result["resting"]:
+            self.release(original.orderId)
+        session.send(ACK.pack(b"A", clOrdId, REPLACED, toWire(owned.cumQuantity), toWire(result["remainingQuantity"])))
+
+    async def enter(self, session: Session, clOrdId: int, order: Order):
+        if self.check is not None:
+            await self.check([order])
+        # registered before matching so the batch's fills find their owner
+        owned = self.owners[order.orderId] = Owned(session, clOrdId, order)
+        session.orders[clOrdId] = order.orderId
+        try:
+            result = await self.submit(self.registry.submitOrder, order.symbol, order, self.check is not None)
+        except Exception:
+            self.release(order.orderId)
+            raise
+
+        remaining = result["remainingQuantity"]
+        status, leaves = ACCEPTED, remaining
+        if not result["resting"]:
+            # filled, or the unfilled rest was dropped (ioc / fok / market / self-trade prevention)
+            status, leaves = FILLED if result["filledQuantity"] >= owned.quantity else CANCELLED, 0
+            self.release(order.orderId)
+        session.send(ACK.pack(b"A", clOrdId, status, toWire(result["filledQuantity"]), toWire(leaves)))
+
+    def release(self, orderId: str):
+        owned = self.owners.pop(orderId, None)
+        if owned is not None:
+            owned.session.orders.pop(owned.clOrdId, None)
+
+    def observe(self, updates: List[dict]):
+        # called on the sequencer thread; reports are written from the event loop
+        events = [update for update in updates if update.get("trades") or update.get("expired")]
+        if events and self.loop is not None and self.owners:
+            self.loop.call_soon_threadsafe(self.report, events)
+
+    def report(self, updates: List[dict]):
+        for update in updates:
+            for trade in update.get("trades", []):
+                price, quantity = Decimal(trade["price"]), Decimal(trade["quantity"])
+                for orderId in [trade["maker_order_id"], trade["taker_order_id"]]:
+                    owned = self.owners.get(orderId)
+                    if owned is None:
+                        continue
+                    owned.cumQuantity += quantity
+                    leaves = max(owned.quantity - owned.cumQuantity, Decimal(0))
+                    owned.session.send(EXECUTION.pack(
+                        b"E", owned.clOrdId, FILLED if leaves == 0 else PARTIAL,
+                        toWire(price), toWire(quantity), toWire(owned.cumQuantity), toWire(leaves)
+                    ))
+                    if leaves == 0:
+                        self.release(orderId)
+            for orderId in update.get("expired", []):
+                owned = self.owners.get(orderId)
+                if owned is not None:
+                    owned.session.send(EXECUTION.pack(b"E", owned.clOrdId, EXPIRED, 0, 0, toWire(owned.cumQuantity), 0))
+                    self.release(orderId)
+
+
+class Report(NamedTuple):
+    kind: str
+    clOrdId: int
+    status: int
+    price: Decimal = Decimal(0)
+    quantity: Decimal = Decimal(0)
+    cumQuantity: Decimal = Decimal(0)
+    leavesQuantity: Decimal = Decimal(0)
+    reason: str = ""
+
+
+class GatewayClient() :
+    """Blocking client for ``OrderGateway``.
+
+    ``newOrder`` / ``cancel`` / ``replace`` return the gateway's ACK or
+    REJECT for that request; EXECUTION reports that arrive meanwhile are
+    queued on ``executions`` (see ``nextExecution``).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9001, symbol: str = "BTC-USDT", timeout: Optional[float] = None):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.symbol = symbol
+        self.executions = deque()
+        self.nextId = 1
+
+    def newClOrdId(self) -> int:
+        clOrdId, self.nextId = self.nextId, self.nextId + 1
+        return clOrdId
+
+    def newOrder(self, side: str, quantity, price=0, orderType: str = "limit", tif: str = "GTC", stopPrice=None,
+                 expiry: Optional[datetime] = None, account: Optional[str] = None, symbol: Optional[str] = None) -> Report:
+        clOrdId = self.newClOrdId()
+        return self.request(clOrdId, NEW.pack(
+            b"N", clOrdId, packText(symbol or self.symbol), ORDER_TYPES.index(orderType), SIDES.index(side), TIFS.index(tif),
+            toWire(price), toWire(quantity), toWire(stopPrice or 0), toMicros(expiry), packText(account)
+        ))
+
+    def cancel(self, origClOrdId: int, symbol: Optional[str] = None) -> Report:
+        clOrdId = self.newClOrdId()
+        return self.request(clOrdId, CANCEL.pack(b"C", clOrdId, packText(symbol or self.symbol), origClOrdId))
+
+    def replace(self, origClOrdId: int, price, quantity, symbol: Optional[str] = None) -> Report:
+        clOrdId = self.newClOrdId()
+        return self.request(clOrdId, REPLACE.pack(
+            b"R", clOrdId, packText(symbol or self.symbol), origClOrdId, toWire(price), toWire(quantity)
+        ))
+
+    def request(self, clOrdId: int, payload: bytes) -> Report:
+        self.sock.sendall(payload)
+        while True:
+            report = self.readReport()
+            if report.kind == "execution":
+                self.executions.append(report)
+            elif report.clOrdId == clOrdId:
+                return report
+
+    def nextExecution(self) -> Report:
+        while not self.executions:
+            report = self.readReport()
+            if report.kind == "execution":
+                return report
+        return self.executions.popleft()
+
+    def readReport(self) -> Report:
+        kind = self.recvExactly(1)
+        layout = OUTBOUND[kind]
+        fields = layout.unpack(kind + self.recvExactly(layout.size - 1))
+        if kind == b"A":
+            _, clOrdId, status, cumQuantity, leavesQuantity = fields
+            return Report("ack", clOrdId, status, cumQuantity=fromWire(cumQuantity), leavesQuantity=fromWire(leavesQuantity))
+        if kind == b"E":
+            _, clOrdId, status, price, quantity, cumQuantity, leavesQuantity = fields
+            return Report("execution", clOrdId, status, fromWire(price), fromWire(quantity), fromWire(cumQuantity), fromWire(leavesQuantity))
+        return Report("reject", fields[1], REJECTED, reason=unpackText(fields[2]))
+
+    def recvExactly(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Gateway closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def close(self):
+        self.sock.close()
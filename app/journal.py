@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+class Journal() :
+    """Append-only log of order events (new / fill / cancel / expire).
+
+    Records are buffered and flushed + fsynced according to the batching
+    policy: every ``fsyncEvery`` events, or at most every ``fsyncIntervalMs``
+    milliseconds when an interval is given. In interval mode a timer syncs
+    records still pending once the interval has passed, even if nothing else
+    is written. ``fsyncEvery=0`` leaves durability to the OS.
+    """
+
+    def __init__(self, path: Path, fsyncEvery: int = 1, fsyncIntervalMs: Optional[float] = None):
+        self.path = Path(path)
+        self.fsyncEvery = fsyncEvery
+        self.fsyncIntervalMs = fsyncIntervalMs
+        self.seq = self.recoverSeq()
+        self.pending = 0
+        self.sinceCompaction = 0
+        self.lastSync = time.monotonic()
+        self.lock = threading.RLock()
+        self.timer = None
+        self.file = None
+        self.metrics = None
+        # when a list, every written line is also collected here for replication
+        self.tap = None
+
+    def recoverSeq(self) -> int:
+        # a book that appends without replaying first must continue the sequence, not restart it
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 64 * 1024))
+            for line in reversed(f.read().splitlines()):
+                try:
+                    return json.loads(line)["seq"]
+                except (json.JSONDecodeError, KeyError):
+                    continue
+        return 0
+
+    def open(self):
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, "a")
+        return self.file
+
+    def append(self, event: str, **fields) -> int:
+        self.seq += 1
+        record = {"seq": self.seq, "event": event}
+        record.update(fields)
+        self.write(json.dumps(record, default=str))
+        return self.seq
+
+    def appendRecord(self, record: dict) -> int:
+        # a follower journals the primary's records under the primary's sequence numbers
+        self.seq = record["seq"]
+        self.write(json.dumps(record, default=str))
+        return self.seq
+
+    def write(self, line: str):
+        with self.lock:
+            self.open().write(line + "\n")
+            if self.tap is not None:
+                self.tap.append(line)
+            self.pending += 1
+            self.sinceCompaction += 1
+
+            if self.fsyncIntervalMs is not None:
+                elapsedMs = (time.monotonic() - self.lastSync) * 1000
+                if elapsedMs >= self.fsyncIntervalMs:
+                    self.sync()
+                elif self.timer is None:
+                    # if traffic stops here, the pending records are still synced on time
+                    self.timer = threading.Timer((self.fsyncIntervalMs - elapsedMs) / 1000, self.sync)
+                    self.timer.daemon = True
+                    self.timer.start()
+            elif self.fsyncEvery and self.pending >= self.fsyncEvery:
+                self.sync()
+
+    def sync(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.file is not None and self.pending:
+                started = time.perf_counter_ns()
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                if self.metrics is not None:
+                    self.metrics.observe("journal_fsync", time.perf_counter_ns() - started)
+            self.pending = 0
+            self.lastSync = time.monotonic()
+
+    def replay(self, afterSeq: int = 0) -> Iterator[dict]:
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn write at the tail of the journal after a crash
+                    break
+                self.seq = max(self.seq, record["seq"])
+                if record["seq"] > afterSeq:
+                    yield record
+
+    def truncate(self):
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, "w")
+        self.sinceCompaction = 0
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Set
+
+RESYNC = "resync"
+DROP = "drop"
+
+
+class Subscriber() :
+
+    def __init__(self, symbol: str, maxQueue: int):
+        self.symbol = symbol
+        self.queue = asyncio.Queue(maxQueue)
+        self.resyncs = 0
+        self.snapshotSeq = 0
+
+    async def next(self):
+        # skips updates already contained in the last snapshot sent to this client
+        while True:
+            seq, message = await self.queue.get()
+            if seq is None or seq > self.snapshotSeq:
+                return message
+
+
+class MarketDataPublisher() :
+    """Fans engine updates out to WebSocket subscribers.
+
+    Every update is serialized once and the same string is queued for each
+    subscriber of its channel: the symbol for book updates, or
+    ``candles:<symbol>:<interval>`` for bars. A subscriber whose queue is
+    full is conflated: its backlog is discarded and it is told to resync
+    from a fresh snapshot. After ``maxResyncs`` conflations it is dropped.
+    Publishing never waits on a subscriber.
+    """
+
+    def __init__(self, maxQueue: int = 1000, maxResyncs: int = 5):
+        self.maxQueue = maxQueue
+        self.maxResyncs = maxResyncs
+        self.subscribers: Dict[str, Set[Subscriber]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+
+    def subscribe(self, symbol: str) -> Subscriber:
+        subscriber = Subscriber(symbol, self.maxQueue)
+        self.subscribers.setdefault(symbol, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self.subscribers.get(subscriber.symbol)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+
+    def publishThreadsafe(self, updates: List[dict]):
+        if updates and self.loop is not None:
+            self.loop.call_soon_threadsafe(self.publish, updates)
+
+    def publish(self, updates: List[dict]):
+        for update in updates:
+            subscribers = self.subscribers.get(update.get("channel", update["symbol"]))
+            if not subscribers:
+                continue
+            item = (update.get("seq"), json.dumps(update, default=str))
+            for subscriber in list(subscribers):
+                try:
+                    subscriber.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self.conflate(subscriber)
+
+    def conflate(self, subscriber: Subscriber):
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.resyncs += 1
+        if subscriber.resyncs > self.maxResyncs:
+            self.unsubscribe(subscriber)
+            subscriber.queue.put_nowait((None, DROP))
+        else:
+            subscriber.queue.put_nowait((None, RESYNC))
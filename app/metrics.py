@@ -0,0 +1,127 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+QUANTILES = (0.5, 0.99, 0.999)
+
+
+class Histogram() :
+    """Log-linear latency histogram in the style of HdrHistogram.
+
+    Values (nanoseconds) are bucketed by power of two, and each power of two
+    is split into ``2 ** subBits`` linear sub-buckets, so any recorded value
+    is reported within ``1 / 2 ** subBits`` of its true value. Recording is
+    a couple of integer operations and one list increment.
+    """
+
+    __slots__ = ("subBits", "counts", "count", "total", "max")
+
+    def __init__(self, subBits: int = 4, maxBits: int = 40):
+        self.subBits = subBits
+        self.counts = [0] * ((maxBits + 2) << subBits)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        subBits = self.subBits
+        if value < (1 << subBits):
+            index = value if value > 0 else 0
+        else:
+            exponent = value.bit_length() - subBits - 1
+            index = ((exponent + 1) << subBits) + (value >> exponent) - (1 << subBits)
+            if index >= len(self.counts):
+                index = len(self.counts) - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def bucketValue(self, index: int) -> int:
+        subBits = self.subBits
+        if index < (1 << subBits):
+            return index
+        exponent = (index >> subBits) - 1
+        mantissa = (index & ((1 << subBits) - 1)) + (1 << subBits)
+        # middle of the bucket
+        return (mantissa << exponent) + ((1 << exponent) >> 1)
+
+    def percentile(self, fraction: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.bucketValue(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        result = {"count": self.count, "sum": self.total, "max": self.max}
+        for quantile in QUANTILES:
+            result[quantile] = self.percentile(quantile)
+        return result
+
+
+class Metrics() :
+    """Counters and per-stage latency histograms for one order book.
+
+    The book records into it on the hot path; ``snapshot`` turns it into a
+    plain dict that can cross a worker pipe, and ``renderMetrics`` formats
+    snapshots from every book in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, tuple], int] = {}
+        self.stages: Dict[str, Histogram] = {}
+
+    def inc(self, name: str, labels: tuple = (), value: int = 1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage: str, nanoseconds: int):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.record(nanoseconds)
+
+    def snapshot(self, gauges: Optional[Dict[Tuple[str, tuple], float]] = None) -> dict:
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(gauges or {}),
+            "stages": {stage: histogram.summary() for stage, histogram in self.stages.items()}
+        }
+
+
+def formatLabels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ",".join(f'{name}="{value}"' for name, value in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+
+def renderMetrics(snapshots: Dict[str, dict], prefix: str = "engine") -> str:
+    """Prometheus exposition of per-symbol snapshots, one block per metric family."""
+    families: Dict[str, Tuple[str, List[str]]] = {}
+
+    def add(name: str, kind: str, labels: tuple, value):
+        families.setdefault(name, (kind, []))[1].append(f"{name}{formatLabels(labels)} {value}")
+
+    for symbol, snapshot in sorted(snapshots.items()):
+        symbolLabel = (("symbol", symbol),)
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            add(f"{prefix}_{name}", "counter", symbolLabel + labels, value)
+        for (name, labels), value in sorted(snapshot["gauges"].items()):
+            add(f"{prefix}_{name}", "gauge", symbolLabel + labels, value)
+        latency = f"{prefix}_stage_latency_seconds"
+        for stage, summary in sorted(snapshot["stages"].items()):
+            labels = symbolLabel + (("stage", stage),)
+            for quantile in QUANTILES:
+                add(latency, "summary", labels + (("quantile", str(quantile)),), summary[quantile] / 1e9)
+            families[latency][1].append(f"{latency}_sum{formatLabels(labels)} {summary['sum'] / 1e9}")
+            families[latency][1].append(f"{latency}_count{formatLabels(labels)} {summary['count']}")
+            add(f"{prefix}_stage_latency_max_seconds", "gauge", labels, summary["max"] / 1e9)
+
+    lines = []
+    for name, (kind, samples) in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
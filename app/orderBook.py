@@ -1,30 +1,55 @@
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
-from decimal import Decimal, InvalidOperation
-from datetime import datetime, timezone
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
 from sortedcontainers import SortedDict
 from collections import deque
 from uuid import uuid4
+import heapq
 import json
 import os
-from typing import Optional
+import sys
+from time import perf_counter_ns
+from typing import List, Optional
 from pathlib import Path
+from app.journal import Journal
+from app.tradeLog import TradeLog
+from app.sink import EventSink, FileSink
+from app.priceLevel import PriceLevel
+from app.fixedPoint import DecimalScale, FixedPointScale
+from app.candles import CandleAggregator
+from app.metrics import Metrics
+from app.snapshot import SnapshotReader, SnapshotWriter, HEADER, EPOCH, NO_TIME, NO_ACCOUNT
+from itertools import islice
 
 BASE_DIR = Path(__file__).resolve().parent.parent 
 LOG_DIR = BASE_DIR / "Logs"
-LOG_DIR.mkdir(exist_ok=True)
 
 class OrderType(str, Enum) :
     MARKET = 'market'
     LIMIT = 'limit'
     IOC = 'ioc'  
     FOK = 'fok'  
+    STOP = 'stop'
+    STOP_LIMIT = 'stop_limit'
+
+# a triggered stop becomes a market order, a triggered stop_limit a limit order
+STOP_TYPES = {OrderType.STOP.value: OrderType.MARKET.value, OrderType.STOP_LIMIT.value: OrderType.LIMIT.value}
 
 class OrderSide(str, Enum) :
     BUY = 'buy'
     SELL = 'sell'
 
-@dataclass(init=True, repr=True, eq=True, order=True, unsafe_hash=False, frozen=False)
+class SelfTradePrevention(str, Enum) :
+    NONE = 'none'
+    CANCEL_NEWEST = 'cancelNewest'
+    CANCEL_OLDEST = 'cancelOldest'
+    CANCEL_BOTH = 'cancelBoth'
+
+def internString(value):
+    return sys.intern(value) if type(value) is str else value
+
+@dataclass(init=True, repr=True, eq=True, order=True, unsafe_hash=False, frozen=False, slots=True)
 class Order() :
 
     orderId: str=field(
@@ -48,15 +73,57 @@ class Order() :
         default=Decimal(0.0), 
         metadata={"description": "Price of the order (only for limit orders)"}
         )
-    timeStamp: datetime = field(default_factory=datetime.now(timezone.utc))
+    timeStamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     remainingQuantity: Decimal=field(default=Decimal(0.0))
     tif: str = field(default="GTC", metadata={"description": "Time-in-force policy (GTC, DAY, GTD)"})
     expiry: Optional[datetime] = field(default=None, metadata={"description": "Expiry datetime for GTD"})
+    account: Optional[str] = field(default=None, metadata={"description": "Owning account, used by risk checks and self-trade prevention"})
+    stopPrice: Optional[Decimal] = field(default=None, metadata={"description": "Trigger price of stop and stop_limit orders"})
+    prevOrder: Optional["Order"] = field(default=None, init=False, repr=False, compare=False)
+    nextOrder: Optional["Order"] = field(default=None, init=False, repr=False, compare=False)
+    level: Optional[PriceLevel] = field(default=None, init=False, repr=False, compare=False)
+    handle: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.symbol = internString(self.symbol)
+        self.orderType = internString(self.orderType)
+        self.side = internString(self.side)
+        self.tif = internString(self.tif)
+        self.account = internString(self.account)
+
+    def toDict(self) -> dict:
+        return {name: getattr(self, name) for name in ORDER_FIELDS}
+
+ORDER_FIELDS = tuple(f.name for f in fields(Order) if f.init)
 
 class OrderValidationError(Exception): pass
 class OrderNotFoundError(Exception): pass
 class OrderExpiredError(Exception): pass
 
+def timestampKey(value: datetime) -> str:
+    # fixed-width UTC ISO strings, so trade timestamps compare correctly as text
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+def expiryKey(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def orderFromLog(orderLog: dict) -> Order:
+    order = Order(**orderLog)
+    order.price = Decimal(order.price)
+    order.quantity = Decimal(order.quantity)
+    order.remainingQuantity = Decimal(order.remainingQuantity)
+    if order.stopPrice is not None:
+        order.stopPrice = Decimal(order.stopPrice)
+    if isinstance(order.timeStamp, str):
+        order.timeStamp = datetime.fromisoformat(order.timeStamp)
+    if isinstance(order.expiry, str):
+        order.expiry = datetime.fromisoformat(order.expiry)
+    return order
+
 
 @dataclass
 class OrderBook() :
@@ -71,246 +138,895 @@ class OrderBook() :
         "bestOfferQuantity" : Decimal(0.0)
     })
     orderMap: dict=field(default_factory=dict)
-    trades: list=field(default_factory=list)
+    trades: deque=field(default_factory=deque)
+    logDir: Optional[Path]=None
+    fsyncEvery: int=1
+    fsyncIntervalMs: Optional[float]=None
+    compactEvery: int=10000
+    tradeSegmentBytes: int=64 * 1024 * 1024
+    tradeSegmentSeconds: Optional[float]=3600
+    autoFlush: bool=True
+    recentTrades: int=10000
+    tickSize: Optional[Decimal]=None
+    lotSize: Optional[Decimal]=None
+    scale: DecimalScale=field(init=False, repr=False)
+    # None writes to logDir (FileSink); MemorySink() runs without touching the file system
+    sink: Optional[EventSink]=field(default=None, repr=False)
+    journal: Journal=field(init=False, repr=False)
+    tradeLog: TradeLog=field(init=False, repr=False)
+    dirtyLevels: dict=field(default_factory=dict, repr=False)
+    levelChanges: list=field(default_factory=list, repr=False)
+    bboChanged: bool=False
+    topOfBook: tuple=field(default=(0, 0, 0, 0), repr=False)
+    marketData: bool=False
+    marketDataSeq: int=0
+    eventTrades: list=field(default_factory=list, repr=False)
+    eventExpired: list=field(default_factory=list, repr=False)
+    expiryHeap: list=field(default_factory=list, repr=False)
+    buyStops: SortedDict=field(default_factory=SortedDict, repr=False)
+    sellStops: SortedDict=field(default_factory=SortedDict, repr=False)
+    stopMap: dict=field(default_factory=dict, repr=False)
+    lastPrice: Optional[Decimal]=field(default=None, repr=False)
+    triggerRange: Optional[tuple]=field(default=None, repr=False)
+    version: int=field(default=0, repr=False)
+    depthCache: dict=field(default_factory=dict, repr=False)
+    depthCacheVersion: int=field(default=-1, repr=False)
+    replicate: bool=False
+    replicaTrades: list=field(default_factory=list, repr=False)
+    replicaCompactions: list=field(default_factory=list, repr=False)
+    following: bool=field(default=False, repr=False)
+    outbox: list=field(default_factory=list, repr=False)
+    nextHandle: int=field(default=1, repr=False)
+    candles: bool=False
+    candleHistory: int=1000
+    candleAggregator: Optional[CandleAggregator]=field(default=None, init=False, repr=False)
+    metrics: bool=True
+    selfTradePrevention: str=SelfTradePrevention.NONE.value
+    meter: Optional[Metrics]=field(default=None, init=False, repr=False)
 
-    def BBOUpdate(self):
-        try:
-            if self.offerOrders:
-                bestOfferPrice = self.offerOrders.peekitem(0)[0]
-                queue = self.offerOrders.get(bestOfferPrice, deque())
-                bestOfferQuantity = sum(
-                    Decimal(order.remainingQuantity) for order in queue if order and order.remainingQuantity
-                )
-            else:
-                bestOfferPrice = bestOfferQuantity = Decimal(0.0)
-
-            if self.bidOrders:
-                bestBidPrice = self.bidOrders.peekitem(-1)[0]
-                queue = self.bidOrders.get(bestBidPrice, deque())
-                bestBidQuantity = sum(
-                    Decimal(order.remainingQuantity) for order in queue if order and order.remainingQuantity
-                )
-            else:
-                bestBidPrice = bestBidQuantity = Decimal(0.0)
+    def __post_init__(self):
+        # resolved here rather than as the field default, so LOG_DIR can be redirected (tests)
+        self.logDir = Path(self.logDir if self.logDir is not None else LOG_DIR)
+        self.trades = deque(self.trades, maxlen=self.recentTrades)
+        if self.tickSize is None and self.lotSize is None:
+            self.scale = DecimalScale()
+        else:
+            self.scale = FixedPointScale(self.tickSize or Decimal(1), self.lotSize or Decimal(1))
+        if self.sink is None:
+            self.sink = FileSink(self.logDir, self.fsyncEvery, self.fsyncIntervalMs, self.tradeSegmentBytes,
+                                 self.tradeSegmentSeconds, self.autoFlush)
+        self.journal = self.sink.journal
+        self.tradeLog = self.sink.tradeLog
+        if self.candles:
+            self.candleAggregator = CandleAggregator(self.sink.candleDirectory, history=self.candleHistory, publish=self.marketData)
+        if self.metrics:
+            self.meter = self.journal.metrics = Metrics()
+        if self.replicate:
+            self.journal.tap = []
 
-            self.bbo = {
-                "bestBidPrice": bestBidPrice,
-                "bestBidQuantity": bestBidQuantity,
-                "bestOfferPrice": bestOfferPrice,
-                "bestOfferQuantity": bestOfferQuantity
-            }
+    def BBOUpdate(self) -> bool:
+        zero = self.scale.zero
+        if self.offerOrders:
+            bestOfferPrice, level = self.offerOrders.peekitem(0)
+            bestOfferQuantity = level.totalQuantity
+        else:
+            bestOfferPrice = bestOfferQuantity = zero
+
+        if self.bidOrders:
+            bestBidPrice, level = self.bidOrders.peekitem(-1)
+            bestBidQuantity = level.totalQuantity
+        else:
+            bestBidPrice = bestBidQuantity = zero
+
+        topOfBook = (bestBidPrice, bestBidQuantity, bestOfferPrice, bestOfferQuantity)
+        if topOfBook == self.topOfBook:
+            return False
+
+        self.topOfBook = topOfBook
+        self.bbo = {
+            "bestBidPrice": self.scale.fromPrice(bestBidPrice),
+            "bestBidQuantity": self.scale.fromQuantity(bestBidQuantity),
+            "bestOfferPrice": self.scale.fromPrice(bestOfferPrice),
+            "bestOfferQuantity": self.scale.fromQuantity(bestOfferQuantity)
+        }
+        return True
+
+    def markLevel(self, side: str, price: Decimal):
+        self.dirtyLevels[(side, price)] = None
+
+    def finishEvent(self):
+        if self.dirtyLevels:
+            self.version += 1
+        changes = []
+        for side, price in self.dirtyLevels:
+            book = self.bidOrders if side == OrderSide.BUY.value else self.offerOrders
+            level = book.get(price)
+            changes.append({
+                "side": side,
+                "price": self.scale.fromPrice(price),
+                "quantity": self.scale.fromQuantity(level.totalQuantity if level else self.scale.zero),
+                "orders": len(level) if level else 0
+            })
+        self.dirtyLevels.clear()
+        self.levelChanges = changes
+        self.bboChanged = self.BBOUpdate()
 
-        except (InvalidOperation, Exception) as e:
-            print(f"❌ Error in BBOUpdate: {e}")
-            self.bbo = {
-                "bestBidPrice": Decimal(0.0),
-                "bestBidQuantity": Decimal(0.0),
-                "bestOfferPrice": Decimal(0.0),
-                "bestOfferQuantity": Decimal(0.0)
+        if self.marketData and (changes or self.eventTrades or self.eventExpired):
+            self.marketDataSeq += 1
+            update = {
+                "type": "update",
+                "symbol": self.symbol,
+                "seq": self.marketDataSeq,
+                "levels": changes,
+                "trades": self.eventTrades
             }
+            if self.bboChanged:
+                update["bbo"] = self.bbo
+            if self.eventExpired:
+                update["expired"] = self.eventExpired
+            self.outbox.append(update)
+        self.eventTrades = []
+        self.eventExpired = []
+        self.maybeCompact()
+
+    def drainUpdates(self) -> list:
+        updates, self.outbox = self.outbox, []
+        if self.candleAggregator is not None and self.marketData:
+            for bar in self.candleAggregator.drainUpdates():
+                updates.append({
+                    "type": "candle",
+                    "symbol": self.symbol,
+                    "channel": f"candles:{self.symbol}:{bar['interval']}",
+                    "bar": bar
+                })
+        if self.replicate and (self.journal.tap or self.replicaTrades):
+            # the batch's journal lines and trades, shipped to followers after the group commit
+            updates.append({
+                "type": "replication",
+                "symbol": self.symbol,
+                "channel": f"replication:{self.symbol}",
+                "journal": self.journal.tap,
+                "tradeLog": self.replicaTrades,
+                "compactions": self.replicaCompactions
+            })
+            self.journal.tap, self.replicaTrades, self.replicaCompactions = [], [], []
+        return updates
+
+    def marketSnapshot(self) -> dict:
+        depth = self.depth()
+        return {
+            "type": "snapshot",
+            "symbol": self.symbol,
+            "seq": self.marketDataSeq,
+            "bid": depth["bid"],
+            "ask": depth["ask"],
+            "bbo": self.bbo
+        }
 
     def fillOrders(self):
-        fileBid = LOG_DIR / "orderBid.jsonl"
-        fileOffer = LOG_DIR / "orderOffer.jsonl"
+        if not self.sink.durable:
+            return
+        snapshotSeq = self.loadSnapshot()
+        if snapshotSeq is None:
+            self.loadLegacyLogs()
+            snapshotSeq = 0
 
-        if os.path.exists(fileBid):
-            with open(fileBid, "r") as file:
-                for line in file:
-                    try:
-                        orderLog = json.loads(line)
-                        orderToData = Order(**orderLog)
-                        orderToData.price = Decimal(orderToData.price)
-                        orderToData.quantity = Decimal(orderToData.quantity)
-                        orderToData.remainingQuantity = Decimal(orderToData.remainingQuantity)
-                        self.orderMap[orderToData.orderId] = orderToData
-                        if orderToData.price not in self.bidOrders:
-                            self.bidOrders[orderToData.price] = deque()
-                        self.bidOrders[orderToData.price].append(orderToData)
-                    except Exception as e:
-                        print(f"⚠️ Error loading bid order: {e} -> {line.strip()}")
+        for record in self.journal.replay(afterSeq=snapshotSeq):
+            try:
+                self.applyEvent(record)
+            except Exception as e:
+                print(f"⚠️ Error replaying journal event: {e} -> {record}")
+        self.journal.seq = max(self.journal.seq, snapshotSeq)
+
+        self.dirtyLevels.clear()
+        self.version += 1
+        self.BBOUpdate()
+
+    def loadSnapshot(self) -> Optional[int]:
+        binarySnapshot = self.sink.readSnapshot()
+        if binarySnapshot is not None:
+            return self.loadBinarySnapshot(binarySnapshot)
 
-        if os.path.exists(fileOffer):
-            with open(fileOffer, "r") as file:
+        lines = self.sink.readLegacySnapshot()
+        if not lines:
+            return None
+
+        header = json.loads(lines[0])
+        for line in lines[1:]:
+            try:
+                self.restOrder(self.scale.importOrder(orderFromLog(json.loads(line))))
+            except Exception as e:
+                print(f"⚠️ Error loading snapshot order: {e} -> {line.strip()}")
+        return header["seq"]
+
+    def loadBinarySnapshot(self, data: bytes) -> int:
+        # builds orders and levels directly: no JSON, no per-order Decimal parsing, no matching
+        reader = SnapshotReader(data, f"{self.symbol} snapshot")
+        prices = [self.scale.toPrice(value) for value in reader.prices]
+        quantities = [self.scale.toQuantity(value) for value in reader.quantities]
+        names = reader.names
+        accounts = reader.accounts
+        symbol = internString(self.symbol)
+        newOrder = Order.__new__
+        orderMap = self.orderMap
+        handle = self.nextHandle
+        records = zip(reader.orderIds, reader.orders())
+        levels = {OrderSide.BUY.value: {}, OrderSide.SELL.value: {}}
+        expiring = self.expiryHeap
+        expiringTifs = ["DAY", "GTD"]
+
+        for side, priceIndex, count in reader.levels():
+            price = prices[priceIndex]
+            level = levels[side][price] = PriceLevel(price)
+            previous = None
+            total = 0
+            for orderId, (quantity, remaining, timeStamp, expiry, orderType, tif, account) in islice(records, count):
+                order = newOrder(Order)
+                order.orderId = orderId
+                order.symbol = symbol
+                order.orderType = names[orderType]
+                order.side = side
+                order.quantity = quantities[quantity]
+                order.price = price
+                order.timeStamp = None if timeStamp == NO_TIME else EPOCH + timedelta(0, 0, timeStamp)
+                order.remainingQuantity = remaining = quantities[remaining]
+                order.tif = names[tif]
+                order.expiry = None if expiry == NO_TIME else EPOCH + timedelta(0, 0, expiry)
+                order.account = accounts[account] if account != NO_ACCOUNT else None
+                # resting orders are never stops; untriggered stops are re-journaled, not snapshotted
+                order.stopPrice = None
+                order.level = level
+                order.prevOrder = previous
+                order.nextOrder = None
+                order.handle = handle
+                handle += 1
+                if previous is None:
+                    level.head = order
+                else:
+                    previous.nextOrder = order
+                previous = order
+                total += remaining
+                orderMap[orderId] = order
+                if order.expiry is not None and order.tif in expiringTifs:
+                    expiring.append((expiryKey(order.expiry), order.handle, order))
+            level.tail = previous
+            level.count = count
+            level.totalQuantity = total
+
+        self.bidOrders.update(levels[OrderSide.BUY.value])
+        self.offerOrders.update(levels[OrderSide.SELL.value])
+        self.nextHandle = handle
+        heapq.heapify(expiring)
+        return reader.seq
+
+    def loadLegacyLogs(self):
+        for fileName in ["orderBid.jsonl", "orderOffer.jsonl"]:
+            fileOrders = self.logDir / fileName
+            if not os.path.exists(fileOrders):
+                continue
+            with open(fileOrders, "r") as file:
                 for line in file:
                     try:
-                        orderLog = json.loads(line)
-                        orderToData = Order(**orderLog)
-                        orderToData.price = Decimal(orderToData.price)
-                        orderToData.quantity = Decimal(orderToData.quantity)
-                        orderToData.remainingQuantity = Decimal(orderToData.remainingQuantity)
-                        self.orderMap[orderToData.orderId] = orderToData
-                        if orderToData.price not in self.offerOrders:
-                            self.offerOrders[orderToData.price] = deque()
-                        self.offerOrders[orderToData.price].append(orderToData)
+                        self.restOrder(self.scale.importOrder(orderFromLog(json.loads(line))))
                     except Exception as e:
-                        print(f"⚠️ Error loading offer order: {e} -> {line.strip()}")
+                        print(f"⚠️ Error loading order: {e} -> {line.strip()}")
 
-        try:
-            self.BBOUpdate()
-        except Exception as e:
-            print(f"❌ Error in BBOUpdate after fillOrders: {e}")
+    def assignHandle(self, order: Order):
+        order.handle = self.nextHandle
+        self.nextHandle += 1
+
+    def restOrder(self, order: Order):
+        if not order.handle:
+            self.assignHandle(order)
+        book = self.bidOrders if order.side == OrderSide.BUY.value else self.offerOrders
+        level = book.get(order.price)
+        if level is None:
+            level = book[order.price] = PriceLevel(order.price)
+        else:
+            order.price = level.price
+        level.append(order)
+        self.orderMap[order.orderId] = order
+        self.markLevel(order.side, order.price)
+        if order.expiry is not None and order.tif in ["DAY", "GTD"]:
+            heapq.heappush(self.expiryHeap, (expiryKey(order.expiry), order.handle, order))
+
+    def restStop(self, order: Order):
+        if not order.handle:
+            self.assignHandle(order)
+        stops = self.buyStops if order.side == OrderSide.BUY.value else self.sellStops
+        stops.setdefault(order.stopPrice, []).append(order)
+        self.stopMap[order.orderId] = order
+        if order.expiry is not None and order.tif in ["DAY", "GTD"]:
+            heapq.heappush(self.expiryHeap, (expiryKey(order.expiry), order.handle, order))
+
+    def removeStop(self, order: Order) -> bool:
+        if self.stopMap.pop(order.orderId, None) is None:
+            return False
+        stops = self.buyStops if order.side == OrderSide.BUY.value else self.sellStops
+        queue = stops[order.stopPrice]
+        queue.remove(order)
+        if not queue:
+            del stops[order.stopPrice]
+        return True
+
+    def expireOrders(self, now: Optional[datetime] = None) -> List[str]:
+        # expiryHeap is lazy: entries of orders that already left the book are skipped when popped
+        nowKey = expiryKey(now or datetime.now(timezone.utc))
+        heap = self.expiryHeap
+        expired = []
+        while heap and heap[0][0] <= nowKey:
+            _, handle, order = heapq.heappop(heap)
+            if order.level is not None:
+                self.removeOrder(order)
+            elif not self.removeStop(order):
+                continue
+            self.journal.append("expire", orderId=order.orderId)
+            expired.append(order.orderId)
+
+        if len(heap) > 2 * (len(self.orderMap) + len(self.stopMap)) + 64:
+            self.expiryHeap = [entry for entry in heap if entry[2].level is not None or entry[2].orderId in self.stopMap]
+            heapq.heapify(self.expiryHeap)
+        if expired:
+            self.eventExpired.extend(expired)
+            self.finishEvent()
+            if self.meter is not None:
+                self.meter.inc("expirations_total", value=len(expired))
+        return expired
+
+    def removeOrder(self, order: Order) -> bool:
+        self.orderMap.pop(order.orderId, None)
+        level = order.level
+        if level is None:
+            return False
+
+        level.remove(order)
+        self.markLevel(order.side, level.price)
+        if not level:
+            book = self.offerOrders if order.side == OrderSide.SELL.value else self.bidOrders
+            del book[level.price]
+        return True
+
+    def applyEvent(self, record: dict):
+        event = record["event"]
+        if event == "new":
+            order = self.scale.importOrder(orderFromLog(record["order"]))
+            if order.orderId in self.orderMap or order.orderId in self.stopMap:
+                # a stop re-journaled by compaction that this book already holds
+                return
+            if order.orderType in STOP_TYPES:
+                self.restStop(order)
+            else:
+                self.restOrder(order)
+            return
+
+        stop = self.stopMap.get(record["orderId"])
+        if stop is not None:
+            # trigger / cancel / expire; a triggered order's trades follow as their own events
+            self.removeStop(stop)
+            return
+        order = self.orderMap.get(record["orderId"])
+        if order is None:
+            return
+        if event == "fill":
+            order.level.reduce(order, self.scale.toQuantity(record["quantity"]))
+            self.markLevel(order.side, order.price)
+            if order.remainingQuantity <= 0:
+                self.removeOrder(order)
+        elif event in ["cancel", "expire"]:
+            self.removeOrder(order)
+        elif event == "amend":
+            self.reshapeOrder(order, self.scale.toQuantity(record["quantity"]), self.scale.toPrice(record["price"]))
+
+    def replicationPosition(self) -> tuple:
+        return self.journal.seq, self.tradeLog.seq
+
+    def catchUp(self, journalSeq: int, tradeSeq: int) -> dict:
+        """What a follower at (journalSeq, tradeSeq) is missing.
+
+        A follower from before the last compaction gets the binary snapshot,
+        and the journal from there on.
+        """
+        self.flush()
+        snapshot = None
+        data = self.sink.readSnapshot()
+        if data is not None and journalSeq < HEADER.unpack_from(data, 0)[1]:
+            snapshot, journalSeq = data, 0
+        return {
+            "snapshot": snapshot,
+            "journal": list(self.journal.replay(afterSeq=journalSeq)),
+            "tradeLog": list(self.tradeLog.scan(afterSeq=tradeSeq))
+        }
+
+    def promote(self):
+        self.following = False
+
+    def installSnapshot(self, data: bytes):
+        # a follower that fell behind the primary's last compaction restarts from its snapshot
+        for container in [self.bidOrders, self.offerOrders, self.orderMap, self.stopMap, self.buyStops, self.sellStops]:
+            container.clear()
+        self.expiryHeap = []
+        self.sink.writeSnapshot(data)
+        self.journal.truncate()
+        self.journal.seq = 0
+        self.fillOrders()
+
+    def applyReplicated(self, records: List[dict], trades: List[dict], compactions: List[int] = ()):
+        """Follower side of replication: apply a batch of the primary's journal records and trades.
+
+        The follower compacts where the primary did, so both journals keep the same sequence numbers.
+        """
+        self.following = True
+        for record in records:
+            # catch-up and the live stream can overlap
+            if record["seq"] <= self.journal.seq:
+                continue
+            try:
+                self.applyEvent(record)
+            except Exception as e:
+                print(f"⚠️ Error applying replicated event: {e} -> {record}")
+            self.journal.appendRecord(record)
+            if record["seq"] in compactions:
+                # the primary re-journals its stops right after, and they are in this batch
+                self.compactLogs(rejournalStops=False)
+
+        trades = [trade for trade in trades if trade["seq"] > self.tradeLog.seq]
+        if trades:
+            self.tradeLog.seq = trades[0]["seq"] - 1
+            self.tradeLog.append(trades)
+            self.trades.extend(trades)
+            self.eventTrades.extend(trades)
+            self.lastPrice = self.scale.toPrice(trades[-1]["price"])
+            if self.candleAggregator is not None:
+                for trade in trades:
+                    self.candleAggregator.addTrade(trade)
+        self.finishEvent()
+
+    def compactLogs(self, rejournalStops: bool = True):
+        if not self.sink.durable:
+            return
+        self.journal.sync()
+
+        writer = SnapshotWriter(self.symbol)
+        fromPrice, fromQuantity = self.scale.fromPrice, self.scale.fromQuantity
+        for side, book in [(OrderSide.BUY.value, self.bidOrders), (OrderSide.SELL.value, self.offerOrders)]:
+            for price, queue in book.items():
+                writer.addLevel(side, fromPrice(price), [
+                    (order.orderId, fromQuantity(order.quantity), fromQuantity(order.remainingQuantity),
+                     order.timeStamp, order.expiry, order.orderType, order.tif, order.account)
+                    for order in queue
+                ])
+        self.sink.writeSnapshot(writer.encode(self.journal.seq))
+        self.journal.truncate()
+        if self.replicate:
+            self.replicaCompactions.append(self.journal.seq)
+        if not rejournalStops:
+            return
+        # untriggered stops are not in the snapshot; they start the new journal instead
+        for order in self.stopMap.values():
+            self.journal.append("new", order=self.scale.exportOrder(order))
+
+    def maybeCompact(self):
+        # a follower compacts only where its primary did
+        if self.compactEvery and not self.following and self.journal.sinceCompaction >= self.compactEvery:
+            self.compactLogs()
 
     def validateOrder(self, order: Order):
         if order.quantity <= 0:
             raise ValueError("Quantity must be greater than 0.")
-        if order.orderType in [OrderType.LIMIT.value, OrderType.IOC.value, OrderType.FOK.value]:
+        if order.orderType in [OrderType.LIMIT.value, OrderType.IOC.value, OrderType.FOK.value, OrderType.STOP_LIMIT.value]:
             if order.price <= 0:
                 raise ValueError("Price must be greater than 0 for this order type.")
+        if order.orderType in STOP_TYPES and (order.stopPrice is None or order.stopPrice <= 0):
+            raise ValueError("Stop price must be greater than 0 for stop orders.")
         if not order.symbol:
             raise ValueError("Symbol must be provided.")
 
-    def addOrder(self, order: Order) -> Decimal: 
+    def addOrder(self, order: Order, prechecked: bool = False, finish: bool = True) -> Decimal: 
+
+        meter = self.meter
+        if meter is not None:
+            started = perf_counter_ns()
+            meter.inc("orders_total", (("type", order.orderType),))
 
         now = datetime.now(timezone.utc)
-        filledQty = Decimal(0.0)
+        filledQty = self.scale.zero
+        if self.expiryHeap and self.expiryHeap[0][0] <= now.timestamp():
+            # drop expired makers before this order can match against them
+            self.expireOrders(now)
+        try:
+            if not prechecked:
+                self.validateOrder(order)
+            # imported first, so every return below leaves the order in engine units
+            self.scale.importOrder(order)
+        except ValueError:
+            self.countReject(order, "invalid")
+            raise
         if order.tif == "DAY":
             expiry = datetime(now.year, now.month, now.day, 23, 59, 59, tzinfo=timezone.utc)
             if now > expiry:
-                return filledQty
+                self.countReject(order, "expired")
+                return self.scale.fromQuantity(filledQty)
+            if order.expiry is None:
+                order.expiry = expiry
         elif order.tif == "GTD":
             if order.expiry and now > order.expiry:
-                return filledQty
-        self.validateOrder(order)
+                self.countReject(order, "expired")
+                return self.scale.fromQuantity(filledQty)
+        self.assignHandle(order)
+        if meter is not None:
+            validated = perf_counter_ns()
+            meter.observe("validate", validated - started)
+
+        if order.orderType in STOP_TYPES:
+            filledQty = self.placeStop(order)
+        else:
+            filledQty = self.executeOrder(order)
+        if self.triggerRange is not None:
+            self.triggerStops()
 
+        # finish=False leaves the event open for the caller to finish once (addOrders)
+        if meter is None:
+            if finish:
+                self.finishEvent()
+            return self.scale.fromQuantity(filledQty)
+
+        matched = perf_counter_ns()
+        if finish:
+            self.finishEvent()
+        finished = perf_counter_ns()
+        meter.observe("match", matched - validated)
+        if finish:
+            meter.observe("bbo", finished - matched)
+        meter.observe("total", finished - started)
+        if not filledQty and order.orderType != OrderType.LIMIT.value and order.orderId not in self.stopMap:
+            self.countReject(order, "unfilled")
+        return self.scale.fromQuantity(filledQty)
+
+    def executeOrder(self, order: Order) -> Decimal:
         if order.orderType == OrderType.MARKET.value :
-            filledQty = self.marketOrder(order)
+            return self.marketOrder(order)
         
         elif order.orderType == OrderType.LIMIT.value :
-            filledQty = self.limitOrder(order)
-            if order.remainingQuantity  > 0 :
-                self.orderMap[order.orderId] = order
+            return self.limitOrder(order)
 
         elif order.orderType == OrderType.IOC.value :
-            filledQty = self.IOCOrder(order)
-            return filledQty
+            return self.IOCOrder(order)
 
         elif order.orderType == OrderType.FOK.value :
-            filledQty = self.FOKOrder(order)
+            return self.FOKOrder(order)
+        return self.scale.zero
 
-        self.BBOUpdate()
-        self.syncLogs()
-        return filledQty
+    def placeStop(self, order: Order) -> Decimal:
+        isBuy = order.side == OrderSide.BUY.value
+        if self.lastPrice is not None and (self.lastPrice >= order.stopPrice if isBuy else self.lastPrice <= order.stopPrice):
+            # already through the stop: enters the book straight away as a market / limit order
+            order.orderType = STOP_TYPES[order.orderType]
+            return self.executeOrder(order)
+        self.restStop(order)
+        self.journal.append("new", order=self.scale.exportOrder(order))
+        return self.scale.zero
+
+    def triggerStops(self):
+        # Each round activates every stop the traded range went through: buy stops by stop price
+        # ascending, then sell stops descending, oldest first within a price. Their trades
+        # can trigger further stops, which run in the next round of the same event.
+        while self.triggerRange is not None:
+            low, high = self.triggerRange
+            self.triggerRange = None
+            triggered = []
+            for stops, prices in [(self.buyStops, self.buyStops.irange(maximum=high)),
+                                  (self.sellStops, self.sellStops.irange(minimum=low, reverse=True))]:
+                for stopPrice in list(prices):
+                    triggered.extend(stops.pop(stopPrice))
+
+            for order in triggered:
+                del self.stopMap[order.orderId]
+                self.journal.append("trigger", orderId=order.orderId)
+                order.orderType = STOP_TYPES[order.orderType]
+                self.executeOrder(order)
+            if self.meter is not None and triggered:
+                self.meter.inc("stops_triggered_total", value=len(triggered))
+
+    def countReject(self, order: Order, reason: str):
+        if self.meter is not None:
+            self.meter.inc("rejects_total", (("type", order.orderType), ("reason", reason)))
 
     def comparePrice(self, order: Order, bookValue: Decimal) -> bool :
         if order.orderType == OrderType.MARKET.value : 
             return True
         
         if order.side == OrderSide.BUY.value : 
-            return Decimal(order.price) >= Decimal(bookValue)
+            return order.price >= bookValue
         
         else :
-            return Decimal(order.price) <= Decimal(bookValue)
+            return order.price <= bookValue
         
     def cancelOrder(self, orderId: str) -> bool:
-        order = self.orderMap.get(orderId)
+        order = self.orderMap.get(orderId) or self.stopMap.get(orderId)
         if not order:
             return False
 
-        book = self.offerOrders if order.side == OrderSide.SELL.value else self.bidOrders
-        canceled = False
+        started = perf_counter_ns() if self.meter is not None else 0
+        if not self.removeOrder(order):
+            self.removeStop(order)
+        self.journal.append("cancel", orderId=orderId)
+        self.finishEvent()
+        if self.meter is not None:
+            self.meter.observe("cancel", perf_counter_ns() - started)
+            self.meter.inc("cancels_total")
+        return True
 
-        if order.price in book:
-            queue = book[order.price]
-            for i, o in enumerate(queue):
-                if o.orderId == orderId:
-                    del queue[i]
-                    canceled = True
-                    break
-            if not queue:
-                del book[order.price]
+    def amendOrder(self, orderId: str, quantity: Optional[Decimal] = None, price: Optional[Decimal] = None) -> Optional[dict]:
+        """Change the total quantity and / or the price of a resting order.
 
-        if canceled or orderId in self.orderMap:
-            self.orderMap.pop(orderId, None)
-            self.syncLogs()
-            return True
+        A size-down at the same price is applied in place and keeps time
+        priority. Any other change moves the order to the back of its new
+        level as one ``amend`` journal event and one market-data update. A
+        new price that crosses the book trades like a fresh order instead
+        (journaled as cancel + fills + new). ``quantity`` includes what has
+        already been filled; at or below that the order is cancelled.
+        """
+        order = self.orderMap.get(orderId)
+        if order is None:
+            return None
+        if (quantity is not None and quantity <= 0) or (price is not None and price <= 0):
+            raise ValueError("Quantity and price must be greater than 0.")
 
-        return False
-    
-    def saveTradesToFile(self, file_path: str = LOG_DIR / "trade.jsonl"):
-        with open(file_path, "w") as f:
-            for trade in self.trades:
-                if isinstance(trade, dict):
-                    json.dump(trade, f, default=str)
-                else:
-                    json.dump(asdict(trade), f, default=str)
-                f.write("\n")
+        started = perf_counter_ns() if self.meter is not None else 0
+        newQuantity = order.quantity if quantity is None else self.scale.toQuantity(quantity)
+        newPrice = order.price if price is None else self.scale.toPrice(price)
+        remaining = newQuantity - (order.quantity - order.remainingQuantity)
+        isBuy = order.side == OrderSide.BUY.value
+        opposite = self.offerOrders if isBuy else self.bidOrders
+        filledQty = self.scale.zero
 
-    def loadTradesFromFile(self, file_path: str = LOG_DIR / "trade.jsonl"):
-        if not os.path.exists(file_path):
+        if remaining <= 0:
+            self.removeOrder(order)
+            self.journal.append("cancel", orderId=orderId)
+        elif newPrice != order.price and opposite and (newPrice >= opposite.peekitem(0)[0] if isBuy else newPrice <= opposite.peekitem(-1)[0]):
+            self.removeOrder(order)
+            self.journal.append("cancel", orderId=orderId)
+            order.price, order.quantity, order.remainingQuantity = newPrice, newQuantity, remaining
+            filledQty = self.matchOrder(order, opposite, isBuy)
+        else:
+            self.reshapeOrder(order, newQuantity, newPrice)
+            self.journal.append("amend", orderId=orderId, quantity=self.scale.fromQuantity(newQuantity), price=self.scale.fromPrice(newPrice))
+        if self.triggerRange is not None:
+            self.triggerStops()
+        self.finishEvent()
+
+        if self.meter is not None:
+            self.meter.observe("amend", perf_counter_ns() - started)
+            self.meter.inc("amends_total")
+        resting = order.level is not None
+        return {
+            "orderId": orderId,
+            "price": self.scale.fromPrice(order.price),
+            "quantity": self.scale.fromQuantity(newQuantity),
+            "filledQuantity": self.scale.fromQuantity(filledQty),
+            "remainingQuantity": self.scale.fromQuantity(order.remainingQuantity if resting else self.scale.zero),
+            "resting": resting
+        }
+
+    def reshapeOrder(self, order: Order, quantity, price):
+        remaining = quantity - (order.quantity - order.remainingQuantity)
+        if price == order.price and remaining <= order.remainingQuantity:
+            # size-down keeps the order where it is in the queue
+            order.level.reduce(order, order.remainingQuantity - remaining)
+            self.markLevel(order.side, price)
+        else:
+            self.removeOrder(order)
+            order.price, order.remainingQuantity = price, remaining
+            self.restOrder(order)
+        order.quantity = quantity
+
+    def addOrders(self, orders: List[Order]) -> List[Decimal]:
+        # the whole batch is checked before anything is matched, so one bad order rejects it untouched
+        for index, order in enumerate(orders):
+            try:
+                self.validateOrder(order)
+                self.scale.toPrice(order.price)
+                self.scale.toQuantity(order.quantity)
+                if order.stopPrice is not None:
+                    self.scale.toPrice(order.stopPrice)
+            except ValueError as e:
+                raise ValueError(f"Order {index}: {e}") from e
+        filled = [self.addOrder(order, prechecked=True, finish=False) for order in orders]
+        # one event for the whole batch: one market-data update, one version bump, one compaction check
+        self.finishEvent()
+        return filled
+
+    def cancelOrders(self, orderIds: List[str]) -> List[bool]:
+        started = perf_counter_ns() if self.meter is not None else 0
+        results = []
+        for orderId in orderIds:
+            order = self.orderMap.get(orderId) or self.stopMap.get(orderId)
+            if order is None:
+                results.append(False)
+                continue
+            if not self.removeOrder(order):
+                self.removeStop(order)
+            self.journal.append("cancel", orderId=orderId)
+            results.append(True)
+
+        cancelled = results.count(True)
+        if cancelled:
+            # one book event, and so one market-data update, for the whole batch
+            self.finishEvent()
+            if self.meter is not None:
+                self.meter.observe("cancel", perf_counter_ns() - started)
+                self.meter.inc("cancels_total", value=cancelled)
+        return results
+
+    def cancelAll(self, side: Optional[str] = None, minPrice: Optional[Decimal] = None,
+                  maxPrice: Optional[Decimal] = None) -> List[str]:
+        low = self.scale.toPrice(minPrice) if minPrice is not None else None
+        high = self.scale.toPrice(maxPrice) if maxPrice is not None else None
+        books = []
+        if side in [None, OrderSide.BUY.value]:
+            books.append(self.bidOrders)
+        if side in [None, OrderSide.SELL.value]:
+            books.append(self.offerOrders)
+
+        orderIds = [order.orderId for book in books for price in book.irange(low, high) for order in book[price]]
+        self.cancelOrders(orderIds)
+        return orderIds
+    
+    def loadTradesFromFile(self, segments: int = 2):
+        if not self.sink.durable:
             return
-        with open(file_path, "r") as f:
+        legacyFile = self.logDir / "trade.jsonl"
+        if not self.tradeLog.segments() and os.path.exists(legacyFile):
+            self.importLegacyTrades(legacyFile)
+        self.trades.extend(self.tradeLog.loadRecent(segments))
+        if self.candleAggregator is not None:
+            self.candleAggregator.restore(lambda since: self.tradeLog.scan(since=since))
+        if self.trades:
+            # stops compare against the last traded price
+            self.lastPrice = self.scale.toPrice(self.trades[-1]["price"])
+
+    def importLegacyTrades(self, legacyFile: Path):
+        # the first segment takes over the pre-segment trade.jsonl, numbered and indexed like
+        # any other trades; the old file is left in place but no longer read
+        trades = []
+        with open(legacyFile, "r") as f:
             for line in f:
-                trade = json.loads(line.strip())
-                self.trades.append(trade)
+                if not line.strip():
+                    continue
+                trade = json.loads(line)
+                trade["timestamp"] = timestampKey(datetime.fromisoformat(trade["timestamp"]))
+                trades.append(trade)
+        self.tradeLog.append(trades)
+        self.tradeLog.flush()
 
-    def matchOrder(self, currentOrder: Order, book: SortedDict, isBuy: bool, isFulfill: bool) -> Decimal :
+    def queryTrades(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    orderId: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100) -> dict:
+        since = timestampKey(since) if since is not None else None
+        until = timestampKey(until) if until is not None else None
+        if cursor is None and since is None and until is None and orderId is None:
+            # no filter: the newest ``limit`` trades, and a cursor to poll forward from
+            trades = self.recentPage(limit)
+            return {"trades": trades, "nextCursor": str(trades[-1]["seq"]) if trades and "seq" in trades[-1] else None}
+        afterSeq = int(cursor) if cursor else 0
+
+        oldest = self.trades[0] if self.trades else None
+        if oldest is not None and "seq" in oldest and (
+                afterSeq + 1 >= oldest["seq"] or (since is not None and since > oldest["timestamp"])):
+            trades = []
+            for trade in self.trades:
+                if trade["seq"] <= afterSeq or (since is not None and trade["timestamp"] < since):
+                    continue
+                if until is not None and trade["timestamp"] >= until:
+                    break
+                if orderId is not None and orderId not in (trade["maker_order_id"], trade["taker_order_id"]):
+                    continue
+                trades.append(trade)
+                if len(trades) >= limit:
+                    break
+        else:
+            trades = self.tradeLog.query(since, until, orderId, afterSeq, limit)
+
+        nextCursor = str(trades[-1]["seq"]) if len(trades) >= limit and "seq" in trades[-1] else None
+        return {"trades": trades, "nextCursor": nextCursor}
+
+    def recentPage(self, limit: int) -> List[dict]:
+        oldest = self.trades[0] if self.trades else None
+        if oldest is not None and (len(self.trades) >= limit or oldest.get("seq") == 1 or "seq" not in oldest):
+            return list(islice(reversed(self.trades), limit))[::-1]
+        # the ring is shorter than the page: read the tail of the log instead
+        return self.tradeLog.query(afterSeq=max(0, self.tradeLog.seq - limit), limit=limit)
+
+    def matchOrder(self, currentOrder: Order, book: SortedDict, isBuy: bool) -> Decimal :
         
-        prices = sorted(book.keys()) if isBuy else sorted(book.keys(), reverse=True)
-        filledQuantity = Decimal(0.0)
-        originalQuantity = currentOrder.remainingQuantity
+        filledQuantity = self.scale.zero
 
-        rollbackitems = []
-        removedItems = []
+        fills = []
+        trades = []
+        prints = []
 
-        for price in prices :
+        bestIndex = 0 if isBuy else -1
+        bookSide = OrderSide.SELL.value if isBuy else OrderSide.BUY.value
+        stp = self.selfTradeMode(currentOrder)
+        firstPrice = lastPrice = None
+        while book and currentOrder.remainingQuantity > 0 :
+            price, queue = book.peekitem(bestIndex)
             if not self.comparePrice(currentOrder, price) :
                 break
-            queue = book[price]
-            i = 0
-            while i < len(queue) and currentOrder.remainingQuantity > 0 :
-                item = queue[i]
-                minqty = min(Decimal(currentOrder.remainingQuantity), Decimal(item.remainingQuantity))
-                rollbackitems.append((price, item, item.remainingQuantity))
+            self.markLevel(bookSide, price)
+            item = queue.head
+            while item is not None and currentOrder.remainingQuantity > 0 :
+                if stp and item.account == currentOrder.account :
+                    if stp != SelfTradePrevention.CANCEL_NEWEST.value :
+                        nextItem = item.nextOrder
+                        queue.remove(item)
+                        self.orderMap.pop(item.orderId, None)
+                        self.journal.append("cancel", orderId=item.orderId)
+                        item = nextItem
+                    if stp != SelfTradePrevention.CANCEL_OLDEST.value :
+                        currentOrder.remainingQuantity = self.scale.zero
+                    if self.meter is not None:
+                        self.meter.inc("self_trades_prevented_total", (("mode", stp),))
+                    continue
+                minqty = min(currentOrder.remainingQuantity, item.remainingQuantity)
                 currentOrder.remainingQuantity -= minqty
-                item.remainingQuantity = Decimal(item.remainingQuantity) - minqty
+                queue.reduce(item, minqty)
                 filledQuantity += minqty
+                fills.append((item.orderId, minqty))
+                if firstPrice is None:
+                    firstPrice = price
+                lastPrice = price
 
+                now = datetime.now(timezone.utc)
+                tradePrice = self.scale.fromPrice(price)
+                tradeQuantity = self.scale.fromQuantity(minqty)
                 trade = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": timestampKey(now),
                 "symbol": self.symbol,
-                "price": str(price),
-                "quantity": str(minqty),
+                "price": str(tradePrice),
+                "quantity": str(tradeQuantity),
                 "maker_order_id": item.orderId,
                 "taker_order_id": currentOrder.orderId,
                 "aggressor_side": currentOrder.side
                 }
 
-                self.trades.append(trade)
+                trades.append(trade)
+                prints.append((now.timestamp(), tradePrice, tradeQuantity))
 
-                if Decimal(item.remainingQuantity) == 0 :
-                    removedItems.append((price, item))
+                if item.remainingQuantity == 0 :
                     self.orderMap.pop(item.orderId, None)
                     queue.popleft()
+                    item = queue.head
                     continue 
-                i += 1
-            self.saveTradesToFile()
+                item = item.nextOrder
 
             if len(queue) == 0 :
                 del book[price]
-            
-            if currentOrder.remainingQuantity == 0 :
-                break
 
-        if isFulfill and filledQuantity < originalQuantity :
-
-            currentOrder.remainingQuantity = originalQuantity   
-            for price, item, originalQty in rollbackitems :
-                item.remainingQuantity = originalQty
-            for price, order in removedItems :
-                if price not in book :
-                    book[price] = deque()
-                book[price].appendleft(order)
-                self.orderMap[order.orderId] = order
-            return Decimal(0.0)
+        persistStarted = perf_counter_ns() if self.meter is not None else 0
+        for orderId, quantity in fills :
+            self.journal.append("fill", orderId=orderId, quantity=self.scale.fromQuantity(quantity))
+        self.tradeLog.append(trades)
+        if self.meter is not None and fills:
+            self.meter.observe("persist", perf_counter_ns() - persistStarted)
+            self.meter.inc("fills_total", value=len(fills))
+        self.trades.extend(trades)
+        self.eventTrades.extend(trades)
+        if self.replicate:
+            self.replicaTrades.extend(trades)
+        if lastPrice is not None:
+            # levels are walked away from the touch, so the first and last fill bound the traded range
+            self.lastPrice = lastPrice
+            low, high = (firstPrice, lastPrice) if isBuy else (lastPrice, firstPrice)
+            if self.triggerRange is not None:
+                low, high = min(low, self.triggerRange[0]), max(high, self.triggerRange[1])
+            self.triggerRange = (low, high)
+        if self.candleAggregator is not None:
+            for timestamp, price, quantity in prints:
+                self.candleAggregator.add(timestamp, price, quantity)
         
         if (currentOrder.remainingQuantity > 0 and currentOrder.orderType == OrderType.LIMIT.value and currentOrder.tif not in ["IOC", "FOK"]):
-            updateBook = self.bidOrders if currentOrder.side == OrderSide.BUY.value else self.offerOrders
-            if currentOrder.price not in updateBook:
-                updateBook[currentOrder.price] = deque()
-            updateBook[currentOrder.price].append(currentOrder)
-            self.orderMap[currentOrder.orderId] = currentOrder
-
-        self.syncLogs()
+            self.restOrder(currentOrder)
+            self.journal.append("new", order=self.scale.exportOrder(currentOrder))
         
         return filledQuantity
     
@@ -331,11 +1047,12 @@ class OrderBook() :
             )
 
     def saveOrdersToFile(self, file_path: str = LOG_DIR / "orders_snapshot.jsonl"):
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
         with open(file_path, "w") as f:
             for book in [self.bidOrders, self.offerOrders]:
                 for queue in book.values():
                     for order in queue:
-                        json.dump(asdict(order), f, default=str)
+                        json.dump(self.scale.exportOrder(order), f, default=str)
                         f.write("\n")
 
     def loadOrdersFromFile(self, file_path: str = LOG_DIR / "orders_snapshot.jsonl"):
@@ -343,61 +1060,168 @@ class OrderBook() :
             return
         with open(file_path, "r") as f:
             for line in f:
-                order_data = json.loads(line.strip())
-                order = Order(**order_data)
-                self.addOrder(order)
+                # saved orders were already matched, so they go straight back onto the book
+                order = self.scale.importOrder(orderFromLog(json.loads(line.strip())))
+                self.restOrder(order)
+                self.journal.append("new", order=self.scale.exportOrder(order))
+        self.finishEvent()
 
 
     def syncLogs(self):
-        with open(LOG_DIR / "orderBid.jsonl", "w") as bidFile:
-            print("🔄 Writing bidOrders:")
-            for priceLevel in self.bidOrders.values():
-                for order in priceLevel:
-                    json.dump(asdict(order), bidFile, default=str)
-                    bidFile.write("\n")
-
-        with open(LOG_DIR / "orderOffer.jsonl", "w") as offerFile:
-            print("🔄 Writing offerOrders:")
-            for priceLevel in self.offerOrders.values():
-                for order in priceLevel:
-                    json.dump(asdict(order), offerFile, default=str)
-                    offerFile.write("\n")
+        self.journal.sync()
+
+    def flush(self):
+        started = perf_counter_ns() if self.meter is not None else 0
+        self.journal.sync()
+        self.tradeLog.flush()
+        if self.candleAggregator is not None:
+            self.candleAggregator.flush()
+        if self.meter is not None:
+            self.meter.observe("sync", perf_counter_ns() - started)
+
+    def metricsSnapshot(self) -> Optional[dict]:
+        if self.meter is None:
+            return None
+        gauges = {
+            ("book_levels", (("side", "bid"),)): len(self.bidOrders),
+            ("book_levels", (("side", "ask"),)): len(self.offerOrders),
+            ("resting_orders", ()): len(self.orderMap),
+            ("pending_stops", ()): len(self.stopMap),
+            ("journal_pending", ()): self.journal.pending,
+        }
+        return self.meter.snapshot(gauges)
+
+    def close(self):
+        self.journal.close()
+        self.tradeLog.close()
+        if self.candleAggregator is not None:
+            self.candleAggregator.close()
 
     def limitOrder(self, order: Order) -> Decimal:
         isBuy = order.side == OrderSide.BUY.value
-        return self.matchOrder(order, self.offerOrders if isBuy else self.bidOrders, isBuy, isFulfill=False)
+        return self.matchOrder(order, self.offerOrders if isBuy else self.bidOrders, isBuy)
 
     def marketOrder(self, order: Order) -> Decimal:
         isBuy = order.side == OrderSide.BUY.value
         book = self.offerOrders if isBuy else self.bidOrders
 
         if not book:  
-            return Decimal(0.0)
+            return self.scale.zero
 
-        return self.matchOrder(order, book, isBuy, isFulfill=False)
+        return self.matchOrder(order, book, isBuy)
     
     def IOCOrder(self, order: Order) -> Decimal:
         isBuy = order.side == OrderSide.BUY.value
-        filled = self.matchOrder(order, self.offerOrders if isBuy else self.bidOrders, isBuy, isFulfill=False)
-        order.remainingQuantity = Decimal(0.0)
+        filled = self.matchOrder(order, self.offerOrders if isBuy else self.bidOrders, isBuy)
+        order.remainingQuantity = self.scale.zero
         return filled
     
     def FOKOrder(self, order: Order) -> Decimal:
         isBuy = order.side == OrderSide.BUY.value
-        return self.matchOrder(order, self.offerOrders if isBuy else self.bidOrders, isBuy, isFulfill=True)
+        book = self.offerOrders if isBuy else self.bidOrders
+        # reject without touching the book unless the whole quantity is available within the limit
+        if self.availableQuantity(order, book, isBuy, order.remainingQuantity) < order.remainingQuantity:
+            return self.scale.zero
+        return self.matchOrder(order, book, isBuy)
+
+    def availableQuantity(self, order: Order, book: SortedDict, isBuy: bool, needed=None):
+        # resting quantity the order could take, walking levels in priority order and stopping at needed
+        available = self.scale.zero
+        stp = self.selfTradeMode(order)
+        for price in (book.irange(maximum=order.price) if isBuy else book.irange(minimum=order.price, reverse=True)):
+            if not stp:
+                available += book[price].totalQuantity
+            else:
+                # same-account makers are skipped (cancelOldest) or end the match (cancelNewest / cancelBoth)
+                for maker in book[price]:
+                    if maker.account != order.account:
+                        available += maker.remainingQuantity
+                    elif stp != SelfTradePrevention.CANCEL_OLDEST.value:
+                        return available
+            if needed is not None and available >= needed:
+                break
+        return available
+
+    def selfTradeMode(self, order: Order) -> Optional[str]:
+        if order.account is None or self.selfTradePrevention == SelfTradePrevention.NONE.value:
+            return None
+        return self.selfTradePrevention
+
+    def depthToPrice(self, side: str, price: Decimal) -> dict:
+        """Liquidity a ``side`` taker could reach up to ``price``, without matching anything."""
+        isBuy = side == OrderSide.BUY.value
+        book = self.offerOrders if isBuy else self.bidOrders
+        limit = self.scale.toPrice(price)
+        prices = list(book.irange(maximum=limit) if isBuy else book.irange(minimum=limit, reverse=True))
+        quantity = notional = self.scale.zero
+        for level in prices:
+            levelQuantity = book[level].totalQuantity
+            quantity += levelQuantity
+            notional += self.scale.fromPrice(level) * self.scale.fromQuantity(levelQuantity)
+        quantity = self.scale.fromQuantity(quantity)
+        return {
+            "side": side,
+            "price": price,
+            "levels": len(prices),
+            "quantity": quantity,
+            "averagePrice": notional / quantity if quantity else None
+        }
+
+    def depth(self) -> dict:
+        fromPrice, fromQuantity = self.scale.fromPrice, self.scale.fromQuantity
+        return {
+            "bid": [(fromPrice(price), fromQuantity(level.totalQuantity)) for price, level in reversed(self.bidOrders.items())],
+            "ask": [(fromPrice(price), fromQuantity(level.totalQuantity)) for price, level in self.offerOrders.items()]
+        }
+
+    def depthView(self, levels: Optional[int] = None, detail: str = "l2") -> str:
+        """Serialized depth of the top ``levels`` price levels per side, all levels when None.
+
+        ``l2`` gives quantity and order count per level, ``l3`` every order in
+        queue order. Results are cached per (levels, detail) until ``version``
+        moves, which happens once per event that changed a level.
+        """
+        if self.depthCacheVersion != self.version:
+            self.depthCache = {}
+            self.depthCacheVersion = self.version
+        key = (levels, detail)
+        cached = self.depthCache.get(key)
+        if cached is not None:
+            return cached
+        if detail not in ["l2", "l3"]:
+            raise ValueError(f"Unknown depth detail: {detail}")
+
+        fromPrice, fromQuantity = self.scale.fromPrice, self.scale.fromQuantity
+        bids, asks = self.bidOrders, self.offerOrders
+        sides = {
+            # both ends of the SortedDicts: no walk over levels below the top N
+            "bid": bids.islice(max(len(bids) - levels, 0) if levels else 0, reverse=True),
+            "ask": asks.islice(0, levels)
+        }
+        view = {"symbol": self.symbol, "version": self.version, "detail": detail}
+        for side, prices in sides.items():
+            book = bids if side == "bid" else asks
+            entries = view[side] = []
+            for price in prices:
+                level = book[price]
+                if detail == "l2":
+                    orders = len(level)
+                else:
+                    orders = [{"orderId": order.orderId, "quantity": fromQuantity(order.remainingQuantity)} for order in level]
+                entries.append({"price": fromPrice(price), "quantity": fromQuantity(level.totalQuantity), "orders": orders})
+        cached = self.depthCache[key] = json.dumps(view, default=str)
+        return cached
 
     def printOrderBook(self):
         print(f"\nOrder Book: {self.symbol}\n")
 
         print("Bids (Buy):")
-        for price in reversed(self.bidOrders.keys()):
-            total_quantity = sum(order.remainingQuantity for order in self.bidOrders[price])
-            print(f"  Price: {price} | Quantity: {total_quantity}")
+        for price, quantity in self.depth()["bid"]:
+            print(f"  Price: {price} | Quantity: {quantity}")
 
         print("\nAsks (Sell):")
-        for price in self.offerOrders.keys():
-            total_quantity = sum(order.remainingQuantity for order in self.offerOrders[price])
-            print(f"  Price: {price} | Quantity: {total_quantity}")
+        for price, quantity in self.depth()["ask"]:
+            print(f"  Price: {price} | Quantity: {quantity}")
 
         print("\nBest Bid:")
         print(f"  Price: {self.bbo.get('bestBidPrice', '-')}, Quantity: {self.bbo.get('bestBidQuantity', '-')}")
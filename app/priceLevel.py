@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+
+class PriceLevel() :
+    """FIFO queue of resting orders at one price.
+
+    Orders are linked intrusively through ``prevOrder`` / ``nextOrder`` and
+    point back at their level, so an order found through ``orderMap`` can be
+    unlinked in O(1) without scanning the queue. ``totalQuantity`` and
+    ``count`` are kept up to date on every add, fill and removal; fills must
+    go through ``reduce`` for that to hold.
+    """
+
+    __slots__ = ("price", "head", "tail", "count", "totalQuantity")
+
+    def __init__(self, price: Decimal):
+        self.price = price
+        self.head = None
+        self.tail = None
+        self.count = 0
+        self.totalQuantity = 0
+
+    def append(self, order):
+        order.level = self
+        order.prevOrder = self.tail
+        order.nextOrder = None
+        if self.tail is None:
+            self.head = order
+        else:
+            self.tail.nextOrder = order
+        self.tail = order
+        self.count += 1
+        self.totalQuantity += order.remainingQuantity
+
+    def appendleft(self, order):
+        order.level = self
+        order.prevOrder = None
+        order.nextOrder = self.head
+        if self.head is None:
+            self.tail = order
+        else:
+            self.head.prevOrder = order
+        self.head = order
+        self.count += 1
+        self.totalQuantity += order.remainingQuantity
+
+    def reduce(self, order, quantity):
+        order.remainingQuantity -= quantity
+        self.totalQuantity -= quantity
+
+    def remove(self, order):
+        if order.prevOrder is None:
+            self.head = order.nextOrder
+        else:
+            order.prevOrder.nextOrder = order.nextOrder
+        if order.nextOrder is None:
+            self.tail = order.prevOrder
+        else:
+            order.nextOrder.prevOrder = order.prevOrder
+        order.prevOrder = order.nextOrder = order.level = None
+        self.count -= 1
+        self.totalQuantity -= order.remainingQuantity
+
+    def popleft(self):
+        order = self.head
+        if order is None:
+            raise IndexError("pop from an empty PriceLevel")
+        self.remove(order)
+        return order
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        order = self.head
+        while order is not None:
+            nextOrder = order.nextOrder
+            yield order
+            order = nextOrder
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.count
+        if index < 0 or index >= self.count:
+            raise IndexError("PriceLevel index out of range")
+        if index == self.count - 1:
+            return self.tail
+        for i, order in enumerate(self):
+            if i == index:
+                return order
+
+    def __repr__(self):
+        return f"PriceLevel(price={self.price}, quantity={self.totalQuantity}, orders={self.count})"
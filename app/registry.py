@@ -0,0 +1,312 @@
+import multiprocessing
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.orderBook import OrderBook, Order, LOG_DIR
+
+
+class UnknownSymbolError(Exception): pass
+
+
+def orderResult(book: OrderBook, order: Order, filledQuantity) -> dict:
+    return {
+        "orderId": order.orderId,
+        "filledQuantity": filledQuantity,
+        "remainingQuantity": book.scale.fromQuantity(order.remainingQuantity),
+        # on the book, or waiting for its stop price
+        "resting": order.orderId in book.orderMap or order.orderId in book.stopMap
+    }
+
+
+def submitOrder(book: OrderBook, order: Order, prechecked: bool = False) -> dict:
+    return orderResult(book, order, book.addOrder(order, prechecked))
+
+
+def submitOrders(book: OrderBook, orders: List[Order]) -> List[dict]:
+    return [orderResult(book, order, filled) for order, filled in zip(orders, book.addOrders(orders))]
+
+
+def cancelOrder(book: OrderBook, orderId: str) -> bool:
+    return book.cancelOrder(orderId)
+
+
+def amendOrder(book: OrderBook, orderId: str, quantity, price) -> Optional[dict]:
+    return book.amendOrder(orderId, quantity, price)
+
+
+def cancelOrders(book: OrderBook, orderIds: List[str]) -> List[bool]:
+    return book.cancelOrders(orderIds)
+
+
+def cancelAll(book: OrderBook, side: Optional[str], minPrice, maxPrice) -> List[str]:
+    return book.cancelAll(side, minPrice, maxPrice)
+
+
+def expireOrders(book: OrderBook) -> List[str]:
+    return book.expireOrders()
+
+
+def trades(book: OrderBook, query: dict) -> dict:
+    return book.queryTrades(**query)
+
+
+def bbo(book: OrderBook) -> dict:
+    return dict(book.bbo)
+
+
+def depth(book: OrderBook) -> dict:
+    return book.depth()
+
+
+def depthView(book: OrderBook, levels: Optional[int], detail: str) -> str:
+    return book.depthView(levels, detail)
+
+
+def depthToPrice(book: OrderBook, side: str, price) -> dict:
+    return book.depthToPrice(side, price)
+
+
+def candles(book: OrderBook, interval: str, limit: int) -> list:
+    if book.candleAggregator is None:
+        raise ValueError(f"Candles are not enabled for {book.symbol}")
+    return book.candleAggregator.candles(interval, limit)
+
+
+def metrics(book: OrderBook) -> Optional[dict]:
+    return book.metricsSnapshot()
+
+
+def flush(book: OrderBook) -> list:
+    book.flush()
+    return book.drainUpdates()
+
+
+def marketSnapshot(book: OrderBook) -> dict:
+    return book.marketSnapshot()
+
+
+def replicationPosition(book: OrderBook) -> tuple:
+    return book.replicationPosition()
+
+
+def catchUp(book: OrderBook, journalSeq: int, tradeSeq: int) -> dict:
+    return book.catchUp(journalSeq, tradeSeq)
+
+
+def applyReplication(book: OrderBook, batch: dict) -> tuple:
+    if batch.get("snapshot") is not None:
+        book.installSnapshot(batch["snapshot"])
+    book.applyReplicated(batch.get("journal", []), batch.get("tradeLog", []), batch.get("compactions", []))
+    return book.replicationPosition()
+
+
+def promote(book: OrderBook):
+    book.promote()
+
+
+# Every operation the API can route to a book. The same functions run
+# in-process and inside worker processes, so both paths behave the same.
+COMMANDS = {
+    "submitOrder": submitOrder,
+    "submitOrders": submitOrders,
+    "cancelOrder": cancelOrder,
+    "amendOrder": amendOrder,
+    "cancelOrders": cancelOrders,
+    "cancelAll": cancelAll,
+    "expireOrders": expireOrders,
+    "trades": trades,
+    "bbo": bbo,
+    "depth": depth,
+    "depthView": depthView,
+    "depthToPrice": depthToPrice,
+    "candles": candles,
+    "metrics": metrics,
+    "flush": flush,
+    "marketSnapshot": marketSnapshot,
+    "replicationPosition": replicationPosition,
+    "catchUp": catchUp,
+    "applyReplication": applyReplication,
+    "promote": promote,
+}
+
+MUTATING_COMMANDS = {"submitOrder", "submitOrders", "cancelOrder", "amendOrder", "cancelOrders", "cancelAll", "expireOrders",
+                     "applyReplication"}
+
+
+def openBook(symbol: str, logDir: Path, bookOptions: dict) -> OrderBook:
+    book = OrderBook(symbol=symbol, logDir=Path(logDir) / symbol, **bookOptions)
+    book.fillOrders()
+    book.loadTradesFromFile()
+    return book
+
+
+def workerMain(conn, logDir: Path, bookOptions: Dict[str, dict]):
+    books = {symbol: openBook(symbol, logDir, options) for symbol, options in bookOptions.items()}
+    conn.send(("ready", None))
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        command, symbol, args = request
+        try:
+            conn.send(("ok", COMMANDS[command](books[symbol], *args)))
+        except Exception as e:
+            conn.send(("error", e))
+
+    for book in books.values():
+        book.close()
+    conn.close()
+
+
+class Worker() :
+    """Client side of one worker process owning a group of symbols, given as symbol -> book options."""
+
+    def __init__(self, logDir: Path, bookOptions: Dict[str, dict]):
+        context = multiprocessing.get_context("spawn")
+        self.conn, childConn = context.Pipe()
+        self.lock = threading.Lock()
+        self.process = context.Process(
+            target=workerMain, args=(childConn, logDir, bookOptions), daemon=True
+        )
+        self.process.start()
+        childConn.close()
+        self.conn.recv()
+
+    def call(self, command: str, symbol: str, args: tuple):
+        with self.lock:
+            self.conn.send((command, symbol, args))
+            status, result = self.conn.recv()
+        if status == "error":
+            raise result
+        return result
+
+    def close(self):
+        with self.lock:
+            self.conn.send(None)
+        self.process.join()
+
+
+class SymbolRegistry() :
+    """Owns one OrderBook per symbol, each with its own log directory.
+
+    Symbols listed in ``groups`` are pinned, one group per worker process;
+    all other symbols are matched in-process. ``bookOptions`` apply to every
+    book, and ``symbolOptions`` override them per symbol (e.g. tickSize).
+    """
+
+    def __init__(self, symbols: List[str], logDir: Path = LOG_DIR, groups: Optional[List[List[str]]] = None,
+                 bookOptions: Optional[dict] = None, symbolOptions: Optional[Dict[str, dict]] = None):
+        self.logDir = Path(logDir)
+        self.bookOptions = bookOptions or {}
+        self.symbolOptions = symbolOptions or {}
+        self.books: Dict[str, OrderBook] = {}
+        self.workers: Dict[str, Worker] = {}
+        self.dirtySymbols = set()
+
+        pinned = set()
+        for group in groups or []:
+            worker = Worker(self.logDir, {symbol: self.optionsFor(symbol) for symbol in group})
+            for symbol in group:
+                self.workers[symbol] = worker
+                pinned.add(symbol)
+
+        for symbol in symbols:
+            if symbol not in pinned:
+                self.books[symbol] = openBook(symbol, self.logDir, self.optionsFor(symbol))
+
+    def optionsFor(self, symbol: str) -> dict:
+        return {**self.bookOptions, **self.symbolOptions.get(symbol, {})}
+
+    @property
+    def symbols(self) -> List[str]:
+        return sorted(set(self.books) | set(self.workers))
+
+    def call(self, command: str, symbol: str, *args):
+        if command in MUTATING_COMMANDS:
+            self.dirtySymbols.add(symbol)
+        book = self.books.get(symbol)
+        if book is not None:
+            return COMMANDS[command](book, *args)
+        worker = self.workers.get(symbol)
+        if worker is None:
+            raise UnknownSymbolError(f"Unknown symbol: {symbol}")
+        return worker.call(command, symbol, args)
+
+    def submitOrder(self, symbol: str, order: Order, prechecked: bool = False) -> dict:
+        order.symbol = symbol
+        return self.call("submitOrder", symbol, order, prechecked)
+
+    def submitOrders(self, symbol: str, orders: List[Order]) -> List[dict]:
+        for order in orders:
+            order.symbol = symbol
+        return self.call("submitOrders", symbol, orders)
+
+    def cancelOrder(self, symbol: str, orderId: str) -> bool:
+        return self.call("cancelOrder", symbol, orderId)
+
+    def amendOrder(self, symbol: str, orderId: str, quantity=None, price=None) -> Optional[dict]:
+        return self.call("amendOrder", symbol, orderId, quantity, price)
+
+    def cancelOrders(self, symbol: str, orderIds: List[str]) -> List[bool]:
+        return self.call("cancelOrders", symbol, orderIds)
+
+    def cancelAll(self, symbol: str, side: Optional[str] = None, minPrice=None, maxPrice=None) -> List[str]:
+        return self.call("cancelAll", symbol, side, minPrice, maxPrice)
+
+    def expireOrders(self, symbol: Optional[str] = None) -> Dict[str, List[str]]:
+        return {symbol: self.call("expireOrders", symbol) for symbol in ([symbol] if symbol is not None else self.symbols)}
+
+    def trades(self, symbol: str, **query) -> dict:
+        return self.call("trades", symbol, query)
+
+    def bbo(self, symbol: str) -> dict:
+        return self.call("bbo", symbol)
+
+    def depth(self, symbol: str) -> dict:
+        return self.call("depth", symbol)
+
+    def depthView(self, symbol: str, levels: Optional[int] = None, detail: str = "l2") -> str:
+        return self.call("depthView", symbol, levels, detail)
+
+    def depthToPrice(self, symbol: str, side: str, price) -> dict:
+        return self.call("depthToPrice", symbol, side, price)
+
+    def candles(self, symbol: str, interval: str, limit: int = 100) -> list:
+        return self.call("candles", symbol, interval, limit)
+
+    def marketSnapshot(self, symbol: str) -> dict:
+        return self.call("marketSnapshot", symbol)
+
+    def replicationPositions(self) -> Dict[str, tuple]:
+        return {symbol: self.call("replicationPosition", symbol) for symbol in self.symbols}
+
+    def catchUp(self, symbol: str, journalSeq: int, tradeSeq: int) -> dict:
+        return self.call("catchUp", symbol, journalSeq, tradeSeq)
+
+    def applyReplication(self, symbol: str, batch: dict) -> tuple:
+        return self.call("applyReplication", symbol, batch)
+
+    def promote(self):
+        for symbol in self.symbols:
+            self.call("promote", symbol)
+
+    def metrics(self) -> Dict[str, dict]:
+        snapshots = {symbol: self.call("metrics", symbol) for symbol in self.symbols}
+        return {symbol: snapshot for symbol, snapshot in snapshots.items() if snapshot is not None}
+
+    def flush(self, symbols: Optional[List[str]] = None) -> list:
+        # with a ShardedSequencer each sequencer flushes only the symbols it owns
+        updates = []
+        for symbol in list(self.dirtySymbols) if symbols is None else symbols:
+            if symbol not in self.dirtySymbols:
+                continue
+            self.dirtySymbols.discard(symbol)
+            if symbol in self.books or symbol in self.workers:
+                updates.extend(self.call("flush", symbol))
+        return updates
+
+    def close(self):
+        for book in self.books.values():
+            book.close()
+        for worker in set(self.workers.values()):
+            worker.close()
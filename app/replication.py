@@ -0,0 +1,166 @@
+import asyncio
+import base64
+import json
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.registry import SymbolRegistry
+
+# Wire format: newline-delimited JSON. A follower opens with
+#   {"positions": {symbol: [journalSeq, tradeSeq]}}
+# and then receives batches
+#   {"symbol", "snapshot" (base64, optional), "journal": [...], "tradeLog": [...], "compactions": [...]}
+# Journal entries are the primary's journal lines, verbatim.
+
+
+def encodeBatch(symbol: str, journal: List, trades: List[dict], compactions: List[int] = (),
+                snapshot: Optional[bytes] = None) -> bytes:
+    message = {"symbol": symbol, "journal": journal, "tradeLog": trades, "compactions": list(compactions)}
+    if snapshot is not None:
+        message["snapshot"] = base64.b64encode(snapshot).decode()
+    return (json.dumps(message, default=str) + "\n").encode()
+
+
+def decodeBatch(line: bytes) -> dict:
+    batch = json.loads(line)
+    batch["journal"] = [json.loads(record) if isinstance(record, str) else record for record in batch["journal"]]
+    if "snapshot" in batch:
+        batch["snapshot"] = base64.b64decode(batch["snapshot"])
+    return batch
+
+
+class Follower() :
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        # batches published while the catch-up is still being read
+        self.backlog: Optional[List[bytes]] = []
+
+    def send(self, payload: bytes):
+        if self.backlog is not None:
+            self.backlog.append(payload)
+        elif not self.writer.is_closing():
+            self.writer.write(payload)
+
+
+class ReplicationServer() :
+    """Streams every book's journal and trade log to hot-standby followers.
+
+    The books hand over each sequencer batch's journal lines and trades as a
+    "replication" update once the batch has been committed; ``observe`` fans
+    them out. A connecting follower first gets whatever it is missing since
+    the positions it reports (the snapshot too, if it predates the last
+    compaction), read through ``submit`` so it lines up with the stream.
+    """
+
+    def __init__(self, registry: SymbolRegistry, submit: Callable[..., Awaitable]):
+        self.registry = registry
+        self.submit = submit
+        self.followers: Dict[Follower, asyncio.Task] = {}
+        self.loop = None
+        self.server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 9002):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        for follower in self.followers:
+            follower.writer.close()
+        await asyncio.gather(*self.followers.values(), return_exceptions=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        follower = Follower(writer)
+        self.followers[follower] = asyncio.current_task()
+        try:
+            hello = json.loads(await reader.readline())
+            positions = hello.get("positions", {})
+            for symbol in self.registry.symbols:
+                journalSeq, tradeSeq = positions.get(symbol, (0, 0))
+                missing = await self.submit(self.registry.catchUp, symbol, journalSeq, tradeSeq)
+                writer.write(encodeBatch(symbol, missing["journal"], missing["tradeLog"], snapshot=missing["snapshot"]))
+                await writer.drain()
+            # overlap with the catch-up is dropped by sequence number on the follower
+            backlog, follower.backlog = follower.backlog, None
+            writer.write(b"".join(backlog))
+            await writer.drain()
+            # nothing more is expected from the follower; this returns when it disconnects
+            await reader.read()
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            self.followers.pop(follower, None)
+            writer.close()
+
+    def observe(self, updates: List[dict]):
+        # called on the sequencer thread; batches are written from the event loop
+        batches = [update for update in updates if update.get("type") == "replication"]
+        if batches and self.loop is not None and self.followers:
+            self.loop.call_soon_threadsafe(self.deliver, batches)
+
+    def deliver(self, batches: List[dict]):
+        payload = b"".join(
+            encodeBatch(batch["symbol"], batch["journal"], batch["tradeLog"], batch["compactions"]) for batch in batches
+        )
+        for follower in list(self.followers):
+            follower.send(payload)
+
+
+class ReplicationClient() :
+    """Keeps the local books a hot standby of the primary at ``host``:``port``.
+
+    Batches are applied through ``submit`` like any other command, so reads
+    on the standby stay consistent. On a dropped connection it reconnects
+    and catches up from its own positions; ``stop`` ends following, after
+    which the books can be promoted.
+    """
+
+    def __init__(self, registry: SymbolRegistry, submit: Callable[..., Awaitable],
+                 host: str = "127.0.0.1", port: int = 9002, retryInterval: float = 1.0):
+        self.registry = registry
+        self.submit = submit
+        self.host = host
+        self.port = port
+        self.retryInterval = retryInterval
+        self.task = None
+        self.connected = asyncio.Event()
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+        return self
+
+    async def run(self):
+        while True:
+            try:
+                await self.follow()
+            except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                print(f"⚠️ Replication from {self.host}:{self.port} interrupted: {e}")
+            self.connected.clear()
+            await asyncio.sleep(self.retryInterval)
+
+    async def follow(self):
+        positions = await self.submit(self.registry.replicationPositions)
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write((json.dumps({"positions": positions}) + "\n").encode())
+            await writer.drain()
+            self.connected.set()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("primary closed the connection")
+                batch = decodeBatch(line)
+                await self.submit(self.registry.applyReplication, batch["symbol"], batch)
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
@@ -0,0 +1,101 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+PRICED_TYPES = ["limit", "ioc", "fok", "stop_limit"]
+STOP_TYPES = ["stop", "stop_limit"]
+TIFS = ["GTC", "DAY", "GTD"]
+
+
+class RiskRejectedError(ValueError): pass
+
+
+@dataclass
+class RiskLimits() :
+
+    maxOrderQuantity: Optional[Decimal]=None
+    maxOrderNotional: Optional[Decimal]=None
+    accountMaxNotional: Dict[str, Decimal]=field(default_factory=dict)
+    priceBand: Optional[Decimal]=None
+
+
+def checkOrder(order, reference: Optional[Tuple[Decimal, Decimal]], limits: RiskLimits) -> Optional[str]:
+    """Stateless pre-trade checks. Returns the reason the order is rejected, or None.
+
+    ``reference`` is the (best bid, best offer) snapshot of the order's book
+    when the check was scheduled; zero means that side is empty.
+    """
+    if order.quantity <= 0:
+        return "Quantity must be greater than 0."
+    if order.orderType in PRICED_TYPES and order.price <= 0:
+        return "Price must be greater than 0 for this order type."
+    if order.orderType in STOP_TYPES and (order.stopPrice is None or order.stopPrice <= 0):
+        return "Stop price must be greater than 0 for stop orders."
+    if not order.symbol:
+        return "Symbol must be provided."
+    if order.tif not in TIFS:
+        return f"Unknown time-in-force: {order.tif}."
+
+    if limits.maxOrderQuantity is not None and order.quantity > limits.maxOrderQuantity:
+        return f"Quantity {order.quantity} exceeds the limit of {limits.maxOrderQuantity}."
+    if order.orderType in PRICED_TYPES:
+        notional = order.price * order.quantity
+        if limits.maxOrderNotional is not None and notional > limits.maxOrderNotional:
+            return f"Notional {notional} exceeds the limit of {limits.maxOrderNotional}."
+        accountLimit = limits.accountMaxNotional.get(order.account)
+        if accountLimit is not None and notional > accountLimit:
+            return f"Notional {notional} exceeds the limit of {accountLimit} for account {order.account}."
+
+        if limits.priceBand is not None and reference is not None:
+            bid, offer = reference
+            mid = (bid + offer) / 2 if bid and offer else bid or offer
+            if mid and abs(order.price - mid) > mid * limits.priceBand:
+                return f"Price {order.price} is outside the {limits.priceBand:%} band around {mid}."
+    return None
+
+
+def checkOrders(orders: list, references: list, limits: RiskLimits) -> List[Optional[str]]:
+    return [checkOrder(order, reference, limits) for order, reference in zip(orders, references)]
+
+
+class PreTradePipeline() :
+    """Runs the stateless pre-trade checks in a process pool, off the matching thread.
+
+    Price bands use ``references``, a per-symbol (best bid, best offer) cache
+    fed from the market-data updates of each sequencer batch, so the check
+    never reads the live book. Checks that need the book (self-trade
+    prevention, FOK liquidity) stay in the matcher. ``workers=0`` runs the
+    checks inline.
+    """
+
+    def __init__(self, limits: RiskLimits, workers: int = 2):
+        self.limits = limits
+        self.references: Dict[str, Tuple[Decimal, Decimal]] = {}
+        self.pool = None
+        if workers:
+            self.pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def observe(self, updates: List[dict]):
+        for update in updates:
+            bbo = update.get("bbo")
+            if bbo is not None:
+                self.references[update["symbol"]] = (bbo["bestBidPrice"], bbo["bestOfferPrice"])
+
+    async def check(self, orders: list):
+        references = [self.references.get(order.symbol) for order in orders]
+        if self.pool is None:
+            reasons = checkOrders(orders, references, self.limits)
+        else:
+            loop = asyncio.get_running_loop()
+            reasons = await loop.run_in_executor(self.pool, checkOrders, orders, references, self.limits)
+
+        for index, reason in enumerate(reasons):
+            if reason is not None:
+                raise RiskRejectedError(reason if len(orders) == 1 else f"Order {index}: {reason}")
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
@@ -0,0 +1,108 @@
+import queue
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+
+class Sequencer() :
+    """Single writer in front of the matching engine.
+
+    Callers ``submit`` work from any thread; one consumer thread drains the
+    inbound queue in micro-batches of up to ``maxBatch`` items, runs them in
+    arrival order, then runs the ``afterBatch`` hooks (journal group commit,
+    market-data fan-out) once, and only then resolves each caller's future.
+    """
+
+    def __init__(self, maxBatch: int = 256, afterBatch: Optional[List[Callable]] = None):
+        self.maxBatch = maxBatch
+        self.afterBatch = list(afterBatch or [])
+        self.inbound = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="sequencer", daemon=True)
+        self.seq = 0
+        self.batches = 0
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future = Future()
+        self.inbound.put((future, fn, args))
+        return future
+
+    def run(self):
+        running = True
+        while running:
+            batch = [self.inbound.get()]
+            while len(batch) < self.maxBatch:
+                try:
+                    batch.append(self.inbound.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+
+            results = []
+            for future, fn, args in batch:
+                self.seq += 1
+                try:
+                    results.append((future, fn(*args), None))
+                except Exception as e:
+                    results.append((future, None, e))
+            self.batches += 1
+
+            for hook in self.afterBatch:
+                try:
+                    hook()
+                except Exception as e:
+                    print(f"❌ Error in sequencer afterBatch hook: {e}")
+
+            for future, result, error in results:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def stop(self):
+        self.inbound.put(None)
+        self.thread.join()
+
+
+class ShardedSequencer() :
+    """One Sequencer per pinned worker group, plus a default one.
+
+    A call whose first argument is a pinned symbol runs on its group's
+    sequencer, so groups living in different worker processes match in
+    parallel while each symbol keeps a single writer. Everything else (books
+    matched in-process, registry-wide reads) runs on the default sequencer.
+    Each ``afterBatch`` hook is called with the symbols of the sequencer that
+    finished the batch, or None for the default one.
+    """
+
+    def __init__(self, groups: Optional[List[List[str]]] = None, maxBatch: int = 256,
+                 afterBatch: Optional[List[Callable]] = None):
+        hooks = list(afterBatch or [])
+        self.default = Sequencer(maxBatch, [partial(hook, None) for hook in hooks])
+        self.lanes: Dict[str, Sequencer] = {}
+        self.sequencers = [self.default]
+        for group in groups or []:
+            sequencer = Sequencer(maxBatch, [partial(hook, list(group)) for hook in hooks])
+            sequencer.thread.name = f"sequencer-{group[0]}"
+            self.sequencers.append(sequencer)
+            for symbol in group:
+                self.lanes[symbol] = sequencer
+
+    def start(self):
+        for sequencer in self.sequencers:
+            sequencer.start()
+        return self
+
+    def submit(self, fn: Callable, *args) -> Future:
+        sequencer = self.lanes.get(args[0]) if args and isinstance(args[0], str) else None
+        return (sequencer or self.default).submit(fn, *args)
+
+    def stop(self):
+        for sequencer in self.sequencers:
+            sequencer.stop()
@@ -0,0 +1,170 @@
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Optional, Protocol
+from app.journal import Journal
+from app.tradeLog import TradeLog
+
+
+class EventSink(Protocol) :
+    """What an OrderBook needs from its storage.
+
+    ``journal`` and ``tradeLog`` take the book's events and trades, candles are
+    written under ``candleDirectory`` (None: not at all), and compaction goes
+    through ``readSnapshot`` / ``writeSnapshot`` as encoded binary snapshots.
+    Books only recover from, and compact into, a ``durable`` sink.
+    """
+
+    durable: bool
+    candleDirectory: Optional[Path]
+    journal: Journal
+    tradeLog: TradeLog
+
+    def readSnapshot(self) -> Optional[bytes]: ...
+
+    def writeSnapshot(self, data: bytes): ...
+
+    def readLegacySnapshot(self) -> Optional[List[str]]: ...
+
+
+class FileSink() :
+    """Where an OrderBook persists to: the journal, the trade log and candle
+    files under ``logDir``, plus the snapshots it compacts into.
+
+    This is the default. A book gets one built from its own options unless
+    another sink is passed in.
+    """
+
+    durable = True
+
+    def __init__(self, logDir: Path, fsyncEvery: int = 1, fsyncIntervalMs: Optional[float] = None,
+                 tradeSegmentBytes: int = 64 * 1024 * 1024, tradeSegmentSeconds: Optional[float] = 3600,
+                 autoFlush: bool = True):
+        self.logDir = Path(logDir)
+        self.journal = Journal(self.logDir / "journal.jsonl", fsyncEvery, fsyncIntervalMs)
+        self.tradeLog = TradeLog(self.logDir / "trades", tradeSegmentBytes, tradeSegmentSeconds, autoFlush=autoFlush)
+        self.candleDirectory = self.logDir / "candles"
+        self.snapshotPath = self.logDir / "snapshot.bin"
+        self.legacySnapshotPath = self.logDir / "snapshot.jsonl"
+
+    def readSnapshot(self) -> Optional[bytes]:
+        if not self.snapshotPath.exists():
+            return None
+        with open(self.snapshotPath, "rb") as f:
+            return f.read()
+
+    def writeSnapshot(self, data: bytes):
+        self.logDir.mkdir(parents=True, exist_ok=True)
+        tmpPath = Path(str(self.snapshotPath) + ".tmp")
+        with open(tmpPath, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath, self.snapshotPath)
+        # a JSONL snapshot from before the binary format is now stale
+        if self.legacySnapshotPath.exists():
+            os.remove(self.legacySnapshotPath)
+
+    def readLegacySnapshot(self) -> Optional[List[str]]:
+        if not self.legacySnapshotPath.exists():
+            return None
+        with open(self.legacySnapshotPath, "r") as f:
+            return f.readlines()
+
+
+class NullJournal() :
+    """Journal interface that only hands out sequence numbers."""
+
+    def __init__(self):
+        self.seq = 0
+        self.pending = 0
+        self.sinceCompaction = 0
+        self.metrics = None
+        self.tap = None
+
+    def append(self, event: str, **fields) -> int:
+        self.seq += 1
+        return self.seq
+
+    def appendRecord(self, record: dict) -> int:
+        self.seq = record["seq"]
+        return self.seq
+
+    def sync(self):
+        pass
+
+    def replay(self, afterSeq: int = 0) -> Iterator[dict]:
+        return iter(())
+
+    def truncate(self):
+        self.sinceCompaction = 0
+
+    def close(self):
+        pass
+
+
+class MemoryTradeLog() :
+    """Trade log interface over a plain list; trades are numbered but never written."""
+
+    def __init__(self):
+        self.seq = 0
+        self.records: List[dict] = []
+
+    def segments(self) -> List[Path]:
+        return []
+
+    def append(self, trades: List[dict]):
+        for trade in trades:
+            self.seq += 1
+            trade["seq"] = self.seq
+        self.records.extend(trades)
+
+    def flush(self):
+        pass
+
+    def loadRecent(self, segments: int = 2) -> List[dict]:
+        return []
+
+    def scan(self, since: Optional[str] = None, until: Optional[str] = None, orderId: Optional[str] = None,
+             afterSeq: int = 0) -> Iterator[dict]:
+        for trade in self.records[afterSeq:] if afterSeq else self.records:
+            if until is not None and trade["timestamp"] >= until:
+                return
+            if since is not None and trade["timestamp"] < since:
+                continue
+            if orderId is not None and orderId not in (trade["maker_order_id"], trade["taker_order_id"]):
+                continue
+            yield trade
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None, orderId: Optional[str] = None,
+              afterSeq: int = 0, limit: int = 100) -> List[dict]:
+        return list(islice(self.scan(since, until, orderId, afterSeq), limit))
+
+    def close(self):
+        pass
+
+
+class MemorySink() :
+    """No file system access at all: for simulations, backtests and tests.
+
+    Books on a MemorySink start empty, never compact, and keep their trades in
+    ``sink.tradeLog.records``. A snapshot written to it is only held in memory.
+    """
+
+    durable = False
+    logDir = None
+    candleDirectory = None
+
+    def __init__(self):
+        self.journal = NullJournal()
+        self.tradeLog = MemoryTradeLog()
+        self.snapshot: Optional[bytes] = None
+
+    def readSnapshot(self) -> Optional[bytes]:
+        return self.snapshot
+
+    def writeSnapshot(self, data: bytes):
+        self.snapshot = data
+
+    def readLegacySnapshot(self) -> Optional[List[str]]:
+        return None
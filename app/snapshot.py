@@ -0,0 +1,160 @@
+import argparse
+import struct
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"OBSNAP\x00\x02"
+HEADER = struct.Struct("<8sQII")
+SECTION = struct.Struct("<I")
+LEVEL = struct.Struct("<BII")
+ORDER = struct.Struct("<IIqqBBI")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NO_TIME = -(1 << 63)
+NO_ACCOUNT = 0xFFFFFFFF
+SIDES = ("buy", "sell")
+
+
+class SnapshotFormatError(Exception): pass
+
+
+def toMicros(value: Optional[datetime]) -> int:
+    if value is None:
+        return NO_TIME
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class SnapshotWriter() :
+    """Struct-packed image of a book's resting orders.
+
+    Layout after the header (magic, journal seq, level count, order count),
+    each section prefixed by its byte length:
+
+    - names: ``\\n``-joined symbol, order types and TIFs
+    - prices, quantities: ``\\n``-joined distinct values in external units
+    - accounts: ``\\n``-joined distinct account ids
+    - order ids: ``\\n``-joined, in book order
+    - levels: (side, price index, order count) per level, bids then asks
+    - orders: (quantity index, remaining index, timestamp us, expiry us,
+      type index, tif index, account index), in FIFO order per level
+
+    Repeated strings and numbers are stored once and referenced by index, so
+    a loader converts each distinct value once instead of once per order.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.names: List[str] = []
+        self.nameIndex = {}
+        self.prices: Dict[str, int] = {}
+        self.quantities: Dict[str, int] = {}
+        self.accounts: Dict[str, int] = {}
+        self.orderIds: List[str] = []
+        self.levels = bytearray()
+        self.orders = bytearray()
+        self.levelCount = 0
+        self.name(symbol)
+
+    def name(self, value: str) -> int:
+        index = self.nameIndex.get(value)
+        if index is None:
+            index = self.nameIndex[value] = len(self.names)
+            self.names.append(value)
+        return index
+
+    @staticmethod
+    def value(table: Dict[str, int], value) -> int:
+        text = str(value)
+        index = table.get(text)
+        if index is None:
+            index = table[text] = len(table)
+        return index
+
+    def addLevel(self, side: str, price, orders: List[Tuple]):
+        self.levels += LEVEL.pack(SIDES.index(side), self.value(self.prices, price), len(orders))
+        self.levelCount += 1
+        for orderId, quantity, remaining, timeStamp, expiry, orderType, tif, account in orders:
+            self.orderIds.append(orderId)
+            self.orders += ORDER.pack(
+                self.value(self.quantities, quantity), self.value(self.quantities, remaining), toMicros(timeStamp), toMicros(expiry),
+                self.name(orderType), self.name(tif),
+                self.value(self.accounts, account) if account is not None else NO_ACCOUNT
+            )
+
+    def encode(self, seq: int) -> bytes:
+        sections = [
+            "\n".join(self.names).encode(),
+            "\n".join(self.prices).encode(),
+            "\n".join(self.quantities).encode(),
+            "\n".join(self.accounts).encode(),
+            "\n".join(self.orderIds).encode(),
+            self.levels,
+            self.orders,
+        ]
+        parts = [HEADER.pack(MAGIC, seq, self.levelCount, len(self.orderIds))]
+        for section in sections:
+            parts.append(SECTION.pack(len(section)))
+            parts.append(section)
+        return b"".join(parts)
+
+
+class SnapshotReader() :
+
+    def __init__(self, data: bytes, source: str = "snapshot"):
+        if len(data) < HEADER.size:
+            raise SnapshotFormatError(f"Snapshot {source} is truncated")
+        magic, self.seq, self.levelCount, self.orderCount = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError(f"{source} is not a binary order book snapshot")
+
+        offset = HEADER.size
+        sections = []
+        for _ in range(7):
+            (size,) = SECTION.unpack_from(data, offset)
+            offset += SECTION.size
+            sections.append(data[offset:offset + size])
+            offset += size
+        names, prices, quantities, accounts, orderIds, self.levelData, self.orderData = sections
+
+        self.names = [sys.intern(name) for name in names.decode().split("\n")] if names else []
+        self.symbol = self.names[0] if self.names else ""
+        self.prices = prices.decode().split("\n") if prices else []
+        self.quantities = quantities.decode().split("\n") if quantities else []
+        self.accounts = [sys.intern(account) for account in accounts.decode().split("\n")] if accounts else []
+        self.orderIds = orderIds.decode().split("\n") if orderIds else []
+        if len(self.orderIds) != self.orderCount or len(self.orderData) != self.orderCount * ORDER.size:
+            raise SnapshotFormatError(f"Snapshot {source} is truncated")
+
+    def levels(self) -> Iterator[Tuple[str, int, int]]:
+        for side, price, count in LEVEL.iter_unpack(self.levelData):
+            yield SIDES[side], price, count
+
+    def orders(self) -> Iterator[Tuple]:
+        return ORDER.iter_unpack(self.orderData)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.orderBook import OrderBook
+
+    parser = argparse.ArgumentParser(description="Convert a book's JSONL order logs into a binary snapshot")
+    parser.add_argument("logDir", type=Path, help="book log directory, e.g. Logs/BTC-USDT")
+    parser.add_argument("--symbol", help="defaults to the directory name")
+    args = parser.parse_args(argv)
+
+    # load through the JSON paths (snapshot.jsonl or orderBid/orderOffer.jsonl, then the journal)
+    # and compact, which writes snapshot.bin and truncates the journal
+    book = OrderBook(symbol=args.symbol or args.logDir.name, logDir=args.logDir, compactEvery=0, metrics=False)
+    book.fillOrders()
+    book.compactLogs()
+    book.close()
+    print(f"✅ Wrote {args.logDir / 'snapshot.bin'} with {len(book.orderMap)} orders")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
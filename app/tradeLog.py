@@ -0,0 +1,285 @@
+import json
+import os
+import time
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class TradeLog() :
+    """Append-only trade store split into time-partitioned segment files.
+
+    Segments are named ``trade-<UTC creation time>.jsonl`` and rotate by size
+    or age, so lexical order is chronological. Every trade gets a sequence
+    number. Next to each segment a sparse ``.idx`` file maps every
+    ``indexEvery``-th trade's (seq, timestamp) to its byte offset, and an
+    ``.oidx`` file maps maker / taker order ids to offsets. Once a segment
+    rotates its ``.oidx`` is sorted by order id into ``.sidx``, which order
+    lookups binary-search; the open segment's order ids are kept in memory.
+    Queries seek through those instead of scanning segment data.
+    """
+
+    def __init__(self, directory: Path, maxSegmentBytes: int = 64 * 1024 * 1024,
+                 maxSegmentAgeSeconds: Optional[float] = 3600, bufferSize: int = 64 * 1024,
+                 autoFlush: bool = True, indexEvery: int = 64):
+        self.directory = Path(directory)
+        self.maxSegmentBytes = maxSegmentBytes
+        self.maxSegmentAgeSeconds = maxSegmentAgeSeconds
+        self.bufferSize = bufferSize
+        self.autoFlush = autoFlush
+        self.indexEvery = indexEvery
+        self.file = None
+        self.indexFile = None
+        self.orderIndexFile = None
+        self.segmentPath = None
+        self.segmentBytes = 0
+        self.segmentTrades = 0
+        self.segmentOpened = 0.0
+        self.indexCache = {}
+        self.activeOrders: Dict[str, List[int]] = {}
+        self.seq = self.recoverSeq()
+
+    def segments(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("trade-*.jsonl"))
+
+    def recoverSeq(self) -> int:
+        segments = self.segments()
+        if not segments:
+            return 0
+        with open(segments[-1], "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 64 * 1024))
+            for line in reversed(f.read().splitlines()):
+                try:
+                    return json.loads(line).get("seq", 0)
+                except json.JSONDecodeError:
+                    continue
+        return 0
+
+    def openSegment(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = self.segments()
+        if self.file is None and existing:
+            latest = existing[-1]
+            opened = datetime.strptime(latest.stem[len("trade-"):], "%Y%m%dT%H%M%S%f").replace(tzinfo=timezone.utc).timestamp()
+            size = latest.stat().st_size
+            if not self.shouldRotate(size, opened):
+                # resume the segment; force an index entry for the first new trade
+                self.openFile(latest, size, opened, trades=0)
+                return
+
+        previous = self.segmentPath
+        self.close()
+        if previous is not None:
+            # the segment is final now
+            self.sortOrderIndex(previous)
+        now = datetime.now(timezone.utc)
+        path = self.directory / f"trade-{now.strftime('%Y%m%dT%H%M%S%f')}.jsonl"
+        while path.exists():
+            now += timedelta(microseconds=1)
+            path = self.directory / f"trade-{now.strftime('%Y%m%dT%H%M%S%f')}.jsonl"
+        self.openFile(path, 0, now.timestamp(), trades=0)
+
+    def openFile(self, path: Path, size: int, opened: float, trades: int):
+        self.segmentPath = path
+        self.segmentBytes = size
+        self.segmentTrades = trades
+        self.segmentOpened = opened
+        self.file = open(path, "a", buffering=self.bufferSize)
+        self.indexFile = open(path.with_suffix(".idx"), "a")
+        self.orderIndexFile = open(path.with_suffix(".oidx"), "a")
+        self.activeOrders = {}
+        for orderId, offset in self.readOrderIndex(path.with_suffix(".oidx")):
+            self.activeOrders.setdefault(orderId, []).append(offset)
+
+    def shouldRotate(self, size: int, opened: float) -> bool:
+        if self.maxSegmentBytes and size >= self.maxSegmentBytes:
+            return True
+        if self.maxSegmentAgeSeconds is not None and time.time() - opened >= self.maxSegmentAgeSeconds:
+            return True
+        return False
+
+    def append(self, trades: List[dict]):
+        if not trades:
+            return
+        if self.file is None or self.shouldRotate(self.segmentBytes, self.segmentOpened):
+            self.openSegment()
+
+        lines, index, orderIndex = [], [], []
+        offset = self.segmentBytes
+        for trade in trades:
+            self.seq += 1
+            trade["seq"] = self.seq
+            line = json.dumps(trade, default=str) + "\n"
+            if self.segmentTrades % self.indexEvery == 0:
+                index.append(f'{self.seq} {trade["timestamp"]} {offset}\n')
+            orderIndex.append(f'{trade["maker_order_id"]} {offset}\n{trade["taker_order_id"]} {offset}\n')
+            self.activeOrders.setdefault(trade["maker_order_id"], []).append(offset)
+            self.activeOrders.setdefault(trade["taker_order_id"], []).append(offset)
+            lines.append(line)
+            offset += len(line)
+            self.segmentTrades += 1
+
+        self.file.write("".join(lines))
+        self.indexFile.write("".join(index))
+        self.orderIndexFile.write("".join(orderIndex))
+        self.segmentBytes = offset
+        if self.autoFlush:
+            self.flush()
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+            self.indexFile.flush()
+            self.orderIndexFile.flush()
+
+    def loadRecent(self, segments: int = 2) -> List[dict]:
+        self.flush()
+        trades = []
+        for path in self.segments()[-segments:] if segments else []:
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        trades.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        return trades
+
+    def readIndex(self, path: Path) -> List[Tuple[int, str, int]]:
+        if path in self.indexCache:
+            return self.indexCache[path]
+        indexPath = path.with_suffix(".idx")
+        if not indexPath.exists():
+            return []
+        entries = []
+        with open(indexPath, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3:
+                    entries.append((int(parts[0]), parts[1], int(parts[2])))
+        if path != self.segmentPath:
+            # rotated segments are immutable, so their index can be cached
+            self.indexCache[path] = entries
+        return entries
+
+    def scan(self, since: Optional[str] = None, until: Optional[str] = None, orderId: Optional[str] = None,
+             afterSeq: int = 0) -> Iterator[dict]:
+        """Trades in sequence order with seq > afterSeq and since <= timestamp < until."""
+        self.flush()
+        segments = self.segments()
+        indexes = [self.readIndex(path) for path in segments]
+
+        # skip whole segments that end before the requested window starts
+        first = 0
+        for i in range(1, len(segments)):
+            if not indexes[i]:
+                continue
+            startSeq, startTime, _ = indexes[i][0]
+            if startSeq <= afterSeq + 1 or (since is not None and startTime < since):
+                first = i
+
+        for path, index in zip(segments[first:], indexes[first:]):
+            offsets = self.orderOffsets(path, orderId) if orderId is not None else None
+            for trade in self.readSegment(path, index, since, afterSeq, offsets):
+                if until is not None and trade["timestamp"] >= until:
+                    return
+                if (afterSeq and trade.get("seq", 0) <= afterSeq) or (since is not None and trade["timestamp"] < since):
+                    continue
+                if orderId is not None and orderId not in (trade["maker_order_id"], trade["taker_order_id"]):
+                    continue
+                yield trade
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None, orderId: Optional[str] = None,
+              afterSeq: int = 0, limit: int = 100) -> List[dict]:
+        return list(islice(self.scan(since, until, orderId, afterSeq), limit))
+
+    def readOrderIndex(self, path: Path) -> List[Tuple[str, int]]:
+        if not path.exists():
+            return []
+        entries = []
+        with open(path, "r") as f:
+            for line in f:
+                key, _, offset = line.rstrip("\n").rpartition(" ")
+                if key:
+                    entries.append((key, int(offset)))
+        return entries
+
+    def sortOrderIndex(self, path: Path):
+        orderIndexPath, sortedPath = path.with_suffix(".oidx"), path.with_suffix(".sidx")
+        entries = sorted(set(self.readOrderIndex(orderIndexPath)), key=lambda entry: (entry[0].encode(), entry[1]))
+        tmpPath = sortedPath.with_suffix(".sidx.tmp")
+        with open(tmpPath, "w") as f:
+            f.write("".join(f"{key} {offset}\n" for key, offset in entries))
+        os.replace(tmpPath, sortedPath)
+
+    def orderOffsets(self, path: Path, orderId: str) -> Optional[List[int]]:
+        if path == self.segmentPath:
+            return sorted(set(self.activeOrders.get(orderId, ())))
+        orderIndexPath, sortedPath = path.with_suffix(".oidx"), path.with_suffix(".sidx")
+        if not orderIndexPath.exists():
+            return None
+        if not sortedPath.exists() or sortedPath.stat().st_mtime_ns < orderIndexPath.stat().st_mtime_ns:
+            # rotated before sorted indexes existed, or appended to again after a restart
+            self.sortOrderIndex(path)
+
+        target = orderId.encode()
+        offsets = []
+        with open(sortedPath, "rb") as f:
+            # binary search for the first line whose key is >= orderId; a probe at byte
+            # ``mid`` looks at the first line that starts at or after it
+            low, high = 0, f.seek(0, os.SEEK_END)
+            while low < high:
+                mid = (low + high) // 2
+                f.seek(mid - 1 if mid else 0)
+                if mid:
+                    f.readline()
+                line = f.readline()
+                if line and line.rpartition(b" ")[0] < target:
+                    low = mid + 1
+                else:
+                    high = mid
+            f.seek(low - 1 if low else 0)
+            if low:
+                f.readline()
+            for line in f:
+                key, _, offset = line.rpartition(b" ")
+                if key != target:
+                    break
+                offsets.append(int(offset))
+        return offsets
+
+    def readSegment(self, path: Path, index, since: Optional[str], afterSeq: int, offsets: Optional[List[int]]):
+        with open(path, "rb") as f:
+            if offsets is not None:
+                for offset in offsets:
+                    f.seek(offset)
+                    yield json.loads(f.readline())
+                return
+
+            start = 0
+            if index:
+                # last index entry before which every trade is excluded by afterSeq or since
+                position = bisect_right([entry[0] for entry in index], afterSeq + 1) - 1
+                if since is not None:
+                    position = max(position, bisect_left([entry[1] for entry in index], since) - 1)
+                if position > 0:
+                    start = index[position][2]
+            f.seek(start)
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+
+    def close(self):
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.indexFile.close()
+            self.orderIndexFile.close()
+            self.file = self.indexFile = self.orderIndexFile = None
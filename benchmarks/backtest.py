@@ -0,0 +1,147 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.orderBook import OrderBook
+from app.sink import MemorySink
+from benchmarks.flows import FLOWS, loadFlow, orderFromFlow
+
+# A backtest config is a plain dict, so sweeps can be written as JSON:
+#   {"name", "flow": <FLOWS name>, "orders", "seed", "flowParams": {...}}  or  {"name", "replay": <path>}
+#   "book": OrderBook options, e.g. {"tickSize": "0.5", "selfTradePrevention": "cancelNewest"}
+DECIMAL_OPTIONS = {"tickSize", "lotSize"}
+
+
+def configFlow(config: dict) -> List[dict]:
+    if "replay" in config:
+        return loadFlow(Path(config["replay"]))
+    generate = FLOWS[config.get("flow", "mixed")]
+    return generate(config.get("orders", 10000), config.get("seed", 7), **config.get("flowParams", {}))
+
+
+def runBacktest(config: dict, fills: bool = True) -> dict:
+    """Replay one config's flow through a fresh in-memory book and summarize what traded."""
+    options = {key: Decimal(str(value)) if key in DECIMAL_OPTIONS else value for key, value in config.get("book", {}).items()}
+    engine = OrderBook(symbol="BTC-USDT", sink=MemorySink(), metrics=False, recentTrades=0, **options)
+    flow = configFlow(config)
+
+    submitted = cancelled = rejected = 0
+    start = time.perf_counter()
+    for op in flow:
+        if op["op"] == "submit":
+            submitted += 1
+            try:
+                engine.addOrder(orderFromFlow(op["order"]))
+            except ValueError:
+                rejected += 1
+        elif engine.cancelOrder(op["orderId"]):
+            cancelled += 1
+    elapsed = time.perf_counter() - start
+
+    trades = engine.sink.tradeLog.records
+    volume = sum((Decimal(str(trade["quantity"])) for trade in trades), Decimal(0))
+    notional = sum((Decimal(str(trade["price"])) * Decimal(str(trade["quantity"])) for trade in trades), Decimal(0))
+    result = {
+        "name": config.get("name", config.get("flow", "replay")),
+        "config": config,
+        "ops": len(flow),
+        "submitted": submitted,
+        "cancelled": cancelled,
+        "rejected": rejected,
+        "trades": len(trades),
+        "volume": str(volume),
+        "notional": str(notional),
+        "vwap": str(notional / volume) if volume else None,
+        "restingOrders": len(engine.orderMap),
+        "bbo": {key: str(value) for key, value in engine.bbo.items()},
+        "elapsedSeconds": elapsed,
+        "opsPerSec": len(flow) / elapsed if elapsed else 0.0,
+    }
+    if fills:
+        result["fills"] = [{key: str(value) if isinstance(value, Decimal) else value for key, value in trade.items()} for trade in trades]
+    return result
+
+
+def expandGrid(base: dict, grid: Dict[str, list]) -> List[dict]:
+    """One config per combination of ``grid`` values; keys are dotted paths into the config ("book.tickSize")."""
+    configs = []
+    keys = list(grid)
+    for values in itertools.product(*(grid[key] for key in keys)):
+        config = deepcopy(base)
+        for key, value in zip(keys, values):
+            *parents, leaf = key.split(".")
+            target = config
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = value
+        suffix = ",".join(f"{key}={value}" for key, value in zip(keys, values))
+        config["name"] = f"{base.get('name', base.get('flow', 'replay'))}[{suffix}]" if suffix else base.get("name", base.get("flow", "replay"))
+        configs.append(config)
+    return configs
+
+
+def runBacktests(configs: List[dict], workers: Optional[int] = None, fills: bool = True) -> List[dict]:
+    """Run every config on its own book, ``workers`` processes at a time (0 = inline); results keep config order."""
+    if workers == 0:
+        return [runBacktest(config, fills) for config in configs]
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(runBacktest, configs, itertools.repeat(fills)))
+
+
+def parseGrid(items: List[str]) -> Dict[str, list]:
+    grid = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        grid[key] = [parseValue(value) for value in values.split(",")]
+    return grid
+
+
+def parseValue(value: str):
+    # numbers and booleans as JSON, anything else (e.g. "cancelNewest") as a string
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay order flows through independent in-memory books, in parallel, over a parameter grid")
+    parser.add_argument("--flow", default="mixed", choices=list(FLOWS))
+    parser.add_argument("--replay", type=Path, nargs="+", help="saved flows or captured journal.jsonl files to replay instead")
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[7])
+    parser.add_argument("--grid", nargs="*", default=[], help="dotted key=v1,v2,... e.g. book.tickSize=0.5,1 flowParams.quotes=10,40")
+    parser.add_argument("--configs", type=Path, help="JSON list of configs; overrides --flow / --replay / --seeds")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU, 0 = inline)")
+    parser.add_argument("--output", type=Path, help="write results, fills included, as JSON")
+    args = parser.parse_args(argv)
+
+    if args.configs is not None:
+        with open(args.configs, "r") as f:
+            bases = json.load(f)
+    elif args.replay:
+        bases = [{"name": path.stem, "replay": str(path)} for path in args.replay]
+    else:
+        bases = [{"name": f"{args.flow}/{seed}", "flow": args.flow, "orders": args.orders, "seed": seed} for seed in args.seeds]
+    grid = parseGrid(args.grid)
+    configs = [config for base in bases for config in expandGrid(base, grid)]
+
+    results = runBacktests(configs, args.workers, fills=args.output is not None)
+    print(f"{'backtest':>40} {'trades':>8} {'volume':>14} {'vwap':>14} {'ops/s':>10}")
+    for result in results:
+        print(f"{result['name']:>40} {result['trades']:>8} {result['volume']:>14} {str(result['vwap']):>14} {result['opsPerSec']:>10.0f}")
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.orderBook import OrderBook
+from benchmarks.flows import FLOWS, loadFlow, orderFromFlow
+
+PERCENTILES = {"p50": 0.50, "p99": 0.99, "p999": 0.999}
+
+
+class DirectDriver() :
+    """Runs a flow straight against an OrderBook, the way the sequencer does."""
+
+    name = "direct"
+
+    def __init__(self, logDir: str, syncEvery: int = 1, **bookOptions):
+        self.engine = OrderBook(symbol="BTC-USDT", logDir=logDir, fsyncEvery=0, autoFlush=False, **bookOptions)
+        self.syncEvery = syncEvery
+        self.pending = 0
+
+    def submit(self, order: dict):
+        self.engine.addOrder(orderFromFlow(order))
+        self.sync()
+
+    def cancel(self, orderId: str):
+        self.engine.cancelOrder(orderId)
+        self.sync()
+
+    def sync(self):
+        # group commit every ``syncEvery`` operations, like one sequencer batch
+        self.pending += 1
+        if self.syncEvery and self.pending >= self.syncEvery:
+            self.engine.flush()
+            self.pending = 0
+
+    def close(self):
+        self.engine.close()
+
+
+class ApiDriver() :
+    """Runs a flow through the FastAPI app in-process, including validation and the sequencer."""
+
+    name = "api"
+
+    def __init__(self, logDir: str):
+        os.environ["ENGINE_LOG_DIR"] = logDir
+        from fastapi.testclient import TestClient
+        # main builds its registry, sequencer and pools at import and its shutdown hook stops them,
+        # so every run gets a freshly executed module on its own log directory
+        self.main = importlib.reload(sys.modules["main"]) if "main" in sys.modules else importlib.import_module("main")
+        self.client = TestClient(self.main.app)
+        self.client.__enter__()
+        self.orderIds = {}
+
+    def submit(self, order: dict):
+        body = dict(order, symbol="BTC-USDT")
+        body.pop("orderId")
+        # the API requires a positive price even for market orders
+        if body["price"] == "0":
+            body["price"] = "1"
+        response = self.client.post("/submitOrder", json=body)
+        response.raise_for_status()
+        # the API assigns its own order ids
+        self.orderIds[order["orderId"]] = response.json()["orderId"]
+
+    def cancel(self, orderId: str):
+        self.client.post("/cancelOrder", json={"symbol": "BTC-USDT", "orderId": self.orderIds.pop(orderId, orderId)})
+
+    def close(self):
+        self.client.__exit__(None, None, None)
+
+
+class GatewayDriver(ApiDriver) :
+    """Runs a flow through the binary TCP gateway of the same in-process app, for comparison with ``api``."""
+
+    name = "gateway"
+
+    def __init__(self, logDir: str):
+        super().__init__(logDir)
+        from app.gateway import GatewayClient
+        # start the app's gateway on a free port inside the test client's event loop
+        gateway = self.client.portal.call(self.main.gateway.start, "127.0.0.1", 0)
+        self.gateway = GatewayClient(port=gateway.port)
+
+    def submit(self, order: dict):
+        report = self.gateway.newOrder(order["side"], order["quantity"], order["price"], order["orderType"], order.get("tif", "GTC"))
+        if report.kind == "reject":
+            raise ValueError(report.reason)
+        self.gateway.executions.clear()
+        self.orderIds[order["orderId"]] = report.clOrdId
+
+    def cancel(self, orderId: str):
+        clOrdId = self.orderIds.pop(orderId, None)
+        if clOrdId is not None:
+            self.gateway.cancel(clOrdId)
+
+    def close(self):
+        self.gateway.close()
+        super().close()
+
+
+DRIVERS = {
+    "direct": DirectDriver,
+    "api": ApiDriver,
+    "gateway": GatewayDriver,
+}
+
+
+def percentile(samples: List[int], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] / 1000
+
+
+def summarize(samples: List[int], elapsed: float) -> dict:
+    samples = sorted(samples)
+    summary = {"count": len(samples), "opsPerSec": len(samples) / elapsed if elapsed else 0.0}
+    for name, fraction in PERCENTILES.items():
+        summary[f"{name}Us"] = percentile(samples, fraction) if samples else 0.0
+    summary["maxUs"] = samples[-1] / 1000 if samples else 0.0
+    return summary
+
+
+def run(driver, flow: List[dict], warmup: int = 0) -> dict:
+    latencies = {"submit": [], "cancel": []}
+    for op in flow[:warmup]:
+        runOp(driver, op)
+
+    start = time.perf_counter()
+    for op in flow[warmup:]:
+        opStart = time.perf_counter_ns()
+        runOp(driver, op)
+        latencies[op["op"]].append(time.perf_counter_ns() - opStart)
+    elapsed = time.perf_counter() - start
+
+    allSamples = latencies["submit"] + latencies["cancel"]
+    result = summarize(allSamples, elapsed)
+    result["ops"] = {kind: summarize(samples, elapsed) for kind, samples in latencies.items() if samples}
+    return result
+
+
+def runOp(driver, op: dict):
+    if op["op"] == "submit":
+        driver.submit(op["order"])
+    else:
+        driver.cancel(op["orderId"])
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Scenarios whose throughput dropped or p99 grew by more than ``threshold`` against the baseline."""
+    regressions = []
+    for scenario, result in results.items():
+        previous = baseline.get(scenario)
+        if previous is None:
+            continue
+        if result["opsPerSec"] < previous["opsPerSec"] * (1 - threshold):
+            regressions.append(f"{scenario}: opsPerSec {previous['opsPerSec']:.0f} -> {result['opsPerSec']:.0f}")
+        if result["p99Us"] > previous["p99Us"] * (1 + threshold):
+            regressions.append(f"{scenario}: p99Us {previous['p99Us']:.1f} -> {result['p99Us']:.1f}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Throughput and latency of the matching engine under synthetic or replayed order flow")
+    parser.add_argument("--flows", nargs="+", default=list(FLOWS), choices=list(FLOWS))
+    parser.add_argument("--replay", type=Path, help="replay a saved flow or a captured journal.jsonl instead of generating flows")
+    parser.add_argument("--drivers", nargs="+", default=["direct"], choices=list(DRIVERS))
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--sync-every", type=int, default=64, help="direct driver: flush logs every N operations (0 = never)")
+    parser.add_argument("--no-metrics", action="store_true", help="direct driver: run books with metrics=False")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression before failing")
+    args = parser.parse_args(argv)
+
+    if args.replay is not None:
+        flows = {args.replay.stem: loadFlow(args.replay)}
+    else:
+        flows = {name: FLOWS[name](args.orders, args.seed) for name in args.flows}
+
+    results = {}
+    print(f"{'scenario':>20} {'ops/s':>10} {'p50 us':>10} {'p99 us':>10} {'p999 us':>10}")
+    for driverName in args.drivers:
+        for flowName, flow in flows.items():
+            with tempfile.TemporaryDirectory() as logDir:
+                if driverName == "direct":
+                    driver = DirectDriver(logDir, syncEvery=args.sync_every, metrics=not args.no_metrics)
+                else:
+                    driver = DRIVERS[driverName](logDir)
+                try:
+                    result = run(driver, flow, min(args.warmup, len(flow) // 10))
+                finally:
+                    driver.close()
+            scenario = f"{driverName}/{flowName}"
+            results[scenario] = result
+            print(f"{scenario:>20} {result['opsPerSec']:>10.0f} {result['p50Us']:>10.1f} {result['p99Us']:>10.1f} {result['p999Us']:>10.1f}")
+
+    if args.output is not None:
+        report = {
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "orders": args.orders,
+            "results": results
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"❌ Regression {regression}")
+        if regressions:
+            return 1
+        print(f"✅ No regression beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import argparse
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from app.orderBook import OrderBook, Order, OrderType, OrderSide
+
+
+def makeOrder(orderId, side, quantity, price):
+    return Order(
+        orderId=orderId,
+        orderType=OrderType.LIMIT.value,
+        side=side,
+        quantity=Decimal(quantity),
+        remainingQuantity=Decimal(quantity),
+        price=Decimal(price),
+        timeStamp=None
+    )
+
+
+def measure(levels: int, iterations: int, logDir: str) -> list:
+    engine = OrderBook(symbol="BTC-USDT", logDir=logDir, fsyncEvery=0, compactEvery=0)
+    for i in range(levels):
+        engine.restOrder(makeOrder(f"s{i}", OrderSide.SELL.value, 1, 1000 + i))
+
+    samples = []
+    for n in range(iterations):
+        # replenish the top level so every taker crosses exactly one level
+        engine.restOrder(makeOrder(f"r{n}", OrderSide.SELL.value, 1, 1000))
+        taker = makeOrder(f"t{n}", OrderSide.BUY.value, 1, 1000)
+        start = time.perf_counter_ns()
+        engine.matchOrder(taker, engine.offerOrders, True)
+        samples.append(time.perf_counter_ns() - start)
+    engine.journal.close()
+    engine.tradeLog.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="matchOrder latency vs. number of resting price levels")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'levels':>8} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+    with tempfile.TemporaryDirectory() as logDir:
+        for levels in args.levels:
+            samples = sorted(measure(levels, args.iterations, logDir))
+            p50 = samples[len(samples) // 2] / 1000
+            p99 = samples[int(len(samples) * 0.99)] / 1000
+            mean = statistics.fmean(samples) / 1000
+            print(f"{levels:>8} {p50:>10.2f} {p99:>10.2f} {mean:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
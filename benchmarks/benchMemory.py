@@ -0,0 +1,95 @@
+import argparse
+import gc
+import multiprocessing
+import resource
+import sys
+import tempfile
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+from uuid import uuid4
+from sortedcontainers import SortedDict
+from app.orderBook import OrderBook, Order, OrderType, OrderSide
+
+
+@dataclass(order=True)
+class LegacyOrder() :
+    # the pre-slots Order layout, kept here as the comparison baseline
+    orderId: str=field(default_factory=lambda: str(uuid4()))
+    symbol: str="BTC-USDT"
+    orderType: str=OrderType.MARKET.value
+    side: str=OrderSide.BUY.value
+    quantity: Decimal=Decimal(0.0)
+    price: Decimal=Decimal(0.0)
+    timeStamp: datetime=field(default_factory=lambda: datetime.now(timezone.utc))
+    remainingQuantity: Decimal=Decimal(0.0)
+    tif: str="GTC"
+    expiry: Optional[datetime]=None
+
+
+def legacyBook(count: int):
+    book, orderMap = SortedDict(), {}
+    for i in range(count):
+        price = Decimal(1000 + i % 1000)
+        order = LegacyOrder(
+            orderType="LIMIT".lower(), side="SELL".lower(),
+            quantity=Decimal("1.5"), remainingQuantity=Decimal("1.5"), price=price
+        )
+        book.setdefault(price, deque()).append(order)
+        orderMap[order.orderId] = order
+    return book, orderMap
+
+
+def engineBook(count: int, logDir: str, **scale):
+    engine = OrderBook(symbol="BTC-USDT", logDir=logDir, **scale)
+    for i in range(count):
+        order = Order(
+            orderType="LIMIT".lower(), side="SELL".lower(),
+            quantity=Decimal("1.5"), remainingQuantity=Decimal("1.5"), price=Decimal(1000 + i % 1000)
+        )
+        engine.restOrder(engine.scale.importOrder(order))
+    return engine
+
+
+def peakRss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(variant: str, count: int) -> float:
+    # runs in a fresh worker process so every layout starts from the same baseline
+    with tempfile.TemporaryDirectory() as logDir:
+        builders = {
+            "legacy": legacyBook,
+            "decimal": lambda n: engineBook(n, logDir),
+            "fixed": lambda n: engineBook(n, logDir, tickSize=Decimal("0.01"), lotSize=Decimal("0.0001")),
+        }
+        gc.collect()
+        before = peakRss()
+        result = builders[variant](count)
+        after = peakRss()
+        del result
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per resting order: legacy Order vs. slotted Order")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    variants = [
+        ("legacy Order + deque", "legacy"),
+        ("slotted Order, Decimal", "decimal"),
+        ("slotted Order, fixed-point", "fixed"),
+    ]
+    print(f"{'layout':<28} {'bytes/order':>12}   ({args.orders} resting orders)")
+    context = multiprocessing.get_context("spawn")
+    for name, variant in variants:
+        with context.Pool(1) as pool:
+            print(f"{name:<28} {pool.apply(measure, (variant, args.orders)):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
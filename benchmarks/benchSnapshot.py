@@ -0,0 +1,58 @@
+import argparse
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from app.orderBook import OrderBook, Order, OrderSide
+
+
+def buildBook(count: int, logDir: Path, **scale) -> OrderBook:
+    engine = OrderBook(symbol="BTC-USDT", logDir=logDir, compactEvery=0, metrics=False, **scale)
+    for i in range(count):
+        side = OrderSide.BUY.value if i % 2 else OrderSide.SELL.value
+        offset = Decimal(i % 2000) / 2
+        order = Order(
+            orderId=f"o{i}", orderType="limit", side=side,
+            quantity=Decimal("1.5"), remainingQuantity=Decimal("1.5"),
+            price=Decimal(30000) - 1 - offset if side == OrderSide.BUY.value else Decimal(30000) + offset
+        )
+        engine.restOrder(engine.scale.importOrder(order))
+    return engine
+
+
+def timeLoad(logDir: Path, **scale) -> float:
+    start = time.perf_counter()
+    engine = OrderBook(symbol="BTC-USDT", logDir=logDir, compactEvery=0, metrics=False, **scale)
+    engine.fillOrders()
+    elapsed = time.perf_counter() - start
+    engine.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of a book from a JSONL vs. a binary snapshot")
+    parser.add_argument("--orders", type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"{'mode':>12} {'format':>8} {'size MB':>10} {'load s':>10}")
+    for mode, scale in [("decimal", {}), ("fixedPoint", {"tickSize": Decimal("0.5"), "lotSize": Decimal("0.1")})]:
+        with tempfile.TemporaryDirectory() as tmp:
+            jsonDir, binaryDir = Path(tmp) / "json", Path(tmp) / "binary"
+            engine = buildBook(args.orders, binaryDir, **scale)
+            engine.compactLogs()
+            engine.saveOrdersToFile(Path(tmp) / "orders.jsonl")
+            engine.close()
+
+            # the pre-binary layout: a snapshot.jsonl header line followed by one JSON order per line
+            jsonDir.mkdir()
+            with open(jsonDir / "snapshot.jsonl", "w") as f:
+                f.write('{"seq": 0, "symbol": "BTC-USDT"}\n')
+                f.write(open(Path(tmp) / "orders.jsonl").read())
+
+            for name, directory, fileName in [("jsonl", jsonDir, "snapshot.jsonl"), ("binary", binaryDir, "snapshot.bin")]:
+                size = (directory / fileName).stat().st_size / 1e6
+                print(f"{mode:>12} {name:>8} {size:>10.1f} {timeLoad(directory, **scale):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+import random
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator, List
+from app.orderBook import Order, OrderType, OrderSide
+
+# A flow is a list of operations, each one of
+#   {"op": "submit", "order": {"orderId", "orderType", "side", "quantity", "price", "tif"}}
+#   {"op": "cancel", "orderId": ...}
+# Prices and quantities are strings so a flow round-trips through JSON unchanged.
+
+TICK = Decimal("0.5")
+MID = Decimal("30000")
+
+
+def submit(orderId: str, orderType: str, side: str, quantity: Decimal, price: Decimal) -> dict:
+    return {"op": "submit", "order": {
+        "orderId": orderId, "orderType": orderType, "side": side,
+        "quantity": str(quantity), "price": str(price), "tif": "GTC"
+    }}
+
+
+def cancel(orderId: str) -> dict:
+    return {"op": "cancel", "orderId": orderId}
+
+
+def quantity(rng: random.Random) -> Decimal:
+    return Decimal(rng.randint(1, 50)) / 10
+
+
+def mixedFlow(count: int, seed: int) -> List[dict]:
+    """Limit-heavy random flow around a drifting mid with market / IOC / FOK takers."""
+    rng = random.Random(seed)
+    mid = MID
+    flow = []
+    for n in range(count):
+        mid += TICK * rng.choice((-1, 0, 0, 1))
+        side = rng.choice((OrderSide.BUY.value, OrderSide.SELL.value))
+        orderType = rng.choices(
+            (OrderType.LIMIT.value, OrderType.MARKET.value, OrderType.IOC.value, OrderType.FOK.value),
+            weights=(60, 15, 15, 10)
+        )[0]
+        offset = TICK * rng.randint(-5, 20)
+        price = mid - offset if side == OrderSide.BUY.value else mid + offset
+        if orderType == OrderType.MARKET.value:
+            price = Decimal(0)
+        flow.append(submit(f"x{n}", orderType, side, quantity(rng), price))
+    return flow
+
+
+def marketMakerFlow(count: int, seed: int, quotes: int = 20) -> List[dict]:
+    """Quote / cancel churn: most operations replace one resting quote, a few cross the spread."""
+    rng = random.Random(seed)
+    mid = MID
+    resting = []
+    flow = []
+    n = 0
+    while len(flow) < count:
+        if len(resting) >= quotes or (resting and rng.random() < 0.45):
+            flow.append(cancel(resting.pop(rng.randrange(len(resting)))))
+            continue
+        n += 1
+        if rng.random() < 0.05:
+            side = rng.choice((OrderSide.BUY.value, OrderSide.SELL.value))
+            flow.append(submit(f"t{n}", OrderType.IOC.value, side, quantity(rng), mid + (TICK if side == OrderSide.BUY.value else -TICK)))
+            continue
+        mid += TICK * rng.choice((-1, 0, 1))
+        side = rng.choice((OrderSide.BUY.value, OrderSide.SELL.value))
+        offset = TICK * rng.randint(1, 10)
+        price = mid - offset if side == OrderSide.BUY.value else mid + offset
+        flow.append(submit(f"q{n}", OrderType.LIMIT.value, side, quantity(rng), price))
+        resting.append(f"q{n}")
+    return flow
+
+
+def sweepFlow(count: int, seed: int, levels: int = 200) -> List[dict]:
+    """Build ``levels`` of depth on one side, then clear it with a single market order."""
+    rng = random.Random(seed)
+    flow = []
+    n = 0
+    while len(flow) < count:
+        side = rng.choice((OrderSide.BUY.value, OrderSide.SELL.value))
+        total = Decimal(0)
+        for level in range(min(levels, count - len(flow) - 1)):
+            size = quantity(rng)
+            price = MID - TICK * level if side == OrderSide.BUY.value else MID + TICK * level
+            n += 1
+            flow.append(submit(f"d{n}", OrderType.LIMIT.value, side, size, price))
+            total += size
+        n += 1
+        taker = OrderSide.SELL.value if side == OrderSide.BUY.value else OrderSide.BUY.value
+        flow.append(submit(f"s{n}", OrderType.MARKET.value, taker, max(total, Decimal(1)), Decimal(0)))
+    return flow
+
+
+FLOWS = {
+    "mixed": mixedFlow,
+    "marketMaker": marketMakerFlow,
+    "sweep": sweepFlow,
+}
+
+
+def orderFromFlow(order: dict) -> Order:
+    return Order(
+        orderId=order["orderId"],
+        orderType=order["orderType"],
+        side=order["side"],
+        quantity=Decimal(order["quantity"]),
+        remainingQuantity=Decimal(order["quantity"]),
+        price=Decimal(order["price"]),
+        tif=order.get("tif", "GTC")
+    )
+
+
+def saveFlow(flow: List[dict], path: Path):
+    with open(path, "w") as f:
+        for op in flow:
+            f.write(json.dumps(op) + "\n")
+
+
+def loadFlow(path: Path) -> List[dict]:
+    """Read a saved flow, or turn a captured ``journal.jsonl`` into a replayable flow.
+
+    A journal only records orders that rested (with their remaining size) and
+    cancels, so replaying one rebuilds the book and its cancel traffic; takers
+    that never rested are not in it.
+    """
+    flow = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            flow.extend(journalOps(record) if "event" in record else [record])
+    return flow
+
+
+def journalOps(record: dict) -> Iterator[dict]:
+    # fills are results of matching, so only the inputs are replayed
+    if record["event"] == "new":
+        order = record["order"]
+        remaining = order.get("remainingQuantity", order["quantity"])
+        yield submit(order["orderId"], order["orderType"], order["side"], Decimal(str(remaining)), Decimal(str(order["price"])))
+    elif record["event"] == "cancel":
+        yield cancel(record["orderId"])
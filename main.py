@@ -1,13 +1,24 @@
 from fastapi import FastAPI, HTTPException, Depends, Query, WebSocket, WebSocketException, WebSocketDisconnect  
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from uuid import uuid4
 from decimal import Decimal
-from app.orderBook import OrderBook, Order, OrderType, OrderSide
-from typing import Optional
+from app.orderBook import Order, OrderType, OrderSide, LOG_DIR
+from app.registry import SymbolRegistry, UnknownSymbolError
+from app.sequencer import ShardedSequencer
+from app.marketData import MarketDataPublisher, RESYNC, DROP
+from app.metrics import renderMetrics
+from app.risk import PreTradePipeline, RiskLimits
+from app.gateway import OrderGateway
+from app.replication import ReplicationServer, ReplicationClient
+from typing import List, Optional
 from datetime import datetime, timezone, timedelta
+from functools import partial
 from uuid import uuid4
 import asyncio
+import json
+import os
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, Response
 
 app = FastAPI(
     title="Crptocurrency Exchange Engine", 
@@ -22,18 +33,161 @@ app = FastAPI(
 
 app.mount("/static",StaticFiles(directory="./templates"), name="static")
 
-engine = OrderBook(symbol="BTC-USDT")
-engine.fillOrders()
-engine.loadTradesFromFile()
+# ENGINE_SYMBOLS="BTC-USDT,ETH-USDT,SOL-USDT"
+# ENGINE_WORKER_GROUPS="BTC-USDT;ETH-USDT,SOL-USDT" pins each ';'-separated group to its own process
+SYMBOLS = [symbol for symbol in os.environ.get("ENGINE_SYMBOLS", "BTC-USDT").split(",") if symbol]
+GROUPS = [group.split(",") for group in os.environ.get("ENGINE_WORKER_GROUPS", "").split(";") if group]
+LOG_ROOT = os.environ.get("ENGINE_LOG_DIR", LOG_DIR)
+# ENGINE_SYMBOL_OPTIONS='{"BTC-USDT": {"tickSize": "0.01", "lotSize": "0.0001"}}' sets OrderBook options per symbol
+SYMBOL_OPTIONS = {
+    symbol: {key: Decimal(str(value)) if key in ("tickSize", "lotSize") else value for key, value in options.items()}
+    for symbol, options in json.loads(os.environ.get("ENGINE_SYMBOL_OPTIONS", "{}")).items()
+}
+# ENGINE_METRICS=0 removes all hot-path instrumentation
+METRICS = os.environ.get("ENGINE_METRICS", "1") != "0"
+EXPIRY_INTERVAL = float(os.environ.get("ENGINE_EXPIRY_INTERVAL", "1"))
+# ENGINE_STP=cancelNewest|cancelOldest|cancelBoth prevents orders of the same account from trading with each other
+STP = os.environ.get("ENGINE_STP", "none")
+# ENGINE_GATEWAY_PORT=9001 also accepts binary order entry over TCP (app/gateway.py)
+GATEWAY_HOST = os.environ.get("ENGINE_GATEWAY_HOST", "127.0.0.1")
+GATEWAY_PORT = os.environ.get("ENGINE_GATEWAY_PORT")
+# ENGINE_ROLE=follower with ENGINE_PRIMARY=host:port runs a read-only hot standby of that primary;
+# a primary with ENGINE_REPLICATION_PORT=9002 streams its journals to followers (app/replication.py)
+ROLE = os.environ.get("ENGINE_ROLE", "primary")
+REPLICATION_HOST = os.environ.get("ENGINE_REPLICATION_HOST", "127.0.0.1")
+REPLICATION_PORT = os.environ.get("ENGINE_REPLICATION_PORT")
+PRIMARY = os.environ.get("ENGINE_PRIMARY", "127.0.0.1:9002")
+# pre-trade risk runs in ENGINE_RISK_WORKERS processes (0 = inline); unset limits are not enforced
+# ENGINE_RISK_ACCOUNT_NOTIONAL="acct1=50000,acct2=1000000"
+RISK_WORKERS = int(os.environ.get("ENGINE_RISK_WORKERS", "2"))
+RISK_LIMITS = RiskLimits(
+    maxOrderQuantity=Decimal(os.environ["ENGINE_RISK_MAX_QUANTITY"]) if "ENGINE_RISK_MAX_QUANTITY" in os.environ else None,
+    maxOrderNotional=Decimal(os.environ["ENGINE_RISK_MAX_NOTIONAL"]) if "ENGINE_RISK_MAX_NOTIONAL" in os.environ else None,
+    accountMaxNotional={
+        account: Decimal(limit)
+        for account, limit in (item.split("=") for item in os.environ.get("ENGINE_RISK_ACCOUNT_NOTIONAL", "").split(",") if item)
+    },
+    priceBand=Decimal(os.environ["ENGINE_RISK_PRICE_BAND"]) if "ENGINE_RISK_PRICE_BAND" in os.environ else None
+)
 
-class OrderRequest(BaseModel):
-    orderType: OrderType = Field(..., description="Type of order: market, limit, stop, stop_limit")
+# journals and trade logs are group-committed by the sequencer after every batch,
+# and the batch's market-data updates are handed to the publisher in one go
+registry = SymbolRegistry(symbols=SYMBOLS, logDir=LOG_ROOT, groups=GROUPS, bookOptions={"fsyncEvery": 0, "autoFlush": False, "marketData": True, "candles": True, "metrics": METRICS, "selfTradePrevention": STP, "replicate": True}, symbolOptions=SYMBOL_OPTIONS)
+publisher = MarketDataPublisher()
+pipeline = PreTradePipeline(RISK_LIMITS, workers=RISK_WORKERS)
+
+def publishBatch(symbols):
+    # each sequencer commits and publishes its own symbols; the default one owns the in-process books
+    updates = registry.flush(symbols if symbols is not None else list(registry.books))
+    # the risk pipeline prices its bands off the same BBO the feed just published
+    pipeline.observe(updates)
+    gateway.observe(updates)
+    replicationServer.observe(updates)
+    publisher.publishThreadsafe(updates)
+
+# one sequencer per worker group, so pinned groups match in parallel
+sequencer = ShardedSequencer(GROUPS, afterBatch=[publishBatch]).start()
+
+async def sequenced(fn, *args, **kwargs):
+    if kwargs:
+        fn = partial(fn, **kwargs)
+    return await asyncio.wrap_future(sequencer.submit(fn, *args))
+
+gateway = OrderGateway(registry, sequenced, pipeline.check)
+replicationServer = ReplicationServer(registry, sequenced)
+replicationClient = None
+
+def writable():
+    # a follower's books only change through replication until it is promoted
+    if replicationClient is not None:
+        raise HTTPException(status_code=503, detail="Read-only standby; promote it or use the primary")
+
+async def expireOrders():
+    # DAY / GTD orders are also expired lazily by addOrder; this catches books that go quiet
+    while True:
+        await asyncio.sleep(EXPIRY_INTERVAL)
+        for symbol in registry.symbols:
+            try:
+                await sequenced(registry.expireOrders, symbol)
+            except Exception as e:
+                print(f"❌ Error expiring orders: {e}")
+
+@app.on_event("startup")
+async def attachPublisher():
+    global replicationClient
+    publisher.attach(asyncio.get_running_loop())
+    for symbol in registry.symbols:
+        pipeline.observe([{"symbol": symbol, "bbo": await sequenced(registry.bbo, symbol)}])
+    if ROLE == "follower":
+        host, port = PRIMARY.rsplit(":", 1)
+        replicationClient = ReplicationClient(registry, sequenced, host, int(port)).start()
+    else:
+        await startPrimary()
+
+async def startPrimary():
+    app.state.expiryTask = asyncio.create_task(expireOrders())
+    if REPLICATION_PORT:
+        await replicationServer.start(REPLICATION_HOST, int(REPLICATION_PORT))
+    if GATEWAY_PORT:
+        await gateway.start(GATEWAY_HOST, int(GATEWAY_PORT))
+
+@app.on_event("shutdown")
+async def closeRegistry():
+    if replicationClient is not None:
+        await replicationClient.stop()
+    if getattr(app.state, "expiryTask", None) is not None:
+        app.state.expiryTask.cancel()
+    await replicationServer.close()
+    await gateway.close()
+    sequencer.stop()
+    registry.close()
+    pipeline.close()
+
+class OrderFields(BaseModel):
+    orderType: OrderType = Field(..., description="Type of order: market, limit, ioc, fok, stop, stop_limit")
     side: OrderSide = Field(..., description="Order side: buy or sell")
     quantity: Decimal = Field(..., gt=0, description="Number of the cryptocurrency")
     price: Decimal = Field(..., gt=0, description="Price of the cryptocurrency")
+    stopPrice: Optional[Decimal] = Field(default=None, gt=0, description="Trigger price of stop and stop_limit orders")
     tif: Optional[str] = Field(default="GTC", description="Time-in-force: GTC, DAY, GTD")
+    expiry: Optional[datetime] = Field(default=None, description="GTD: when the order expires (UTC unless an offset is given)")
+    account: Optional[str] = Field(default=None, description="Owner of the order, for self-trade prevention and risk limits")
+
+    @model_validator(mode="after")
+    def checkExpiry(self):
+        if self.expiry is not None and self.expiry.tzinfo is None:
+            self.expiry = self.expiry.replace(tzinfo=timezone.utc)
+        if self.tif == "GTD" and (self.expiry is None or self.expiry <= datetime.now(timezone.utc)):
+            raise ValueError("GTD orders need an expiry in the future")
+        return self
+
+class OrderRequest(OrderFields):
+    symbol: str = Field(default="BTC-USDT", description="Trading pair, e.g. BTC-USDT")
+
+class OrdersRequest(BaseModel):
+    symbol: str = Field(default="BTC-USDT", description="Trading pair, e.g. BTC-USDT")
+    orders: List[OrderFields] = Field(..., min_length=1, max_length=500, description="Matched in this order, as one batch")
+
+class CancelRequest(BaseModel):
+    symbol: str = Field(default="BTC-USDT", description="Trading pair, e.g. BTC-USDT")
+    orderId: str
+
+class AmendRequest(BaseModel):
+    symbol: str = Field(default="BTC-USDT", description="Trading pair, e.g. BTC-USDT")
+    orderId: str
+    quantity: Optional[Decimal] = Field(default=None, gt=0, description="New total quantity, fills included")
+    price: Optional[Decimal] = Field(default=None, gt=0, description="New limit price")
+
+class CancelOrdersRequest(BaseModel):
+    symbol: str = Field(default="BTC-USDT", description="Trading pair, e.g. BTC-USDT")
+    orderIds: List[str] = Field(default=[], description="Orders to cancel by id")
+    cancelAll: bool = Field(default=False, description="Also cancel every resting order matching side / price range")
+    side: Optional[OrderSide] = Field(default=None, description="cancelAll: only this side")
+    minPrice: Optional[Decimal] = Field(default=None, description="cancelAll: lowest price included")
+    maxPrice: Optional[Decimal] = Field(default=None, description="cancelAll: highest price included")
 
 class OrderResponse(BaseModel) :
+    symbol: str
     orderType: str
     side: str
     quantity: Decimal
@@ -42,84 +196,242 @@ class OrderResponse(BaseModel) :
     status: str
 
 @app.get("/trades", response_description="Successfully Responsed", status_code=200)
-async def currentTrades() : 
-    if engine.trades :
-        return engine.trades
-    
-    else :
-        HTTPException(status_code=500, detail="Error Retrieving Trade")
+async def currentTrades(
+    symbol: str = "BTC-USDT",
+    since: Optional[datetime] = Query(default=None, description="Only trades at or after this time"),
+    until: Optional[datetime] = Query(default=None, description="Only trades before this time"),
+    order_id: Optional[str] = Query(default=None, description="Only trades where this order was maker or taker"),
+    cursor: Optional[str] = Query(default=None, description="nextCursor from the previous page"),
+    limit: int = Query(default=100, ge=1, le=1000)
+) : 
+    try:
+        return await sequenced(
+            registry.trades, symbol,
+            since=since, until=until, orderId=order_id, cursor=cursor, limit=limit
+        )
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/depth", response_description="Successfully Responsed", status_code=200)
+async def currentDepth(
+    symbol: str = "BTC-USDT",
+    levels: Optional[int] = Query(default=None, ge=1, le=1000, description="Top N price levels per side; all when omitted"),
+    detail: str = Query(default="l2", description="l2: quantity and order count per level, l3: every order")
+) :
+    # the book caches the serialized view until its version changes
+    try:
+        return Response(content=await sequenced(registry.depthView, symbol, levels, detail), media_type="application/json")
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/depthToPrice", response_description="Successfully Responsed", status_code=200)
+async def depthToPrice(
+    symbol: str = "BTC-USDT",
+    side: OrderSide = Query(..., description="Side of the taker: buy walks the asks, sell walks the bids"),
+    price: Decimal = Query(..., gt=0, description="Worst price the taker would accept")
+) :
+    try:
+        return await sequenced(registry.depthToPrice, symbol, side.value, price)
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/submitOrder", response_model=OrderResponse, response_description="Order submitted", status_code=200)
-def submitOrder(order: OrderRequest):
+@app.get("/candles", response_description="Successfully Responsed", status_code=200)
+async def currentCandles(
+    symbol: str = "BTC-USDT",
+    interval: str = Query(default="1m", description="Bar interval: 1s, 1m, 5m, 1h"),
+    limit: int = Query(default=100, ge=1, le=1000)
+) :
+    try:
+        return await sequenced(registry.candles, symbol, interval, limit)
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    if not METRICS:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return renderMetrics(await sequenced(registry.metrics))
 
+def newOrder(order: OrderFields, symbol: str) -> Order:
     rule = [OrderType.FOK.value, OrderType.IOC.value]
-    Expiry = datetime.now(timezone.utc) + timedelta(hours=5) if order.orderType.value in rule else None
-    
-    newOrder = Order(
+    Expiry = datetime.now(timezone.utc) + timedelta(hours=5) if order.orderType.value in rule else order.expiry
+
+    return Order(
         orderId=str(uuid4()),
-        symbol="BTC-USDT",
+        symbol=symbol,
         orderType=order.orderType.value.lower(),
         side=order.side.value.lower(),
         quantity=order.quantity,
         remainingQuantity=order.quantity,
         price=order.price,
+        stopPrice=order.stopPrice,
         timeStamp=datetime.now(timezone.utc),
         tif=order.tif,
-        expiry=Expiry
+        expiry=Expiry,
+        account=order.account
     )
 
-    try:
-        engine.validateOrder(newOrder)
-        filledQty = engine.addOrder(newOrder)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-    if newOrder.remainingQuantity == 0:
+def orderResponse(order: OrderFields, symbol: str, result: dict) -> OrderResponse:
+    filledQty = result["filledQuantity"]
+    # remainingQuantity is also 0 for orders whose rest was dropped (ioc, self-trade prevention)
+    if filledQty >= order.quantity:
         Status = "filled"
     elif filledQty > 0:
         Status = "partial"
-    elif order.orderType in [OrderType.FOK, OrderType.IOC, OrderType.MARKET] and filledQty == 0:
+    elif not result["resting"]:
+        # unfilled fok / ioc / market orders, self-trade cancels and stops that triggered into an empty book
         Status = "rejected"
     else:
         Status = "Added To Book"
 
     return OrderResponse(
-        orderType=newOrder.orderType,
-        side=newOrder.side,
-        quantity=newOrder.quantity,
-        price=newOrder.price,
-        orderId=newOrder.orderId,
+        symbol=symbol,
+        orderType=order.orderType.value.lower(),
+        side=order.side.value.lower(),
+        quantity=order.quantity,
+        price=order.price,
+        orderId=result["orderId"],
         status=Status
     )
 
+@app.post("/promote", response_description="Standby promoted", status_code=200)
+async def promote():
+    # stop following, then take over the primary's role: expiry, replication to new followers, order entry
+    global replicationClient
+    if replicationClient is None:
+        raise HTTPException(status_code=409, detail="Already the primary")
+    await replicationClient.stop()
+    replicationClient = None
+    await sequenced(registry.promote)
+    await startPrimary()
+    return {"role": "primary", "positions": await sequenced(registry.replicationPositions)}
+
+@app.post("/submitOrder", response_model=OrderResponse, response_description="Order submitted", status_code=200, dependencies=[Depends(writable)])
+async def submitOrder(order: OrderRequest):
+    try:
+        # risk checks run off the matching thread; the book then skips its own validation
+        newRequest = newOrder(order, order.symbol)
+        await pipeline.check([newRequest])
+        result = await sequenced(registry.submitOrder, order.symbol, newRequest, True)
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return orderResponse(order, order.symbol, result)
+
+@app.post("/submitOrders", response_model=List[OrderResponse], response_description="Orders submitted", status_code=200, dependencies=[Depends(writable)])
+async def submitOrders(batch: OrdersRequest):
+    # one sequenced call: the batch is matched without interleaving, then group-committed and published once
+    orders = [newOrder(order, batch.symbol) for order in batch.orders]
+    try:
+        await pipeline.check(orders)
+        results = await sequenced(registry.submitOrders, batch.symbol, orders)
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [orderResponse(order, batch.symbol, result) for order, result in zip(batch.orders, results)]
+
+@app.post("/cancelOrder", response_description="Order cancelled", status_code=200, dependencies=[Depends(writable)])
+async def cancelOrder(request: CancelRequest):
+    try:
+        cancelled = await sequenced(registry.cancelOrder, request.symbol, request.orderId)
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not cancelled:
+        raise HTTPException(status_code=404, detail=f"Order not found: {request.orderId}")
+    return {"orderId": request.orderId, "status": "cancelled"}
+
+@app.post("/amendOrder", response_description="Order amended", status_code=200, dependencies=[Depends(writable)])
+async def amendOrder(request: AmendRequest):
+    # a size-down keeps queue priority; a price change moves the order to its new level
+    try:
+        amended = await sequenced(registry.amendOrder, request.symbol, request.orderId, request.quantity, request.price)
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if amended is None:
+        raise HTTPException(status_code=404, detail=f"Order not found: {request.orderId}")
+    return amended
+
+@app.post("/cancelOrders", response_description="Orders cancelled", status_code=200, dependencies=[Depends(writable)])
+async def cancelOrders(request: CancelOrdersRequest):
+    def cancel(symbol):
+        results = registry.cancelOrders(symbol, request.orderIds) if request.orderIds else []
+        cancelled = [orderId for orderId, ok in zip(request.orderIds, results) if ok]
+        if request.cancelAll:
+            side = request.side.value if request.side is not None else None
+            cancelled += registry.cancelAll(symbol, side, request.minPrice, request.maxPrice)
+        notFound = [orderId for orderId, ok in zip(request.orderIds, results) if not ok]
+        return {"cancelled": cancelled, "notFound": notFound}
+
+    try:
+        return await sequenced(cancel, request.symbol)
+    except UnknownSymbolError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.websocket("/ws/orderBook")
-async def showOrderBook(websocket: WebSocket):
+async def showOrderBook(websocket: WebSocket, symbol: str = "BTC-USDT"):
     await websocket.accept()
+    subscriber = publisher.subscribe(symbol)
+
+    async def sendSnapshot():
+        snapshot = await sequenced(registry.marketSnapshot, symbol)
+        subscriber.snapshotSeq = snapshot["seq"]
+        await websocket.send_text(json.dumps(snapshot, default=str))
 
     try:
+        await sendSnapshot()
         while True:
-            await asyncio.sleep(3)
-
-            bbo = engine.bbo
-            bboData = {
-                "bestBidPrice": float(bbo["bestBidPrice"]),
-                "bestBidQuantity": float(bbo["bestBidQuantity"]),
-                "bestOfferPrice": float(bbo["bestOfferPrice"]),
-                "bestOfferQuantity": float(bbo["bestOfferQuantity"]),
-            }
-
-            bidData = {
-                str(price): float(sum(float(order.remainingQuantity) for order in orders))
-                for price, orders in engine.bidOrders.items()
-            }
+            message = await subscriber.next()
+            if message == RESYNC:
+                await sendSnapshot()
+            elif message == DROP:
+                await websocket.close(code=1013)
+                break
+            else:
+                await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print("❌ Error in WebSocket:", e)
+    finally:
+        publisher.unsubscribe(subscriber)
 
-            offerData = {
-                str(price): float(sum(float(order.remainingQuantity) for order in orders))
-                for price, orders in engine.offerOrders.items()
-            }
+@app.websocket("/ws/candles")
+async def streamCandles(websocket: WebSocket, symbol: str = "BTC-USDT", interval: str = "1m"):
+    await websocket.accept()
+    subscriber = publisher.subscribe(f"candles:{symbol}:{interval}")
 
-            data = {"bid": bidData, "ask": offerData, "bbo": bboData}
+    async def sendSnapshot():
+        bars = await sequenced(registry.candles, symbol, interval, 100)
+        await websocket.send_text(json.dumps({"type": "candles", "symbol": symbol, "interval": interval, "bars": bars}, default=str))
 
-            await websocket.send_json(data)
+    try:
+        await sendSnapshot()
+        while True:
+            message = await subscriber.next()
+            if message == RESYNC:
+                await sendSnapshot()
+            elif message == DROP:
+                await websocket.close(code=1013)
+                break
+            else:
+                await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print("❌ Error in WebSocket:", e)
+    finally:
+        publisher.unsubscribe(subscriber)
@@ -0,0 +1,33 @@
+import pytest
+import app.orderBook
+from decimal import Decimal
+from app.orderBook import Order, OrderType
+
+
+def makeOrder(orderId, orderType, side, quantity, price="0", tif="GTC", expiry=None,
+              stopPrice=None, account=None, timeStamp=None):
+    return Order(
+        orderId=orderId,
+        symbol="BTC-USDT",
+        orderType=orderType,
+        side=side,
+        quantity=Decimal(quantity),
+        remainingQuantity=Decimal(quantity),
+        price=Decimal(price),
+        stopPrice=Decimal(stopPrice) if stopPrice is not None else None,
+        timeStamp=timeStamp,
+        tif=tif,
+        expiry=expiry,
+        account=account
+    )
+
+
+def limitOrder(orderId, side, quantity, price, **options):
+    return makeOrder(orderId, OrderType.LIMIT.value, side, quantity, price, **options)
+
+
+@pytest.fixture(autouse=True)
+def logDir(tmp_path, monkeypatch):
+    # books opened without a logDir write here instead of the repository's Logs/
+    monkeypatch.setattr(app.orderBook, "LOG_DIR", tmp_path / "Logs")
+    return tmp_path / "Logs"
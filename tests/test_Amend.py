@@ -0,0 +1,61 @@
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderSide
+from tests.conftest import limitOrder
+
+
+def queue(engine, side, price):
+    book = engine.bidOrders if side == OrderSide.BUY.value else engine.offerOrders
+    return [o.orderId for o in book[engine.scale.toPrice(price)]]
+
+
+def testAmendKeepsPriorityOnlyOnSizeDown(tmp_path):
+    for scale in [{}, {"tickSize": Decimal("0.5"), "lotSize": Decimal("0.1")}]:
+        logDir = tmp_path / str(len(scale))
+        engine = OrderBook(symbol="BTC-USDT", logDir=logDir, marketData=True, **scale)
+        for orderId in ["s1", "s2", "s3"]:
+            engine.addOrder(limitOrder(orderId, OrderSide.SELL.value, "1", "100"))
+        engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "0.4", "100"))
+        engine.drainUpdates()
+
+        # s1 has 0.6 left of 1; new total 0.8 leaves 0.4, in place
+        assert engine.amendOrder("s1", quantity=Decimal("0.8"))["remainingQuantity"] == Decimal("0.4")
+        assert queue(engine, OrderSide.SELL.value, "100") == ["s1", "s2", "s3"]
+        update, = engine.drainUpdates()
+        assert update["levels"] == [{"side": "sell", "price": Decimal("100"), "quantity": Decimal("2.4"), "orders": 3}]
+
+        # size-up loses priority, a new price moves the order
+        engine.amendOrder("s2", quantity=Decimal("2"))
+        assert queue(engine, OrderSide.SELL.value, "100") == ["s1", "s3", "s2"]
+        engine.drainUpdates()
+        engine.amendOrder("s3", price=Decimal("101.5"))
+        assert queue(engine, OrderSide.SELL.value, "101.5") == ["s3"]
+        update, = engine.drainUpdates()
+        assert {level["price"] for level in update["levels"]} == {Decimal("100"), Decimal("101.5")}
+
+        assert engine.amendOrder("s1", quantity=Decimal("0.4"))["resting"] is False
+        assert "s1" not in engine.orderMap and engine.amendOrder("s1", quantity=Decimal("1")) is None
+        engine.close()
+
+        restored = OrderBook(symbol="BTC-USDT", logDir=logDir, **scale)
+        restored.fillOrders()
+        assert restored.depth() == engine.depth()
+        assert queue(restored, OrderSide.SELL.value, "100") == ["s2"]
+        assert restored.scale.fromQuantity(restored.orderMap["s2"].quantity) == Decimal("2")
+        restored.close()
+
+
+def testCrossingAmendTradesLikeANewOrder(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "1", "99"))
+    engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "3", "101"))
+
+    result = engine.amendOrder("s1", price=Decimal("99"))
+    assert (result["filledQuantity"], result["remainingQuantity"], result["resting"]) == (Decimal("1"), Decimal("2"), True)
+    assert [t["maker_order_id"] for t in engine.trades] == ["b1"]
+    assert queue(engine, OrderSide.SELL.value, "99") == ["s1"]
+    engine.close()
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+    assert restored.depth() == engine.depth()
+    restored.close()
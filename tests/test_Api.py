@@ -0,0 +1,81 @@
+import importlib
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+
+@contextmanager
+def startApi(tmp_path, monkeypatch, **env):
+    monkeypatch.setenv("ENGINE_LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("ENGINE_RISK_WORKERS", "0")
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    # main builds its registry and sequencer at import, so every test gets a fresh module
+    main = importlib.reload(sys.modules["main"]) if "main" in sys.modules else importlib.import_module("main")
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    with startApi(tmp_path, monkeypatch) as client:
+        yield client
+
+
+def trade(client, price):
+    for side in ["sell", "buy"]:
+        response = client.post("/submitOrder", json={"orderType": "limit", "side": side, "quantity": "1", "price": price})
+        assert response.status_code == 200
+    return response.json()["orderId"]
+
+
+def testTradesPagesFiltersAndDefaultsToTheNewest(api):
+    start = datetime.now(timezone.utc)
+    takers = [trade(api, str(100 + i)) for i in range(5)]
+
+    latest = api.get("/trades", params={"limit": 2})
+    assert latest.status_code == 200
+    assert [t["seq"] for t in latest.json()["trades"]] == [4, 5] and latest.json()["nextCursor"] == "5"
+
+    pages, cursor = [], "0"
+    while cursor is not None:
+        page = api.get("/trades", params={"cursor": cursor, "limit": 2}).json()
+        pages.append([t["seq"] for t in page["trades"]])
+        cursor = page["nextCursor"]
+    assert pages == [[1, 2], [3, 4], [5]]
+
+    byOrder = api.get("/trades", params={"order_id": takers[2]}).json()["trades"]
+    assert [t["taker_order_id"] for t in byOrder] == [takers[2]]
+
+    window = {"since": start.isoformat(), "until": (datetime.now(timezone.utc) + timedelta(seconds=1)).isoformat()}
+    assert len(api.get("/trades", params=window).json()["trades"]) == 5
+    assert api.get("/trades", params={"until": start.isoformat()}).json()["trades"] == []
+    assert api.get("/trades", params={"symbol": "NOPE-USDT"}).status_code == 404
+
+
+def testSymbolOptionsSwitchOneSymbolToFixedPoint(tmp_path, monkeypatch):
+    options = json.dumps({"ETH-USDT": {"tickSize": "0.5", "lotSize": "0.1"}})
+    with startApi(tmp_path, monkeypatch, ENGINE_SYMBOLS="BTC-USDT,ETH-USDT", ENGINE_SYMBOL_OPTIONS=options) as client:
+        order = {"orderType": "limit", "side": "sell", "quantity": "1", "price": "100.25"}
+        assert client.post("/submitOrder", json=dict(order, symbol="ETH-USDT")).status_code == 400
+        assert client.post("/submitOrder", json=dict(order, symbol="BTC-USDT")).status_code == 200
+        assert client.post("/submitOrder", json=dict(order, symbol="ETH-USDT", price="100.5")).status_code == 200
+
+
+def testGtdOrdersCarryTheirExpiry(api):
+    order = {"orderType": "limit", "side": "sell", "quantity": "1", "price": "100", "tif": "GTD"}
+    assert api.post("/submitOrder", json=order).status_code == 422
+    past = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+    assert api.post("/submitOrder", json=dict(order, expiry=past)).status_code == 422
+    assert api.post("/submitOrders", json={"orders": [dict(order, expiry=past)]}).status_code == 422
+
+    expiry = datetime.now(timezone.utc) + timedelta(hours=1)
+    response = api.post("/submitOrders", json={"orders": [dict(order, expiry=expiry.isoformat())]})
+    assert response.status_code == 200 and response.json()[0]["status"] == "Added To Book"
+    book = sys.modules["main"].registry.books["BTC-USDT"]
+    assert book.orderMap[response.json()[0]["orderId"]].expiry == expiry
@@ -0,0 +1,50 @@
+import pytest
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderType, OrderSide
+from tests.conftest import makeOrder
+
+
+def testBatchIsValidatedBeforeAnythingMatches(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, marketData=True)
+    with pytest.raises(ValueError, match="Order 1"):
+        engine.addOrders([
+            makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100"),
+            makeOrder("s2", OrderType.LIMIT.value, OrderSide.SELL.value, "0", "101"),
+        ])
+    assert engine.orderMap == {} and engine.journal.seq == 0
+    version = engine.version
+
+    filled = engine.addOrders([
+        makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100"),
+        makeOrder("s2", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "101"),
+        makeOrder("b1", OrderType.MARKET.value, OrderSide.BUY.value, "1.5", "0"),
+    ])
+    assert filled == [Decimal("0"), Decimal("0"), Decimal("1.5")]
+    assert engine.orderMap["s2"].remainingQuantity == Decimal("0.5")
+
+    # matched in order, published once
+    update, = engine.drainUpdates()
+    assert [t["maker_order_id"] for t in update["trades"]] == ["s1", "s2"]
+    assert update["levels"] == [
+        {"side": "sell", "price": Decimal("100"), "quantity": Decimal("0"), "orders": 0},
+        {"side": "sell", "price": Decimal("101"), "quantity": Decimal("0.5"), "orders": 1}
+    ]
+    assert engine.version == version + 1
+
+
+def testCancelAllBySideAndPriceRangeIsOneEvent(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, marketData=True)
+    for i, price in enumerate(["95", "97", "99"]):
+        engine.addOrder(makeOrder(f"b{i}", OrderType.LIMIT.value, OrderSide.BUY.value, "1", price))
+    for i, price in enumerate(["101", "103"]):
+        engine.addOrder(makeOrder(f"s{i}", OrderType.LIMIT.value, OrderSide.SELL.value, "1", price))
+    engine.drainUpdates()
+
+    assert engine.cancelAll(OrderSide.BUY.value, minPrice=Decimal("96"), maxPrice=Decimal("99")) == ["b1", "b2"]
+    updates = engine.drainUpdates()
+    assert len(updates) == 1 and len(updates[0]["levels"]) == 2
+    assert engine.bbo["bestBidPrice"] == Decimal("95")
+
+    assert engine.cancelOrders(["s0", "missing"]) == [True, False]
+    assert sorted(engine.cancelAll()) == ["b0", "s1"]
+    assert engine.orderMap == {} and not engine.bidOrders and not engine.offerOrders
@@ -0,0 +1,43 @@
+import pytest
+from benchmarks.benchEngine import ApiDriver, DirectDriver, compare, run
+from benchmarks.flows import FLOWS, loadFlow, saveFlow
+
+
+def testFlowsAreSeededAndReplayable(tmp_path):
+    for name, generate in FLOWS.items():
+        flow = generate(500, 3)
+        assert len(flow) == 500
+        assert flow == generate(500, 3)
+        assert flow != generate(500, 4)
+
+    saveFlow(FLOWS["marketMaker"](300, 3), tmp_path / "flow.jsonl")
+    driver = DirectDriver(str(tmp_path / "run"))
+    result = run(driver, loadFlow(tmp_path / "flow.jsonl"))
+    driver.close()
+    assert result["count"] == 300 and result["ops"]["cancel"]["count"] > 0
+    assert result["p50Us"] <= result["p99Us"] <= result["p999Us"] <= result["maxUs"]
+
+    # the journal of that run replays as its resting orders plus cancels
+    replay = loadFlow(tmp_path / "run" / "journal.jsonl")
+    assert replay and {op["op"] for op in replay} == {"submit", "cancel"}
+
+
+def testCompareFlagsThroughputAndTailRegressions():
+    baseline = {"direct/mixed": {"opsPerSec": 1000.0, "p99Us": 100.0}}
+    assert compare({"direct/mixed": {"opsPerSec": 950.0, "p99Us": 105.0}}, baseline, 0.1) == []
+    regressions = compare({"direct/mixed": {"opsPerSec": 800.0, "p99Us": 150.0}}, baseline, 0.1)
+    assert len(regressions) == 2
+
+
+def testApiDriverRunsScenariosBackToBack(tmp_path, monkeypatch):
+    pytest.importorskip("fastapi")
+    monkeypatch.setenv("ENGINE_RISK_WORKERS", "0")
+    # each run executes main afresh, so a stopped sequencer or an old log directory is never reused
+    for name in ["first", "second"]:
+        driver = ApiDriver(str(tmp_path / name))
+        try:
+            result = run(driver, FLOWS["marketMaker"](60, 1))
+        finally:
+            driver.close()
+        assert result["count"] == 60
+        assert (tmp_path / name / "BTC-USDT" / "journal.jsonl").exists()
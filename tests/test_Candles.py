@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from app.candles import CandleAggregator
+from app.orderBook import OrderBook, OrderType, OrderSide
+from app.tradeLog import TradeLog
+from tests.conftest import makeOrder
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def trade(seconds, price, quantity, n):
+    return {
+        "timestamp": datetime.fromtimestamp(T0 + seconds, timezone.utc).isoformat(timespec="microseconds"),
+        "price": price, "quantity": quantity, "maker_order_id": f"m{n}", "taker_order_id": f"t{n}"
+    }
+
+
+def testBarsAggregateOhlcvAndVwap():
+    candles = CandleAggregator(None, {"1s": 1, "1m": 60}, publish=True)
+    candles.add(T0, Decimal("100"), Decimal("1"))
+    candles.add(T0 + 0.5, Decimal("103"), Decimal("3"))
+    candles.add(T0 + 0.9, Decimal("99"), Decimal("1"))
+    candles.add(T0 + 1.2, Decimal("101"), Decimal("2"))
+
+    first, current = candles.candles("1s")
+    assert (first["open"], first["high"], first["low"], first["close"]) == (Decimal("100"), Decimal("103"), Decimal("99"), Decimal("99"))
+    assert first["volume"] == Decimal("5") and first["vwap"] == Decimal("101.6") and first["trades"] == 3
+    assert current["open"] == Decimal("101") and current["trades"] == 1
+
+    minute, = candles.candles("1m")
+    assert minute["volume"] == Decimal("7") and minute["high"] == Decimal("103")
+    assert [bar["interval"] for bar in candles.drainUpdates()] == ["1s", "1s", "1m"]
+    assert candles.drainUpdates() == []
+
+
+def testRestoreBackfillsFromTradeLogInOnePass(tmp_path):
+    log = TradeLog(tmp_path / "trades", maxSegmentAgeSeconds=None)
+    live = CandleAggregator(tmp_path / "candles", {"1s": 1, "1m": 60})
+    for n, (seconds, price) in enumerate([(0, "10"), (1, "11"), (2, "12"), (61, "13")]):
+        log.append([trade(seconds, price, "1", n)])
+        live.addTrade(trade(seconds, price, "1", n))
+    live.close()
+    # this trade was logged but the process died before its bars were touched
+    log.append([trade(62, "14", "2", 4)])
+    log.flush()
+
+    restored = CandleAggregator(tmp_path / "candles", {"1s": 1, "1m": 60})
+    restored.restore(lambda since: log.scan(since=since))
+    assert [bar["close"] for bar in restored.candles("1s")] == [Decimal(p) for p in ["10", "11", "12", "13", "14"]]
+    first, second = restored.candles("1m")
+    assert first["volume"] == Decimal("3") and second["volume"] == Decimal("3")
+    assert second["open"] == Decimal("13") and second["close"] == Decimal("14")
+
+
+def testBookFeedsCandlesAndPublishesBars(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, candles=True, marketData=True)
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "2", "100"))
+    engine.addOrder(makeOrder("b1", OrderType.MARKET.value, OrderSide.BUY.value, "2", "0"))
+
+    bar = engine.candleAggregator.candles("1m")[-1]
+    assert bar["close"] == Decimal("100") and bar["volume"] == Decimal("2")
+    channels = [update["channel"] for update in engine.drainUpdates() if update["type"] == "candle"]
+    assert sorted(channels) == sorted(f"candles:BTC-USDT:{interval}" for interval in ["1s", "1m", "5m", "1h"])
+    engine.close()
@@ -1,6 +1,8 @@
+import json
 import pytest
 from decimal import Decimal
 from app.orderBook import OrderBook, Order, OrderType, OrderSide
+from tests.conftest import limitOrder, makeOrder
 
 def testValidate():
     engine = OrderBook(symbol="BTC-USDT")
@@ -134,3 +136,75 @@ def testFOKOrderRejectsPartial():
 
     assert filled == Decimal("0")
     assert fok_order.orderId not in engine.orderMap
+
+
+def testSweepWalksBestPriceFirstAndStopsAtLimit(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    for orderId, price in [("b1", "990"), ("b2", "1010"), ("b3", "1000")]:
+        engine.addOrder(limitOrder(orderId, OrderSide.BUY.value, "1", price))
+
+    sell = limitOrder("s1", OrderSide.SELL.value, "3", "1000")
+    filled = engine.addOrder(sell)
+
+    assert filled == Decimal("2")
+    assert [t["maker_order_id"] for t in engine.trades] == ["b2", "b3"]
+    assert list(engine.bidOrders.keys()) == [Decimal("990")]
+    assert engine.offerOrders[Decimal("1000")][0].orderId == "s1"
+
+
+def testCompactOrderRepresentation(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    orders = [makeOrder(f"limit-{i}", "LIMIT".lower(), "BUY".lower(), "1", "1000") for i in range(2)]
+    for order in orders:
+        engine.addOrder(order)
+
+    assert not hasattr(orders[0], "__dict__")
+    assert orders[0].side is orders[1].side is OrderSide.BUY.value
+    assert orders[0].price is orders[1].price
+    assert [o.handle for o in orders] == [1, 2]
+
+
+def testFOKPrecheckLeavesBookUntouchedAndDepthToPrice(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    for orderId, quantity, price in [("s1", "1", "1000"), ("s2", "2", "1001"), ("s3", "4", "1003")]:
+        engine.addOrder(limitOrder(orderId, OrderSide.SELL.value, quantity, price))
+    seq = engine.journal.seq
+
+    def fok(orderId, quantity):
+        return makeOrder(orderId, OrderType.FOK.value, OrderSide.BUY.value, quantity, "1002", tif="FOK")
+
+    assert engine.addOrder(fok("f1", "4")) == Decimal("0")
+    assert list(engine.trades) == [] and engine.tradeLog.seq == 0 and engine.journal.seq == seq
+    assert engine.offerOrders[Decimal("1000")].totalQuantity == Decimal("1")
+
+    depth = engine.depthToPrice(OrderSide.BUY.value, Decimal("1002"))
+    assert (depth["levels"], depth["quantity"], depth["averagePrice"]) == (2, Decimal("3"), Decimal("1000.666666666666666666666667"))
+    assert engine.depthToPrice(OrderSide.SELL.value, Decimal("1"))["quantity"] == Decimal("0")
+
+    assert engine.addOrder(fok("f2", "3")) == Decimal("3")
+    assert [t["maker_order_id"] for t in engine.trades] == ["s1", "s2"]
+
+
+
+def testDepthViewSlicesTopLevelsAndCachesPerVersion(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+
+    for i in range(5):
+        engine.addOrder(limitOrder(f"s{i}", OrderSide.SELL.value, "1", str(101 + i)))
+        engine.addOrder(limitOrder(f"b{i}", OrderSide.BUY.value, "1", str(99 - i)))
+    engine.addOrder(limitOrder("b5", OrderSide.BUY.value, "2", "99"))
+
+    view = json.loads(engine.depthView(2))
+    assert [level["price"] for level in view["bid"]] == ["99", "98"]
+    assert [level["price"] for level in view["ask"]] == ["101", "102"]
+    assert view["bid"][0] == {"price": "99", "quantity": "3", "orders": 2}
+    l3 = json.loads(engine.depthView(1, "l3"))
+    assert l3["bid"][0]["orders"] == [{"orderId": "b0", "quantity": "1"}, {"orderId": "b5", "quantity": "2"}]
+    assert len(json.loads(engine.depthView())["ask"]) == 5
+
+    # repeated polls are served from the cache until an event changes a level
+    cached = engine.depthView(2)
+    assert engine.depthView(2) is cached
+    assert not engine.cancelOrder("missing") and engine.depthView(2) is cached
+    engine.cancelOrder("b0")
+    assert json.loads(engine.depthView(2))["version"] == view["version"] + 1
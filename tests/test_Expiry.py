@@ -0,0 +1,51 @@
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderType, OrderSide
+from tests.conftest import makeOrder
+
+
+def testExpiredOrdersLeaveBookJournalAndFeed(tmp_path):
+    now = datetime.now(timezone.utc)
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, marketData=True)
+    engine.addOrder(makeOrder("g1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100", "GTD", now + timedelta(hours=1)))
+    engine.addOrder(makeOrder("g2", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "101", "GTD", now + timedelta(hours=2)))
+    engine.addOrder(makeOrder("d1", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "90", "DAY"))
+    engine.addOrder(makeOrder("c1", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "89"))
+    engine.cancelOrder("g2")
+    engine.drainUpdates()
+
+    assert engine.expireOrders(now) == []
+    assert engine.expireOrders(now + timedelta(hours=3)) == ["g1"]
+    update, = engine.drainUpdates()
+    assert update["expired"] == ["g1"] and update["bbo"]["bestOfferPrice"] == Decimal("0")
+
+    assert engine.expireOrders(now + timedelta(days=2)) == ["d1"]
+    assert list(engine.orderMap) == ["c1"] and engine.expiryHeap == []
+    engine.close()
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+    assert list(restored.orderMap) == ["c1"]
+
+
+def testMatcherNeverFillsAgainstExpiredMaker(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    expiry = datetime.now(timezone.utc) + timedelta(milliseconds=50)
+    engine.addOrder(makeOrder("g1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100", "GTD", expiry))
+    engine.addOrder(makeOrder("s2", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "102"))
+    time.sleep(0.1)
+
+    assert engine.addOrder(makeOrder("b1", OrderType.MARKET.value, OrderSide.BUY.value, "1", "0")) == Decimal("1")
+    assert [t["maker_order_id"] for t in engine.trades] == ["s2"]
+    assert "g1" not in engine.orderMap
+
+
+def testExpiredOnArrivalReportsQuantitiesInApiUnits(tmp_path):
+    from app.registry import submitOrder
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, tickSize=Decimal("0.5"), lotSize=Decimal("0.001"))
+    past = datetime.now(timezone.utc) - timedelta(minutes=1)
+    result = submitOrder(engine, makeOrder("g1", OrderType.LIMIT.value, OrderSide.BUY.value, "2", "100", "GTD", past))
+    assert (result["filledQuantity"], result["remainingQuantity"], result["resting"]) == (0, Decimal("2"), False)
+    assert engine.orderMap == {}
+    engine.close()
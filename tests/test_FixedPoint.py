@@ -0,0 +1,75 @@
+import random
+import pytest
+from decimal import Decimal
+from app.orderBook import OrderBook, Order, OrderType, OrderSide
+
+
+def randomFlow(seed, count):
+    rng = random.Random(seed)
+    orderTypes = [OrderType.LIMIT.value] * 6 + [OrderType.MARKET.value, OrderType.IOC.value, OrderType.FOK.value]
+    flow = []
+    for i in range(count):
+        if i > 10 and rng.random() < 0.15:
+            flow.append(("cancel", f"o{rng.randrange(i)}"))
+            continue
+        orderType = rng.choice(orderTypes)
+        price = Decimal("100.00") + Decimal("0.05") * rng.randint(-10, 10)
+        flow.append(("add", dict(
+            orderId=f"o{i}",
+            orderType=orderType,
+            side=rng.choice([OrderSide.BUY.value, OrderSide.SELL.value]),
+            quantity=Decimal("0.001") * rng.randint(1, 5000),
+            price=Decimal(0) if orderType == OrderType.MARKET.value else price,
+            timeStamp=None
+        )))
+    return flow
+
+
+def run(engine, flow):
+    filled = []
+    for action, payload in flow:
+        if action == "cancel":
+            engine.cancelOrder(payload)
+        else:
+            order = Order(remainingQuantity=payload["quantity"], **payload)
+            filled.append(engine.addOrder(order))
+    return filled
+
+
+def normalise(trades):
+    return [(Decimal(t["price"]), Decimal(t["quantity"]), t["maker_order_id"], t["taker_order_id"]) for t in trades]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def testFixedPointMatchesDecimalReference(tmp_path, seed):
+    flow = randomFlow(seed, 600)
+    reference = OrderBook(symbol="BTC-USDT", logDir=tmp_path / "decimal", fsyncEvery=0)
+    fixed = OrderBook(symbol="BTC-USDT", logDir=tmp_path / "fixed", fsyncEvery=0,
+                      tickSize=Decimal("0.05"), lotSize=Decimal("0.001"))
+
+    assert run(reference, flow) == run(fixed, flow)
+    assert normalise(reference.trades) == normalise(fixed.trades)
+    assert reference.depth() == fixed.depth()
+    assert reference.bbo == fixed.bbo
+    assert len(reference.trades) > 100
+
+
+def testFixedPointStoresScaledIntegers(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, tickSize=Decimal("0.01"), lotSize=Decimal("0.0001"))
+    order = Order(orderId="b1", orderType=OrderType.LIMIT.value, side=OrderSide.BUY.value,
+                  quantity=Decimal("1.5"), remainingQuantity=Decimal("1.5"), price=Decimal("100.25"), timeStamp=None)
+    engine.addOrder(order)
+
+    assert list(engine.bidOrders.keys()) == [10025]
+    assert engine.bidOrders[10025].totalQuantity == 15000
+    assert engine.bbo["bestBidPrice"] == Decimal("100.25")
+
+    offTick = Order(orderId="b2", orderType=OrderType.LIMIT.value, side=OrderSide.BUY.value,
+                    quantity=Decimal("1"), remainingQuantity=Decimal("1"), price=Decimal("100.255"), timeStamp=None)
+    with pytest.raises(ValueError):
+        engine.addOrder(offTick)
+
+    engine.journal.close()
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path, tickSize=Decimal("0.01"), lotSize=Decimal("0.0001"))
+    restored.fillOrders()
+    assert restored.orderMap["b1"].remainingQuantity == 15000
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+from decimal import Decimal
+from app.gateway import OrderGateway, GatewayClient, ACCEPTED, FILLED, PARTIAL, CANCELLED, REPLACED, REJECTED
+from app.registry import SymbolRegistry
+from app.sequencer import Sequencer
+
+
+def startGateway(tmp_path):
+    registry = SymbolRegistry(symbols=["BTC-USDT"], logDir=tmp_path, bookOptions={"fsyncEvery": 0, "autoFlush": False, "marketData": True})
+    gateway = None
+    sequencer = Sequencer(afterBatch=[lambda: gateway.observe(registry.flush())]).start()
+
+    async def submit(fn, *args):
+        return await asyncio.wrap_future(sequencer.submit(fn, *args))
+
+    gateway = OrderGateway(registry, submit)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(gateway.start(port=0), loop).result(timeout=5)
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(gateway.close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        sequencer.stop()
+        registry.close()
+    return gateway, stop
+
+
+def testGatewayOrderLifecycleAndExecutionReports(tmp_path):
+    gateway, stop = startGateway(tmp_path)
+    maker = GatewayClient(port=gateway.port, timeout=5)
+    taker = GatewayClient(port=gateway.port, timeout=5)
+    try:
+        ask = maker.newOrder("sell", "1", "100.5")
+        assert (ask.kind, ask.status, ask.leavesQuantity) == ("ack", ACCEPTED, Decimal("1"))
+
+        hit = taker.newOrder("buy", "0.4", "101")
+        assert (hit.status, hit.cumQuantity, hit.leavesQuantity) == (FILLED, Decimal("0.4"), 0)
+        fill = taker.nextExecution()
+        assert (fill.clOrdId, fill.status, fill.price, fill.quantity) == (hit.clOrdId, FILLED, Decimal("100.5"), Decimal("0.4"))
+        makerFill = maker.nextExecution()
+        assert (makerFill.clOrdId, makerFill.status, makerFill.leavesQuantity) == (ask.clOrdId, PARTIAL, Decimal("0.6"))
+
+        # quantity is the new total, the 0.4 already filled included
+        replaced = maker.replace(ask.clOrdId, "102", "2")
+        assert (replaced.status, replaced.cumQuantity, replaced.leavesQuantity) == (REPLACED, Decimal("0.4"), Decimal("1.6"))
+        assert maker.cancel(ask.clOrdId).status == REJECTED
+
+        market = taker.newOrder("buy", "3", orderType="market")
+        assert (market.status, market.cumQuantity) == (CANCELLED, Decimal("1.6"))
+        assert maker.nextExecution().status == FILLED
+        assert maker.cancel(replaced.clOrdId).reason.startswith("Unknown order")
+
+        # an ioc into an empty book drops its whole quantity: cancelled, not filled
+        ioc = taker.newOrder("sell", "1", "100", orderType="ioc")
+        assert (ioc.status, ioc.cumQuantity, ioc.leavesQuantity) == (CANCELLED, 0, 0)
+
+        rejected = taker.newOrder("buy", "1", "100", symbol="ETH-USDT")
+        assert rejected.kind == "reject" and "Unknown symbol" in rejected.reason
+    finally:
+        maker.close()
+        taker.close()
+        stop()
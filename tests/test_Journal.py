@@ -0,0 +1,89 @@
+import json
+import time
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderSide
+from app.journal import Journal
+from tests.conftest import limitOrder
+
+
+def testJournalReplayRebuildsBook(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "3", "1000"))
+    engine.addOrder(limitOrder("s2", OrderSide.SELL.value, "2", "1001"))
+    engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "4", "1000"))
+    engine.addOrder(limitOrder("b2", OrderSide.BUY.value, "1", "999"))
+    engine.cancelOrder("s2")
+    engine.journal.close()
+
+    events = [json.loads(line)["event"] for line in open(tmp_path / "journal.jsonl")]
+    assert events == ["new", "new", "fill", "new", "new", "cancel"]
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+
+    assert list(restored.offerOrders.keys()) == []
+    assert [o.orderId for o in restored.bidOrders[Decimal("1000")]] == ["b1"]
+    assert restored.orderMap["b1"].remainingQuantity == Decimal("1")
+    assert restored.bbo["bestBidPrice"] == Decimal("1000")
+    assert restored.journal.seq == 6
+
+
+def testCompactionWritesSnapshotAndTruncatesJournal(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, compactEvery=3)
+    engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "3", "1000"))
+    engine.addOrder(limitOrder("s2", OrderSide.SELL.value, "2", "1000"))
+    engine.addOrder(limitOrder("s3", OrderSide.SELL.value, "2", "1002"))
+    engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "1", "1000"))
+    engine.journal.close()
+
+    assert (tmp_path / "snapshot.bin").exists()
+    assert len(open(tmp_path / "journal.jsonl").readlines()) == 1
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+
+    assert [o.orderId for o in restored.offerOrders[Decimal("1000")]] == ["s1", "s2"]
+    assert restored.orderMap["s1"].remainingQuantity == Decimal("2")
+    assert restored.journal.seq == 4
+
+
+def testJournalFsyncBatching(tmp_path):
+    journal = Journal(tmp_path / "journal.jsonl", fsyncEvery=3)
+    journal.append("cancel", orderId="a")
+    journal.append("cancel", orderId="b")
+    assert journal.pending == 2
+    journal.append("cancel", orderId="c")
+    assert journal.pending == 0
+
+    journal = Journal(tmp_path / "other.jsonl", fsyncIntervalMs=60000)
+    journal.append("cancel", orderId="a")
+    journal.append("cancel", orderId="b")
+    assert journal.pending == 2
+    journal.sync()
+    assert [r["orderId"] for r in journal.replay()] == ["a", "b"]
+
+
+def testIntervalSyncsPendingRecordsWithoutFurtherWrites(tmp_path):
+    journal = Journal(tmp_path / "journal.jsonl", fsyncIntervalMs=10)
+    journal.sync()
+    journal.append("cancel", orderId="a")
+
+    # nothing else is written: the timer syncs once the interval has passed
+    deadline = time.monotonic() + 2
+    while journal.pending and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert journal.pending == 0
+    assert [json.loads(line)["orderId"] for line in (tmp_path / "journal.jsonl").read_text().splitlines()] == ["a"]
+    journal.close()
+
+
+def testReopenedJournalContinuesTheSequence(tmp_path):
+    journal = Journal(tmp_path / "journal.jsonl", fsyncEvery=0)
+    journal.append("cancel", orderId="a")
+    journal.append("cancel", orderId="b")
+    journal.close()
+
+    reopened = Journal(tmp_path / "journal.jsonl", fsyncEvery=0)
+    assert reopened.append("cancel", orderId="c") == 3
+    reopened.close()
+    assert [record["seq"] for record in Journal(tmp_path / "journal.jsonl").replay()] == [1, 2, 3]
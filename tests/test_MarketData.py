@@ -0,0 +1,54 @@
+import asyncio
+import json
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderSide
+from app.marketData import MarketDataPublisher, RESYNC, DROP
+from tests.conftest import limitOrder
+
+
+def testBookEmitsSequencedDeltasAndSnapshot(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, marketData=True)
+    engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "2", "1000"))
+    engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "1", "1000"))
+    engine.cancelOrder("missing")
+
+    first, second = engine.drainUpdates()
+    assert (first["seq"], second["seq"]) == (1, 2)
+    assert second["levels"] == [{"side": "sell", "price": Decimal("1000"), "quantity": Decimal("1"), "orders": 1}]
+    assert [t["maker_order_id"] for t in second["trades"]] == ["s1"]
+    assert second["bbo"]["bestOfferQuantity"] == Decimal("1")
+    assert engine.drainUpdates() == []
+
+    snapshot = engine.marketSnapshot()
+    assert snapshot["seq"] == 2
+    assert snapshot["ask"] == [(Decimal("1000"), Decimal("1"))]
+
+
+def testPublisherSerializesOnceAndConflatesSlowConsumers():
+    async def scenario():
+        publisher = MarketDataPublisher(maxQueue=2, maxResyncs=1)
+        fast = publisher.subscribe("BTC-USDT")
+        slow = publisher.subscribe("BTC-USDT")
+        other = publisher.subscribe("ETH-USDT")
+
+        publisher.publish([{"symbol": "BTC-USDT", "seq": 1, "levels": []}])
+        fastItem = fast.queue.get_nowait()
+        slowItem = slow.queue.get_nowait()
+        assert fastItem[1] is slowItem[1]
+        assert json.loads(fastItem[1])["seq"] == 1
+        assert other.queue.empty()
+
+        for seq in range(2, 5):
+            publisher.publish([{"symbol": "BTC-USDT", "seq": seq, "levels": []}])
+        assert await slow.next() == RESYNC
+
+        slow.snapshotSeq = 4
+        publisher.publish([{"symbol": "BTC-USDT", "seq": 5, "levels": []}])
+        assert json.loads(await slow.next())["seq"] == 5
+
+        for seq in range(6, 9):
+            publisher.publish([{"symbol": "BTC-USDT", "seq": seq, "levels": []}])
+        assert await slow.next() == DROP
+        assert slow not in publisher.subscribers["BTC-USDT"]
+
+    asyncio.run(scenario())
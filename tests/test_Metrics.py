@@ -0,0 +1,48 @@
+import pytest
+from app.metrics import Histogram, renderMetrics
+from app.orderBook import OrderBook, OrderType, OrderSide
+from tests.conftest import makeOrder
+
+
+def testHistogramPercentilesStayWithinBucketError():
+    histogram = Histogram(subBits=4)
+    for value in range(1, 100001):
+        histogram.record(value * 10)
+    assert histogram.count == 100000 and histogram.max == 1000000
+    for fraction in (0.5, 0.99, 0.999):
+        expected = fraction * 1000000
+        assert abs(histogram.percentile(fraction) - expected) <= expected / 16
+
+
+def testBookCountsStagesAndRendersPrometheusText(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100"))
+    engine.addOrder(makeOrder("b1", OrderType.MARKET.value, OrderSide.BUY.value, "1", "0"))
+    engine.addOrder(makeOrder("b2", OrderType.FOK.value, OrderSide.BUY.value, "1", "100"))
+    engine.addOrder(makeOrder("s2", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "101"))
+    engine.cancelOrder("s2")
+    with pytest.raises(ValueError):
+        engine.addOrder(makeOrder("b3", OrderType.LIMIT.value, OrderSide.BUY.value, "0", "100"))
+
+    snapshot = engine.metricsSnapshot()
+    counters = snapshot["counters"]
+    assert counters[("orders_total", (("type", "limit"),))] == 3
+    assert counters[("fills_total", ())] == 1
+    assert counters[("cancels_total", ())] == 1
+    assert counters[("rejects_total", (("type", "fok"), ("reason", "unfilled")))] == 1
+    assert counters[("rejects_total", (("type", "limit"), ("reason", "invalid")))] == 1
+    assert {"validate", "match", "bbo", "total", "persist", "cancel", "journal_fsync"} <= set(snapshot["stages"])
+
+    text = renderMetrics({"BTC-USDT": snapshot})
+    assert text.count("# TYPE engine_stage_latency_seconds summary") == 1
+    assert 'engine_cancels_total{symbol="BTC-USDT"} 1' in text
+    assert 'engine_stage_latency_seconds_count{symbol="BTC-USDT",stage="total"} 4' in text
+    engine.close()
+
+
+def testMetricsSwitchRemovesInstrumentation(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, metrics=False)
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100"))
+    assert engine.meter is None and engine.journal.metrics is None
+    assert engine.metricsSnapshot() is None
+    engine.close()
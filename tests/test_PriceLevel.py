@@ -0,0 +1,69 @@
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderType, OrderSide
+from app.priceLevel import PriceLevel
+from tests.conftest import makeOrder
+
+
+def testLevelUnlinksFromAnyPosition():
+    level = PriceLevel(Decimal("1000"))
+    orders = [makeOrder(f"o{i}", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "1000") for i in range(4)]
+    for order in orders:
+        level.append(order)
+
+    level.remove(orders[1])
+    level.remove(orders[3])
+
+    assert [o.orderId for o in level] == ["o0", "o2"]
+    assert level[0] is orders[0] and level[-1] is orders[2]
+    assert len(level) == 2
+    assert orders[1].level is None
+
+
+def testCancelKeepsTimePriorityAndIgnoresMissingOrders(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    for i in range(3):
+        engine.addOrder(makeOrder(f"s{i}", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "1000"))
+
+    assert engine.cancelOrder("s1") is True
+    assert engine.cancelOrder("s1") is False
+    assert engine.cancelOrder("unknown") is False
+
+    engine.addOrder(makeOrder("b1", OrderType.LIMIT.value, OrderSide.BUY.value, "2", "1000"))
+    assert [t["maker_order_id"] for t in engine.trades] == ["s0", "s2"]
+    assert Decimal("1000") not in engine.offerOrders
+
+
+def testRejectedFOKRestoresQueueOrder(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    for i in range(3):
+        engine.addOrder(makeOrder(f"s{i}", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "1000"))
+
+    engine.addOrder(makeOrder("f1", OrderType.FOK.value, OrderSide.BUY.value, "5", "1000"))
+
+    assert [o.orderId for o in engine.offerOrders[Decimal("1000")]] == ["s0", "s1", "s2"]
+    assert all(o.remainingQuantity == Decimal("1") for o in engine.offerOrders[Decimal("1000")])
+
+
+def testLevelAggregatesAndChangedLevels(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "3", "1000"))
+    engine.addOrder(makeOrder("s2", OrderType.LIMIT.value, OrderSide.SELL.value, "2", "1000"))
+    engine.addOrder(makeOrder("s3", OrderType.LIMIT.value, OrderSide.SELL.value, "4", "1001"))
+
+    level = engine.offerOrders[Decimal("1000")]
+    assert (level.totalQuantity, len(level)) == (Decimal("5"), 2)
+    assert engine.bbo["bestOfferQuantity"] == Decimal("5")
+
+    engine.addOrder(makeOrder("b1", OrderType.LIMIT.value, OrderSide.BUY.value, "4", "1000"))
+    assert engine.bboChanged
+    assert (level.totalQuantity, len(level)) == (Decimal("1"), 1)
+    assert engine.levelChanges == [{"side": "sell", "price": Decimal("1000"), "quantity": Decimal("1"), "orders": 1}]
+
+    engine.addOrder(makeOrder("s4", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "1005"))
+    assert not engine.bboChanged
+    assert engine.levelChanges == [{"side": "sell", "price": Decimal("1005"), "quantity": Decimal("1"), "orders": 1}]
+
+    engine.cancelOrder("s2")
+    assert engine.levelChanges == [{"side": "sell", "price": Decimal("1000"), "quantity": Decimal("0"), "orders": 0}]
+    assert engine.bbo["bestOfferPrice"] == Decimal("1001")
+    assert engine.bbo["bestOfferQuantity"] == Decimal("4")
@@ -0,0 +1,57 @@
+import pytest
+from decimal import Decimal
+from app.orderBook import OrderSide
+from app.registry import SymbolRegistry, UnknownSymbolError
+from tests.conftest import limitOrder
+
+
+def testRegistryRoutesBySymbolWithSeparateLogs(tmp_path):
+    registry = SymbolRegistry(symbols=["BTC-USDT", "ETH-USDT"], logDir=tmp_path)
+    registry.submitOrder("BTC-USDT", limitOrder("b1", OrderSide.SELL.value, "1", "30000"))
+    registry.submitOrder("ETH-USDT", limitOrder("e1", OrderSide.SELL.value, "2", "2000"))
+    result = registry.submitOrder("ETH-USDT", limitOrder("e2", OrderSide.BUY.value, "1", "2000"))
+
+    assert result == {"orderId": "e2", "filledQuantity": Decimal("1"), "remainingQuantity": Decimal("0"), "resting": False}
+    assert registry.trades("BTC-USDT")["trades"] == []
+    assert [t["symbol"] for t in registry.trades("ETH-USDT")["trades"]] == ["ETH-USDT"]
+    assert (tmp_path / "BTC-USDT" / "journal.jsonl").exists()
+    assert (tmp_path / "ETH-USDT" / "journal.jsonl").exists()
+
+    with pytest.raises(UnknownSymbolError):
+        registry.depth("DOGE-USDT")
+    registry.close()
+
+
+def testPinnedSymbolsRunInWorkerProcess(tmp_path):
+    registry = SymbolRegistry(symbols=["BTC-USDT", "ETH-USDT"], logDir=tmp_path, groups=[["ETH-USDT"]])
+    try:
+        assert "ETH-USDT" not in registry.books
+        registry.submitOrder("ETH-USDT", limitOrder("e1", OrderSide.SELL.value, "2", "2000"))
+        result = registry.submitOrder("ETH-USDT", limitOrder("e2", OrderSide.BUY.value, "3", "2000"))
+
+        assert result["filledQuantity"] == Decimal("2")
+        assert result["remainingQuantity"] == Decimal("1")
+        assert registry.bbo("ETH-USDT")["bestBidPrice"] == Decimal("2000")
+        assert registry.depth("ETH-USDT") == {"bid": [(Decimal("2000"), Decimal("1"))], "ask": []}
+        assert registry.cancelOrder("ETH-USDT", "e2") is True
+
+        with pytest.raises(ValueError):
+            registry.submitOrder("ETH-USDT", limitOrder("e3", OrderSide.BUY.value, "0", "2000"))
+    finally:
+        registry.close()
+
+
+def testSymbolOptionsReachInProcessAndPinnedBooks(tmp_path):
+    options = {symbol: {"tickSize": Decimal("0.5"), "lotSize": Decimal("0.1")} for symbol in ["BTC-USDT", "ETH-USDT"]}
+    registry = SymbolRegistry(symbols=["BTC-USDT", "ETH-USDT", "SOL-USDT"], logDir=tmp_path, groups=[["ETH-USDT"]],
+                              symbolOptions=options)
+    try:
+        assert registry.books["BTC-USDT"].tickSize == Decimal("0.5") and registry.books["SOL-USDT"].tickSize is None
+        for symbol in ["BTC-USDT", "ETH-USDT"]:
+            with pytest.raises(ValueError):
+                registry.submitOrder(symbol, limitOrder("off", OrderSide.SELL.value, "1", "100.25"))
+            registry.submitOrder(symbol, limitOrder("s1", OrderSide.SELL.value, "1.5", "100.5"))
+            assert registry.depth(symbol) == {"bid": [], "ask": [(Decimal("100.5"), Decimal("1.5"))]}
+        registry.submitOrder("SOL-USDT", limitOrder("s1", OrderSide.SELL.value, "1", "100.25"))
+    finally:
+        registry.close()
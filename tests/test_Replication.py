@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+from app.orderBook import OrderType, OrderSide
+from app.registry import SymbolRegistry
+from app.replication import ReplicationServer, ReplicationClient
+from app.sequencer import Sequencer
+from tests.conftest import makeOrder, limitOrder
+
+OPTIONS = {"fsyncEvery": 0, "autoFlush": False, "replicate": True}
+
+
+class Node() :
+    """A registry behind its own sequencer, with replication hooked in like main.py."""
+
+    def __init__(self, logDir, loop, **options):
+        self.loop = loop
+        self.registry = SymbolRegistry(symbols=["BTC-USDT"], logDir=logDir, bookOptions={**OPTIONS, **options})
+        self.sequencer = Sequencer(afterBatch=[lambda: self.server.observe(self.registry.flush())]).start()
+        self.server = ReplicationServer(self.registry, self.submit)
+        self.client = None
+
+    async def submit(self, fn, *args):
+        return await asyncio.wrap_future(self.sequencer.submit(fn, *args))
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=5)
+
+    def call(self, fn, *args):
+        return self.sequencer.submit(fn, *args).result(timeout=5)
+
+    def serve(self):
+        self.run(self.server.start(port=0))
+
+    def follow(self, primary):
+        async def start():
+            self.client = ReplicationClient(self.registry, self.submit, port=primary.server.port, retryInterval=0.05).start()
+        self.run(start())
+
+    def book(self):
+        return self.registry.books["BTC-USDT"]
+
+    def close(self):
+        if self.client is not None:
+            self.run(self.client.stop())
+        self.run(self.server.close())
+        self.sequencer.stop()
+        self.registry.close()
+
+
+def caughtUp(follower, primary, timeout=5):
+    deadline = time.monotonic() + timeout
+    target = primary.call(primary.registry.replicationPositions)
+    while time.monotonic() < deadline:
+        if follower.call(follower.registry.replicationPositions) == target:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def startLoop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def testFollowerStreamsCatchesUpAndPromotes(tmp_path):
+    loop = startLoop()
+    primary = Node(tmp_path / "primary", loop, compactEvery=6)
+    follower = Node(tmp_path / "follower", loop)
+    try:
+        primary.serve()
+        submit = lambda order: primary.call(primary.registry.submitOrder, "BTC-USDT", order)
+        submit(limitOrder("s1", OrderSide.SELL.value, "1", "100"))
+        submit(limitOrder("s2", OrderSide.SELL.value, "2", "101"))
+        submit(makeOrder("st1", OrderType.STOP.value, OrderSide.SELL.value, "1", stopPrice="90"))
+
+        # the first connection catches up from the primary's journal
+        follower.follow(primary)
+        assert caughtUp(follower, primary)
+        assert follower.book().depth() == primary.book().depth() and list(follower.book().stopMap) == ["st1"]
+
+        # live: trades, fills and a compaction on the primary are mirrored
+        for i in range(4):
+            submit(limitOrder(f"b{i}", OrderSide.BUY.value, "0.5", "101"))
+        submit(limitOrder("b9", OrderSide.BUY.value, "1", "99"))
+        assert caughtUp(follower, primary)
+        assert follower.book().depth() == primary.book().depth() and list(follower.book().stopMap) == ["st1"]
+        assert [t["seq"] for t in follower.book().trades] == [t["seq"] for t in primary.book().trades] == [1, 2, 3, 4]
+        assert (tmp_path / "follower" / "BTC-USDT" / "snapshot.bin").exists()
+
+        # a follower that missed a compaction is rebuilt from the primary's snapshot
+        follower.close()
+        for i in range(8):
+            submit(limitOrder(f"x{i}", OrderSide.BUY.value, "1", str(80 + i)))
+        follower = Node(tmp_path / "follower", loop)
+        assert follower.book().replicationPosition() < primary.book().replicationPosition()
+        follower.follow(primary)
+        assert caughtUp(follower, primary)
+        assert follower.book().depth() == primary.book().depth() and list(follower.book().stopMap) == ["st1"]
+
+        # promotion: the standby stops following and takes orders, journaling after the primary's last seq
+        seq = primary.book().journal.seq
+        primary.close()
+        follower.run(follower.client.stop())
+        follower.client = None
+        follower.call(follower.registry.promote)
+        result = follower.call(follower.registry.submitOrder, "BTC-USDT", limitOrder("p1", OrderSide.SELL.value, "1", "80"))
+        assert result["filledQuantity"] == Decimal("1")
+        assert follower.book().journal.seq > seq and not follower.book().following
+    finally:
+        follower.close()
+        loop.call_soon_threadsafe(loop.stop)
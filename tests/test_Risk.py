@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderType, OrderSide, SelfTradePrevention
+from app.risk import PreTradePipeline, RiskLimits, RiskRejectedError, checkOrder
+from tests.conftest import makeOrder
+
+
+def testStatelessChecks():
+    limits = RiskLimits(
+        maxOrderQuantity=Decimal("10"), maxOrderNotional=Decimal("5000"),
+        accountMaxNotional={"small": Decimal("500")}, priceBand=Decimal("0.05")
+    )
+    reference = (Decimal("99"), Decimal("101"))
+    buy = lambda quantity, price, account=None: makeOrder("o", OrderType.LIMIT.value, OrderSide.BUY.value, quantity, price, account=account)
+
+    assert checkOrder(buy("1", "100"), reference, limits) is None
+    assert checkOrder(buy("0", "100"), reference, limits) == "Quantity must be greater than 0."
+    assert "exceeds the limit of 10" in checkOrder(buy("11", "100"), reference, limits)
+    assert "limit of 5000" in checkOrder(buy("9", "600"), None, limits)
+    assert "account small" in checkOrder(buy("6", "100", "small"), reference, limits)
+    assert "band" in checkOrder(buy("1", "106"), reference, limits)
+    # one-sided book: band around the side that exists; empty book: no band
+    assert "band" in checkOrder(buy("1", "94"), (Decimal("0"), Decimal("100")), limits)
+    assert checkOrder(buy("1", "94"), (Decimal("0"), Decimal("0")), limits) is None
+    assert "Stop price" in checkOrder(makeOrder("st", OrderType.STOP.value, OrderSide.BUY.value, "1", "0"), reference, limits)
+    # market orders carry no price to band or to value
+    assert checkOrder(makeOrder("m", OrderType.MARKET.value, OrderSide.BUY.value, "1", "0"), reference, limits) is None
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def testPipelineUsesObservedBbo(workers):
+    pipeline = PreTradePipeline(RiskLimits(priceBand=Decimal("0.1")), workers=workers)
+    try:
+        far = makeOrder("o1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "150")
+        asyncio.run(pipeline.check([far]))
+
+        pipeline.observe([{"symbol": "BTC-USDT", "bbo": {"bestBidPrice": Decimal("100"), "bestOfferPrice": Decimal("102")}}])
+        near = makeOrder("o2", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "105")
+        asyncio.run(pipeline.check([near]))
+        with pytest.raises(RiskRejectedError, match="Order 1:"):
+            asyncio.run(pipeline.check([near, far]))
+    finally:
+        pipeline.close()
+
+
+@pytest.mark.parametrize("mode, resting, filled", [
+    (SelfTradePrevention.NONE.value, [], "2"),
+    (SelfTradePrevention.CANCEL_NEWEST.value, ["s1", "s2"], "0"),
+    (SelfTradePrevention.CANCEL_OLDEST.value, ["b1"], "1"),
+    (SelfTradePrevention.CANCEL_BOTH.value, ["s2"], "0"),
+])
+def testSelfTradePreventionModes(tmp_path, mode, resting, filled):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, selfTradePrevention=mode)
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100", account="a"))
+    engine.addOrder(makeOrder("s2", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "101", account="b"))
+
+    taker = makeOrder("b1", OrderType.LIMIT.value, OrderSide.BUY.value, "2", "101", account="a")
+    assert engine.addOrder(taker) == Decimal(filled)
+    assert sorted(engine.orderMap) == resting
+    if mode != SelfTradePrevention.NONE.value:
+        assert all(t["maker_order_id"] != "s1" for t in engine.trades)
+    engine.close()
@@ -0,0 +1,80 @@
+import threading
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderSide
+from app.registry import SymbolRegistry
+from app.sequencer import Sequencer, ShardedSequencer
+from tests.conftest import limitOrder
+
+
+def testConcurrentSubmitsAreMatchedByOneWriter(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, fsyncEvery=0, autoFlush=False)
+    flushedBeforeResolve = []
+    sequencer = Sequencer(maxBatch=64, afterBatch=[engine.flush, lambda: flushedBeforeResolve.append(engine.journal.pending)])
+    futures = []
+    lock = threading.Lock()
+
+    def client(n):
+        for i in range(200):
+            side = OrderSide.BUY.value if (n + i) % 2 else OrderSide.SELL.value
+            future = sequencer.submit(engine.addOrder, limitOrder(f"c{n}-{i}", side, "1", "1000"))
+            with lock:
+                futures.append(future)
+
+    clients = [threading.Thread(target=client, args=(n,)) for n in range(8)]
+    for thread in clients:
+        thread.start()
+    sequencer.start()
+    for thread in clients:
+        thread.join()
+
+    filled = sum(future.result(timeout=10) for future in futures)
+    sequencer.stop()
+
+    assert sequencer.seq == 1600
+    assert sequencer.batches < 1600
+    assert set(flushedBeforeResolve) == {0}
+    assert filled == Decimal(len(engine.trades))
+    assert len(engine.trades) == 800
+    assert not engine.bidOrders and not engine.offerOrders
+
+
+def testSequencerResolvesErrorsPerRequest(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    sequencer = Sequencer().start()
+    bad = limitOrder("bad", OrderSide.BUY.value, "1", "0")
+    good = limitOrder("good", OrderSide.BUY.value, "1", "1000")
+
+    badFuture = sequencer.submit(engine.addOrder, bad)
+    goodFuture = sequencer.submit(engine.addOrder, good)
+
+    assert isinstance(badFuture.exception(timeout=5), ValueError)
+    assert goodFuture.result(timeout=5) == Decimal("0")
+    assert "good" in engine.orderMap
+    sequencer.stop()
+
+
+def testPinnedGroupsMatchInParallel(tmp_path):
+    groups = [["BTC-USDT"], ["ETH-USDT"]]
+    registry = SymbolRegistry(symbols=["BTC-USDT", "ETH-USDT", "SOL-USDT"], logDir=tmp_path, groups=groups,
+                              bookOptions={"fsyncEvery": 0, "autoFlush": False})
+    flushed = []
+    sequencer = ShardedSequencer(groups,
+                                 afterBatch=[lambda symbols: flushed.append((symbols, registry.flush(symbols)))]).start()
+    # each call only gets past the barrier while the other group's call is running too
+    barrier = threading.Barrier(2, timeout=5)
+
+    def submitWhileOtherGroupRuns(symbol, order):
+        barrier.wait()
+        return registry.submitOrder(symbol, order)
+
+    try:
+        for symbol in ["BTC-USDT", "ETH-USDT"]:
+            sequencer.submit(registry.submitOrder, symbol, limitOrder("s1", OrderSide.SELL.value, "1", "100")).result(timeout=5)
+        futures = [sequencer.submit(submitWhileOtherGroupRuns, symbol, limitOrder("b1", OrderSide.BUY.value, "1", "100"))
+                   for symbol in ["BTC-USDT", "ETH-USDT"]]
+        assert [future.result(timeout=10)["filledQuantity"] for future in futures] == [Decimal("1"), Decimal("1")]
+        assert sequencer.submit(registry.depth, "SOL-USDT").result(timeout=5) == {"bid": [], "ask": []}
+        assert {symbol for symbols, _ in flushed if symbols is not None for symbol in symbols} == {"BTC-USDT", "ETH-USDT"}
+    finally:
+        sequencer.stop()
+        registry.close()
@@ -0,0 +1,40 @@
+from decimal import Decimal
+from app.orderBook import OrderBook
+from app.sink import MemorySink
+from benchmarks.backtest import expandGrid, runBacktest, runBacktests
+from benchmarks.flows import FLOWS, orderFromFlow
+
+
+def testMemorySinkMatchesLikeTheFileSinkWithoutWriting(tmp_path):
+    flow = FLOWS["mixed"](2000, 5)
+    memory = OrderBook(symbol="BTC-USDT", logDir=tmp_path / "memory", sink=MemorySink(), candles=True, compactEvery=50)
+    durable = OrderBook(symbol="BTC-USDT", logDir=tmp_path / "file", fsyncEvery=0, compactEvery=50)
+    for engine in [memory, durable]:
+        engine.fillOrders()
+        engine.loadTradesFromFile()
+        for op in flow:
+            engine.addOrder(orderFromFlow(op["order"]))
+        engine.flush()
+
+    assert memory.depth() == durable.depth()
+    assert memory.journal.seq == durable.journal.seq
+    assert [t["seq"] for t in memory.sink.tradeLog.records] == list(range(1, durable.tradeLog.seq + 1))
+    key = lambda page: [(t["seq"], t["maker_order_id"], t["price"]) for t in page["trades"]]
+    assert key(memory.queryTrades(limit=5)) == key(durable.queryTrades(limit=5))
+    memory.close()
+    durable.close()
+    assert not (tmp_path / "memory").exists()
+
+
+def testBacktestSweepRunsEachConfigOnItsOwnBook():
+    configs = expandGrid({"name": "mm", "flow": "marketMaker", "orders": 1500, "seed": 2}, {"book.tickSize": ["0.5", "1"]})
+    assert [config["name"] for config in configs] == ["mm[book.tickSize=0.5]", "mm[book.tickSize=1]"]
+
+    results = runBacktests(configs, workers=2)
+    assert [result["name"] for result in results] == ["mm[book.tickSize=0.5]", "mm[book.tickSize=1]"]
+    inline = runBacktest(configs[0])
+    assert [(f["maker_order_id"], f["taker_order_id"], f["quantity"]) for f in inline["fills"]] == \
+        [(f["maker_order_id"], f["taker_order_id"], f["quantity"]) for f in results[0]["fills"]]
+    first = results[0]
+    assert first["ops"] == 1500 and first["cancelled"] > 0 and first["trades"] == len(first["fills"]) > 0
+    assert Decimal(first["volume"]) == sum(Decimal(fill["quantity"]) for fill in first["fills"])
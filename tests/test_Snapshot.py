@@ -0,0 +1,120 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderSide
+from app.sink import FileSink
+from app.snapshot import main as convert
+from tests.conftest import limitOrder
+
+
+def testBinarySnapshotRestoresLevelsQueuesAndOrders(tmp_path):
+    expiry = datetime(2099, 1, 2, tzinfo=timezone.utc)
+    placed = datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    for scale in [{}, {"tickSize": Decimal("0.5"), "lotSize": Decimal("0.1")}]:
+        logDir = tmp_path / str(len(scale))
+        engine = OrderBook(symbol="BTC-USDT", logDir=logDir, compactEvery=0, **scale)
+        engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "3", "1000.5"))
+        engine.addOrder(limitOrder("s2", OrderSide.SELL.value, "2", "1000.5", tif="GTD", expiry=expiry, timeStamp=placed))
+        engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "1.5", "999"))
+        engine.addOrder(limitOrder("b2", OrderSide.BUY.value, "0.5", "1000.5"))
+        engine.compactLogs()
+        engine.addOrder(limitOrder("b3", OrderSide.BUY.value, "1", "998"))
+        engine.close()
+
+        restored = OrderBook(symbol="BTC-USDT", logDir=logDir, **scale)
+        restored.fillOrders()
+        assert restored.depth() == engine.depth()
+        level = restored.offerOrders[restored.scale.toPrice("1000.5")]
+        assert [o.orderId for o in level] == ["s1", "s2"] and level.totalQuantity == restored.scale.toQuantity("4.5")
+        s2 = restored.orderMap["s2"]
+        assert (s2.tif, s2.expiry, s2.timeStamp) == ("GTD", expiry, placed)
+        assert restored.scale.fromQuantity(s2.quantity) == Decimal("2")
+        assert restored.bbo == engine.bbo and restored.journal.seq == engine.journal.seq
+
+        # handles stay unique after a snapshot load
+        restored.addOrder(limitOrder("b4", OrderSide.BUY.value, "1", "997"))
+        assert len({o.handle for o in restored.orderMap.values()}) == len(restored.orderMap)
+        restored.close()
+
+
+def testConverterTurnsJsonlSnapshotIntoBinary(tmp_path):
+    with open(tmp_path / "snapshot.jsonl", "w") as f:
+        f.write(json.dumps({"seq": 2, "symbol": "BTC-USDT"}) + "\n")
+        f.write(json.dumps(limitOrder("s1", OrderSide.SELL.value, "3", "1000").toDict(), default=str) + "\n")
+    with open(tmp_path / "journal.jsonl", "w") as f:
+        f.write(json.dumps({"seq": 3, "event": "fill", "orderId": "s1", "quantity": "1"}) + "\n")
+
+    assert convert([str(tmp_path), "--symbol", "BTC-USDT"]) == 0
+    assert (tmp_path / "snapshot.bin").exists() and not (tmp_path / "snapshot.jsonl").exists()
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+    assert restored.orderMap["s1"].remainingQuantity == Decimal("2")
+    assert restored.journal.seq == 3
+    restored.close()
+
+
+class SnapshotStore(FileSink) :
+    """Journal and trades on disk, snapshots somewhere else."""
+
+    def __init__(self, logDir, store):
+        super().__init__(logDir, fsyncEvery=0)
+        self.store = store
+
+    def readSnapshot(self):
+        return self.store.get("snapshot")
+
+    def writeSnapshot(self, data):
+        self.store["snapshot"] = data
+
+
+def testSnapshotsGoThroughTheSink(tmp_path):
+    store = {}
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, sink=SnapshotStore(tmp_path, store), compactEvery=0)
+    engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "3", "1000"))
+    engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "1", "1000"))
+    engine.compactLogs()
+    engine.addOrder(limitOrder("b2", OrderSide.BUY.value, "1", "999"))
+    engine.close()
+    assert "snapshot" in store and not (tmp_path / "snapshot.bin").exists()
+    assert engine.catchUp(0, 0)["snapshot"] == store["snapshot"]
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path, sink=SnapshotStore(tmp_path, store))
+    restored.fillOrders()
+    assert restored.depth() == engine.depth() and restored.journal.seq == engine.journal.seq
+    restored.close()
+
+
+def testOrdersRestoredFromSnapshotAmendAndExport(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, compactEvery=0)
+    engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "1", "101"))
+    engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "3", "100"))
+    engine.compactLogs()
+    engine.close()
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+    # a partly crossing amend: b1 takes s1 and the rest moves to 101
+    restored.amendOrder("b1", None, Decimal("101"))
+    assert restored.orderMap["b1"].toDict()["stopPrice"] is None
+    restored.saveOrdersToFile(tmp_path / "orders.jsonl")
+    assert json.loads((tmp_path / "orders.jsonl").read_text())["orderId"] == "b1"
+    restored.close()
+
+    reopened = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    reopened.fillOrders()
+    assert reopened.depth() == restored.depth() and list(reopened.orderMap) == ["b1"]
+    assert reopened.scale.fromQuantity(reopened.orderMap["b1"].remainingQuantity) == Decimal("2")
+    reopened.close()
+
+
+def testLoadOrdersFromFileRestsWithoutMatching(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path / "a")
+    engine.addOrder(limitOrder("s1", OrderSide.SELL.value, "1", "1000"))
+    engine.addOrder(limitOrder("b1", OrderSide.BUY.value, "1", "999"))
+    engine.saveOrdersToFile(tmp_path / "orders.jsonl")
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path / "b")
+    restored.loadOrdersFromFile(tmp_path / "orders.jsonl")
+    assert restored.depth() == engine.depth()
+    assert list(restored.trades) == []
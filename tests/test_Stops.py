@@ -0,0 +1,86 @@
+import pytest
+from decimal import Decimal
+from app.orderBook import OrderBook, OrderType, OrderSide
+from tests.conftest import makeOrder
+
+
+def testStopsTriggerInOrderAndCascade(tmp_path):
+    for scale in [{}, {"tickSize": Decimal("0.5"), "lotSize": Decimal("0.1")}]:
+        logDir = tmp_path / str(len(scale))
+        engine = OrderBook(symbol="BTC-USDT", logDir=logDir, **scale)
+        for orderId, price in [("s1", "100"), ("s2", "101"), ("s3", "102"), ("s4", "105")]:
+            engine.addOrder(makeOrder(orderId, OrderType.LIMIT.value, OrderSide.SELL.value, "1", price))
+        engine.addOrder(makeOrder("st3", OrderType.STOP.value, OrderSide.BUY.value, "1", stopPrice="102"))
+        engine.addOrder(makeOrder("st2", OrderType.STOP_LIMIT.value, OrderSide.BUY.value, "1", "103", stopPrice="101"))
+        engine.addOrder(makeOrder("st1", OrderType.STOP.value, OrderSide.BUY.value, "1", stopPrice="100.5"))
+        engine.addOrder(makeOrder("x1", OrderType.STOP.value, OrderSide.SELL.value, "1", stopPrice="90"))
+        assert engine.bbo["bestBidPrice"] == 0 and set(engine.stopMap) == {"st1", "st2", "st3", "x1"}
+
+        engine.addOrder(makeOrder("t1", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "100"))
+        assert len(engine.stopMap) == 4
+
+        # 101 sets off st1 then st2 (by stop price); st1's print at 102 sets off st3 in the same event
+        engine.addOrder(makeOrder("t2", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "101"))
+        assert [(t["maker_order_id"], t["taker_order_id"]) for t in engine.trades] == [
+            ("s1", "t1"), ("s2", "t2"), ("s3", "st1"), ("s4", "st3")
+        ]
+        assert engine.bbo["bestBidPrice"] == Decimal("103") and "st2" in engine.orderMap
+        assert list(engine.stopMap) == ["x1"]
+        engine.close()
+
+        restored = OrderBook(symbol="BTC-USDT", logDir=logDir, **scale)
+        restored.fillOrders()
+        assert restored.depth() == engine.depth() and list(restored.stopMap) == ["x1"]
+        restored.compactLogs()
+        restored.close()
+
+        compacted = OrderBook(symbol="BTC-USDT", logDir=logDir, **scale)
+        compacted.fillOrders()
+        assert list(compacted.stopMap) == ["x1"]
+        assert compacted.scale.fromPrice(compacted.stopMap["x1"].stopPrice) == Decimal("90")
+        compacted.close()
+
+
+def testStopThroughLastPriceEntersImmediatelyAndStopsCancel(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "2", "100"))
+    engine.addOrder(makeOrder("b1", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "100"))
+
+    assert engine.addOrder(makeOrder("st1", OrderType.STOP.value, OrderSide.BUY.value, "1", stopPrice="99")) == Decimal("1")
+    assert engine.addOrder(makeOrder("st2", OrderType.STOP.value, OrderSide.SELL.value, "1", stopPrice="95")) == 0
+    assert engine.cancelOrder("st2") and engine.stopMap == {}
+    engine.close()
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+    assert restored.stopMap == {} and restored.depth() == engine.depth()
+
+
+def testCrossingAmendTriggersStopsInTheSameEvent(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.addOrder(makeOrder("b1", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "101"))
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "103"))
+    engine.addOrder(makeOrder("s2", OrderType.LIMIT.value, OrderSide.SELL.value, "2", "105"))
+    engine.addOrder(makeOrder("st1", OrderType.STOP.value, OrderSide.SELL.value, "1", stopPrice="101"))
+
+    # s1 amended down through b1 prints at 101 and sets off st1 right away
+    engine.amendOrder("s1", price=Decimal("101"))
+    assert engine.stopMap == {} and engine.triggerRange is None
+    assert [t["taker_order_id"] for t in engine.trades] == ["s1"]
+    engine.close()
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+    assert restored.stopMap == {} and restored.depth() == engine.depth()
+
+
+def testBatchWithOffTickStopIsRejectedBeforeAnythingTrades(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, tickSize=Decimal("0.5"))
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "100"))
+    seq = engine.journal.seq
+    with pytest.raises(ValueError, match="Order 1"):
+        engine.addOrders([
+            makeOrder("b1", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "100"),
+            makeOrder("st1", OrderType.STOP.value, OrderSide.BUY.value, "1", stopPrice="101.3"),
+        ])
+    assert list(engine.trades) == [] and engine.journal.seq == seq and "s1" in engine.orderMap
@@ -0,0 +1,125 @@
+import json
+from app.orderBook import OrderBook, OrderType, OrderSide
+from app.tradeLog import TradeLog
+from tests.conftest import makeOrder
+
+
+def testSweepAppendsEachTradeOnce(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    for i in range(5):
+        engine.addOrder(makeOrder(f"s{i}", OrderType.LIMIT.value, OrderSide.SELL.value, "1", str(1000 + i)))
+    engine.addOrder(makeOrder("m1", OrderType.MARKET.value, OrderSide.BUY.value, "5", "0"))
+
+    lines = [json.loads(line) for path in engine.tradeLog.segments() for line in open(path)]
+    assert [t["maker_order_id"] for t in lines] == ["s0", "s1", "s2", "s3", "s4"]
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.loadTradesFromFile()
+    assert restored.trades == engine.trades
+
+
+def testSegmentsRotateBySizeAndLoadOnlyRecent(tmp_path):
+    log = TradeLog(tmp_path, maxSegmentBytes=1, maxSegmentAgeSeconds=None)
+    for i in range(3):
+        log.append([{"timestamp": f"2026-01-01T00:00:0{i}.000000+00:00", "price": str(i), "maker_order_id": "m", "taker_order_id": "t"}])
+    log.close()
+
+    assert len(log.segments()) == 3
+    assert [t["price"] for t in log.loadRecent(segments=2)] == ["1", "2"]
+
+
+def testFailedFOKWritesNoTrades(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "2", "1000"))
+    engine.addOrder(makeOrder("f1", OrderType.FOK.value, OrderSide.BUY.value, "5", "1000"))
+
+    assert list(engine.trades) == []
+    assert engine.tradeLog.segments() == []
+
+
+def tradeAt(second, maker, taker):
+    return {
+        "timestamp": f"2026-01-01T00:{second // 60:02d}:{second % 60:02d}.000000+00:00",
+        "symbol": "BTC-USDT",
+        "price": "1000",
+        "quantity": "1",
+        "maker_order_id": maker,
+        "taker_order_id": taker,
+        "aggressor_side": "buy"
+    }
+
+
+def testIndexedQuerySeeksByCursorTimeAndOrderId(tmp_path):
+    log = TradeLog(tmp_path, maxSegmentBytes=4000, maxSegmentAgeSeconds=None, indexEvery=4)
+    for second in range(300):
+        log.append([tradeAt(second, f"m{second % 7}", f"t{second}")])
+    # rotated segments from their sorted index, the open one from memory
+    assert [t["seq"] for t in log.query(orderId="m3", limit=1000)] == [s + 1 for s in range(300) if s % 7 == 3]
+    log.close()
+    assert len(log.segments()) > 5
+
+    page = log.query(afterSeq=120, limit=5)
+    assert [t["seq"] for t in page] == [121, 122, 123, 124, 125]
+
+    window = log.query(since="2026-01-01T00:02:00.000000+00:00", until="2026-01-01T00:02:10.000000+00:00", limit=100)
+    assert [t["seq"] for t in window] == list(range(121, 131))
+
+    byOrder = log.query(orderId="m3", limit=1000)
+    assert [t["seq"] for t in byOrder] == [s + 1 for s in range(300) if s % 7 == 3]
+    rotated = [path for path in log.segments() if path != log.segmentPath]
+    keys = [line.rpartition(" ")[0] for line in rotated[0].with_suffix(".sidx").read_text().splitlines()]
+    assert keys == sorted(keys, key=str.encode)
+
+    reopened = TradeLog(tmp_path)
+    assert reopened.seq == 300
+
+
+def testQueryTradesServesRecentFromRingBufferAndOlderFromDisk(tmp_path):
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path, recentTrades=5)
+    for i in range(12):
+        engine.addOrder(makeOrder(f"s{i}", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "1000"))
+        engine.addOrder(makeOrder(f"b{i}", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "1000"))
+
+    assert [t["seq"] for t in engine.trades] == [8, 9, 10, 11, 12]
+
+    # no cursor: the newest page, from the ring buffer when it holds enough
+    latest = engine.queryTrades(limit=3)
+    assert [t["seq"] for t in latest["trades"]] == [10, 11, 12] and latest["nextCursor"] == "12"
+    assert [t["seq"] for t in engine.queryTrades(limit=8)["trades"]] == list(range(5, 13))
+
+    pages, cursor = [], "0"
+    while True:
+        page = engine.queryTrades(cursor=cursor, limit=5)
+        pages.append([t["seq"] for t in page["trades"]])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    assert pages == [[1, 2, 3, 4, 5], [6, 7, 8, 9, 10], [11, 12]]
+
+    assert [t["taker_order_id"] for t in engine.queryTrades(orderId="s2")["trades"]] == ["b2"]
+
+
+def testLegacyTradeFileIsImportedIntoTheFirstSegment(tmp_path):
+    with open(tmp_path / "trade.jsonl", "w") as f:
+        for i in range(17):
+            f.write(json.dumps({
+                "timestamp": f"2025-06-15T13:16:{i:02d}.5+00:00", "symbol": "BTC-USDT", "price": "3000", "quantity": "1",
+                "maker_order_id": f"old-m{i}", "taker_order_id": f"old-t{i}", "aggressor_side": "buy"
+            }) + "\n")
+
+    engine = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    engine.fillOrders()
+    engine.loadTradesFromFile()
+    assert [t["seq"] for t in engine.trades][-2:] == [16, 17]
+    engine.addOrder(makeOrder("s1", OrderType.LIMIT.value, OrderSide.SELL.value, "1", "3001"))
+    engine.addOrder(makeOrder("b1", OrderType.LIMIT.value, OrderSide.BUY.value, "1", "3001"))
+    engine.close()
+
+    restored = OrderBook(symbol="BTC-USDT", logDir=tmp_path)
+    restored.fillOrders()
+    restored.loadTradesFromFile()
+    history = restored.queryTrades(cursor="0", limit=100)["trades"]
+    assert [t["seq"] for t in history] == list(range(1, 19))
+    assert history[0]["timestamp"] == "2025-06-15T13:16:00.500000+00:00" and history[-1]["taker_order_id"] == "b1"
+    assert [t["seq"] for t in restored.queryTrades(orderId="old-m3")["trades"]] == [4]
+    restored.close()